@@ -59,6 +59,7 @@ def get_addons():
         'tweak.csrf = htsql.tweak.csrf:TweakCSRFAddon',
         'tweak.django = htsql.tweak.django:TweakDjangoAddon',
         'tweak.etl = htsql.tweak.etl:TweakETLAddon',
+        'tweak.etl.pgsql = htsql_pgsql.tweak.etl:TweakETLPGSQLAddon',
         'tweak.filedb = htsql.tweak.filedb:TweakFileDBAddon',
         'tweak.gateway = htsql.tweak.gateway:TweakGatewayAddon',
         'tweak.hello = htsql.tweak.hello:TweakHelloAddon',
@@ -67,6 +68,9 @@ def get_addons():
         'tweak.meta = htsql.tweak.meta:TweakMetaAddon',
         'tweak.meta.slave = htsql.tweak.meta.slave:TweakMetaSlaveAddon',
         'tweak.override = htsql.tweak.override:TweakOverrideAddon',
+        'tweak.parallel = htsql.tweak.parallel:TweakParallelAddon',
+        'tweak.parallel.pgsql'
+            ' = htsql_pgsql.tweak.parallel:TweakParallelPGSQLAddon',
         'tweak.pool = htsql.tweak.pool:TweakPoolAddon',
         'tweak.resource = htsql.tweak.resource:TweakResourceAddon',
         'tweak.shell = htsql.tweak.shell:TweakShellAddon',
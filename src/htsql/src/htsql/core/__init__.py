@@ -10,7 +10,7 @@ from .validator import DBVal, StrVal, BoolVal, UIntVal
 from .addon import Addon, Parameter, Variable, addon_registry
 from .connect import connect
 from .error import Error
-from .introspect import introspect
+from .introspect import introspect, reintrospect
 from .cache import GeneralCache
 
 
@@ -41,7 +41,7 @@ class HTSQLAddon(Addon):
     the password given as a part of `db` parameter.
 
     The parameter `query_cache_size` specifies the number of cached
-    query plans.  The default value is 1024.
+    query plans and translated raw queries.  The default value is 1024.
 
     The parameter `debug`, if set to `True`, enables debug output.
     """
@@ -63,6 +63,10 @@ class HTSQLAddon(Addon):
             Variable('connection'),
             Variable('can_read', True),
             Variable('can_write', True),
+            # Set when the consumer keeps the transaction open while
+            # reading the output, which permits batched queries
+            # to stream rows from the database.
+            Variable('streaming', False),
     ]
 
     packages = ['.', '.cmd', '.fmt', '.tr', '.tr.fn', '.syn']
@@ -29,6 +29,10 @@ class GeneralCache:
             assert key not in self.values
             self.values[key] = value
 
+    def clear(self):
+        with self.cache_lock:
+            self.values = {}
+
 
 def once(service):
     @functools.wraps(service)
@@ -313,6 +313,22 @@ class Connect(Utility):
         raise NotImplementedError()
 
 
+class StreamCursor(Utility):
+    """
+    Opens a cursor that fetches rows from the server incrementally.
+
+    By default, returns a regular cursor; backends that support
+    server-side cursors should override it.
+    """
+
+    def __init__(self, connection):
+        assert isinstance(connection, ConnectionProxy)
+        self.connection = connection
+
+    def __call__(self):
+        return self.connection.cursor()
+
+
 class Scramble(Adapter):
 
     adapt(Domain)
@@ -393,5 +409,6 @@ scramble = Scramble.__invoke__
 unscramble = Unscramble.__invoke__
 unscramble_error = UnscrambleError.__invoke__
 transaction = Transact.__invoke__
+stream_cursor = StreamCursor.__invoke__
 
 
@@ -5,7 +5,8 @@
 
 from ..adapter import Protocol, call
 from .format import (DefaultFormat, HTMLFormat, RawFormat, JSONFormat,
-        CSVFormat, TSVFormat, XMLFormat, ProxyFormat, TextFormat)
+        CompactJSONFormat, CSVFormat, TSVFormat, XMLFormat, ProxyFormat,
+        TextFormat)
 
 
 class Accept(Protocol):
@@ -39,6 +40,12 @@ class AcceptJSON(Accept):
     format = JSONFormat
 
 
+class AcceptCompactJSON(Accept):
+
+    call("x-htsql/compact-json")
+    format = CompactJSONFormat
+
+
 class AcceptCSV(Accept):
 
     call("text/csv",
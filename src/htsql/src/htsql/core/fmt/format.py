@@ -28,6 +28,10 @@ class JSONFormat(Format):
         self.with_null = with_null
 
 
+class CompactJSONFormat(JSONFormat):
+    pass
+
+
 class CSVFormat(Format):
 
     def __init__(self, dialect='excel'):
@@ -17,11 +17,12 @@ from ..domain import (Domain, BooleanDomain, NumberDomain, FloatDomain,
         TextDomain, EnumDomain, DateDomain, TimeDomain, DateTimeDomain,
         ListDomain, RecordDomain, IdentityDomain, UntypedDomain, VoidDomain,
         OpaqueDomain, Profile)
-from .format import RawFormat, JSONFormat
+from .format import RawFormat, JSONFormat, CompactJSONFormat
 from .emit import EmitHeaders, Emit
 import re
 import math
 import decimal
+import itertools
 
 
 class JSIndicator(Printable):
@@ -153,6 +154,60 @@ def dump_json(iterator):
             break
 
 
+def dump_json_scalar(token):
+    # Serializes a scalar token.
+    if token is None:
+        return "null"
+    elif token is True:
+        return "true"
+    elif token is False:
+        return "false"
+    elif isinstance(token, str):
+        return "\"%s\"" % escape_json(token)
+    elif isinstance(token, int):
+        return str(token)
+    elif isinstance(token, float):
+        if math.isinf(token) or math.isnan(token):
+            return "null"
+        return str(token)
+    elif isinstance(token, decimal.Decimal):
+        if not token.is_finite():
+            return "null"
+        return str(token)
+    assert False, repr(token)
+
+
+def dump_compact_json(iterator):
+    # Serializes a stream of tokens without indentation.
+    chunks = []
+    # For each open container, its type and the number of emitted tokens.
+    states = []
+    for token in iterator:
+        if token is JS_END:
+            context, count = states.pop()
+            chunks.append("]" if context is JS_SEQ else "}")
+            continue
+        if states:
+            state = states[-1]
+            context, count = state
+            state[1] = count+1
+            if context is JS_MAP:
+                if count % 2 == 0:
+                    assert isinstance(token, str), repr(token)
+                    chunks.append("%s\"%s\":" % ("," if count else "",
+                                                 escape_json(token)))
+                    continue
+            elif count:
+                chunks.append(",")
+        if token is JS_SEQ or token is JS_MAP:
+            chunks.append("[" if token is JS_SEQ else "{")
+            states.append([token, 0])
+        else:
+            chunks.append(dump_json_scalar(token))
+    assert not states
+    return "".join(chunks)
+
+
 class EmitJSONHeaders(EmitHeaders):
 
     adapt_many(JSONFormat,
@@ -218,6 +273,53 @@ class EmitJSON(Emit):
         yield JS_END
 
 
+class EmitCompactJSON(Emit):
+
+    adapt(CompactJSONFormat)
+
+    # The approximate size of an output chunk.
+    chunk_size = 65536
+
+    def __call__(self):
+        # Like `/:json`, omit the key when the output is `null`.
+        if self.data is None and not self.format.with_null:
+            return ["{}\n"]
+        if self.meta.tag:
+            key = self.meta.tag
+        else:
+            key = str(0)
+        head = "{\"%s\":" % escape_json(key)
+        return itertools.chain([head], self.emit(), ["}\n"])
+
+    def emit(self):
+        # Prepare the encoders while the application is active.
+        domain = self.meta.domain
+        if not (isinstance(domain, ListDomain) and self.data is not None):
+            return [to_compact_json(domain, self.format.with_null)(self.data)]
+        item_to_compact_json = to_compact_json(domain.item_domain,
+                                               self.format.with_null)
+        return self.emit_items(item_to_compact_json)
+
+    def emit_items(self, item_to_compact_json):
+        # Render a list item by item to avoid building the whole output
+        # in memory; then glue the items into large chunks.
+        chunk_size = self.chunk_size
+        chunks = ["["]
+        size = 0
+        for item in self.data:
+            if size:
+                chunks.append(",")
+            line = item_to_compact_json(item)
+            chunks.append(line)
+            size += len(line)+1
+            if size >= chunk_size:
+                yield "".join(chunks)
+                chunks = []
+                size = 1
+        chunks.append("]")
+        yield "".join(chunks)
+
+
 class ToRaw(Adapter):
 
     adapt(Domain)
@@ -544,6 +646,126 @@ class ListToJSON(ToJSON):
             yield JS_END
 
 
+class ToCompactJSON(Adapter):
+    """
+    Produces a function that serializes a value of the given domain
+    as a compact JSON string.
+
+    The default implementation serializes the tokens generated by
+    :class:`ToJSON`; implementations for common domains generate
+    the output directly.
+    """
+
+    adapt(Domain)
+
+    def __init__(self, domain, with_null):
+        assert isinstance(domain, Domain)
+        self.domain = domain
+        self.with_null = with_null
+
+    def __call__(self):
+        scatter = to_json(self.domain)
+        if self.with_null:
+            def encode(value, scatter=scatter):
+                return dump_compact_json(scatter(value))
+        else:
+            def encode(value, scatter=scatter):
+                return dump_compact_json(purge_null_keys(scatter(value)))
+        return encode
+
+
+class NativeToCompactJSON(ToCompactJSON):
+
+    adapt_many(UntypedDomain,
+               BooleanDomain,
+               NumberDomain)
+
+    def __call__(self):
+        return dump_json_scalar
+
+
+class TextToCompactJSON(ToCompactJSON):
+
+    adapt_many(TextDomain,
+               EnumDomain)
+
+    def __call__(self):
+        def encode(value):
+            if value is None:
+                return "null"
+            return "\"%s\"" % escape_json(value)
+        return encode
+
+
+class NativeStringToCompactJSON(ToCompactJSON):
+
+    adapt_many(DateDomain,
+               TimeDomain)
+
+    def __call__(self):
+        def encode(value):
+            if value is None:
+                return "null"
+            return "\"%s\"" % value
+        return encode
+
+
+class DateTimeToCompactJSON(ToCompactJSON):
+
+    adapt(DateTimeDomain)
+
+    def __call__(self):
+        def encode(value):
+            if value is None:
+                return "null"
+            elif not value.time():
+                return "\"%s\"" % value.date()
+            return "\"%s\"" % value
+        return encode
+
+
+class RecordToCompactJSON(ToCompactJSON):
+
+    adapt(RecordDomain)
+
+    def __call__(self):
+        # Generate field keys the same way as `RecordToJSON`.
+        fields = []
+        used = set()
+        for idx, field in enumerate(self.domain.fields):
+            if field.tag and field.tag not in used:
+                key = field.tag
+                used.add(key)
+            else:
+                key = str(idx)
+            fields.append(("\"%s\":" % escape_json(key),
+                           to_compact_json(field.domain, self.with_null)))
+        with_null = self.with_null
+        def encode(value):
+            if value is None:
+                return "null"
+            chunks = []
+            for item, (prefix, field_encode) in zip(value, fields):
+                if item is None and not with_null:
+                    continue
+                chunks.append(prefix+field_encode(item))
+            return "{%s}" % ",".join(chunks)
+        return encode
+
+
+class ListToCompactJSON(ToCompactJSON):
+
+    adapt(ListDomain)
+
+    def __call__(self):
+        item_encode = to_compact_json(self.domain.item_domain, self.with_null)
+        def encode(value):
+            if value is None:
+                return "null"
+            return "[%s]" % ",".join([item_encode(item) for item in value])
+        return encode
+
+
 def profile_to_raw(profile):
     yield JS_MAP
     for name in MetaToRaw.__catalogue__():
@@ -565,3 +787,7 @@ def to_json(domain):
     return ToJSON.__invoke__(domain)
 
 
+def to_compact_json(domain, with_null=False):
+    return ToCompactJSON.__invoke__(domain, with_null)
+
+
@@ -12,6 +12,7 @@ This module declares the database introspector adapter.
 
 
 from .adapter import Utility, rank
+from .context import context
 from .cache import once
 
 
@@ -87,3 +88,19 @@ def introspect():
     return catalog
 
 
+def reintrospect(values=None):
+    """
+    Discards the cached catalog together with all the values derived
+    from it (labels, query plans) and introspects the database again.
+
+    `values`
+        Optional mapping from a :func:`.cache.once` service to its value;
+        used to fill the emptied cache before introspection.
+    """
+    cache = context.app.htsql.cache
+    cache.clear()
+    for service, value in (values or {}).items():
+        cache.set((service.__module__, service.__name__), value)
+    return introspect()
+
+
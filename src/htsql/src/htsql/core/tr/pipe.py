@@ -6,11 +6,11 @@
 from ..util import Clonable, YAMLable
 from ..context import context
 from ..domain import Product
-from ..connect import transaction, scramble, unscramble
+from ..connect import (transaction, scramble, unscramble, stream_cursor,
+        Unscramble)
 from ..error import PermissionError
+from .spill import SpillBuffer
 import operator
-import tempfile
-import pickle
 
 
 class Pipe(Clonable, YAMLable):
@@ -102,6 +102,8 @@ class BatchSQLPipe(Pipe):
             if input_domains is not None:
                 scrambles = [scramble(domain) for domain in input_domains]
             unscrambles = [unscramble(domain) for domain in output_domains]
+            if context.env.streaming:
+                return stream_sql(input, sql, scrambles, unscrambles, batch)
             with transaction() as connection:
                 cursor = connection.cursor()
                 if scrambles is None:
@@ -115,26 +117,15 @@ class BatchSQLPipe(Pipe):
                                     in enumerate(zip(input, scrambles)))
                     cursor.execute(sql, parameters)
                 chunk = cursor.fetchmany(batch)
-                chunk = [tuple([convert(item)
-                                for item, convert in zip(row, unscrambles)])
-                         for row in chunk]
+                columns = unscramble_columns(chunk, unscrambles)
                 if len(chunk) < batch:
-                    return chunk
-                stream = tempfile.TemporaryFile()
-                size = 0
+                    return zip_columns(columns, len(chunk))
+                buffer = SpillBuffer(output_domains)
                 while chunk:
-                    size += 1
-                    pickle.dump(chunk, stream, 2)
+                    buffer.write(columns, len(chunk))
                     chunk = cursor.fetchmany(batch)
-                    chunk = [tuple([convert(item)
-                                    for item, convert in zip(row, unscrambles)])
-                             for row in chunk]
-                stream.seek(0)
-                def iterate(stream=stream, size=size, load=pickle.load):
-                    for k in range(size):
-                        for row in load(stream):
-                            yield row
-                return iterate(stream, size)
+                    columns = unscramble_columns(chunk, unscrambles)
+                return iter(buffer)
         return run_sql
 
     def __yaml__(self):
@@ -182,6 +173,49 @@ class ValuePipe(Pipe):
         yield ('data', self.data)
 
 
+def unscramble_columns(chunk, unscrambles):
+    # Converts a batch of raw rows to a list of columns; the columns
+    # of the domains that need no conversion are passed as is.
+    columns = []
+    for column, convert in zip(zip(*chunk), unscrambles):
+        if convert is not Unscramble.convert:
+            column = list(map(convert, column))
+        columns.append(column)
+    return columns
+
+
+def zip_columns(columns, size):
+    # Converts a list of columns back to a list of rows.
+    if not columns:
+        return [()]*size
+    return list(zip(*columns))
+
+
+def stream_sql(input, sql, scrambles, unscrambles, batch):
+    # Executes the query on the first request for a row; the consumer
+    # must keep the transaction open until the output is exhausted.
+    with transaction() as connection:
+        cursor = stream_cursor(connection)
+        if scrambles is None:
+            assert input is None
+            cursor.execute(sql)
+        else:
+            assert isinstance(input, (tuple, list))
+            assert len(input) == len(scrambles)
+            parameters = dict((str(index+1), scramble(item))
+                    for index, (item, scramble)
+                            in enumerate(zip(input, scrambles)))
+            cursor.execute(sql, parameters)
+    while True:
+        chunk = cursor.fetchmany(batch)
+        if not chunk:
+            break
+        for row in zip_columns(unscramble_columns(chunk, unscrambles),
+                               len(chunk)):
+            yield row
+    cursor.close()
+
+
 class RecordPipe(Pipe):
 
     def __init__(self, field_pipes, record_class=tuple):
@@ -219,6 +253,8 @@ class SinglePipe(Pipe):
 
     def __call__(self):
         def make_single(input):
+            if not isinstance(input, list):
+                input = list(input)
             assert len(input) <= 1
             if input:
                 return input[0]
@@ -270,13 +306,13 @@ class MixPipe(Pipe):
 
     def __call__(self):
         make_keys = [key_pipe() for key_pipe in self.key_pipes]
-        def mix(input, make_parent_key=make_keys[0],
-                       make_kid_keys=make_keys[1:]):
-            parent = input[0]
-            kids = input[1:]
+        def merge(parent, kids, make_parent_key, make_kid_keys):
+            # Kid rows come in the order of the parent rows, so it is
+            # enough to keep one row ahead of each kid.
+            end = object()
+            kids = [iter(kid) for kid in kids]
             kids_range = list(range(len(kids)))
-            tops = [0]*len(kids)
-            output = []
+            tops = [next(kid, end) for kid in kids]
             for parent_row in parent:
                 row = list(parent_row)
                 parent_key = make_parent_key(parent_row)
@@ -285,16 +321,23 @@ class MixPipe(Pipe):
                     top = tops[idx]
                     make_kid_key = make_kid_keys[idx]
                     kid_rows = []
-                    while (top < len(kid) and
-                           make_kid_key(kid[top]) == parent_key):
-                        kid_rows.append(kid[top])
-                        top += 1
+                    while top is not end and make_kid_key(top) == parent_key:
+                        kid_rows.append(top)
+                        top = next(kid, end)
                     tops[idx] = top
                     row.append(kid_rows)
-                output.append(tuple(row))
+                yield tuple(row)
             for idx in kids_range:
-                assert tops[idx] == len(kids[idx])
-            return output
+                assert tops[idx] is end
+        def mix(input, make_parent_key=make_keys[0],
+                       make_kid_keys=make_keys[1:]):
+            parent = input[0]
+            kids = input[1:]
+            output = merge(parent, kids, make_parent_key, make_kid_keys)
+            # Keep streamed output lazy.
+            if not isinstance(parent, list):
+                return output
+            return list(output)
         return mix
 
     def __yaml__(self):
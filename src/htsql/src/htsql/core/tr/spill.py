@@ -0,0 +1,158 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ..adapter import Adapter, adapt
+from ..domain import Domain, DateDomain, DecimalDomain
+import array
+import datetime
+import decimal
+import mmap
+import pickle
+import tempfile
+
+
+def dump_column(values):
+    return pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+
+
+def load_column(data, size):
+    return pickle.loads(data)
+
+
+class SpillCodec(Adapter):
+    """
+    Serializes a column of values of the given domain.
+
+    Returns a pair ``(encode, decode)``.  ``encode(values)`` takes a list
+    of values and returns a byte string or ``None`` if the values could
+    not be encoded, in which case they are pickled.  ``decode(data, size)``
+    restores the list from a byte string.
+    """
+
+    adapt(Domain)
+
+    encode = staticmethod(dump_column)
+    decode = staticmethod(load_column)
+
+    def __init__(self, domain):
+        self.domain = domain
+
+    def __call__(self):
+        return (self.encode, self.decode)
+
+
+class SpillDate(SpillCodec):
+    # Dates are stored as day ordinals; `0` denotes `NULL`.
+
+    adapt(DateDomain)
+
+    @staticmethod
+    def encode(values, date=datetime.date):
+        ordinals = []
+        for value in values:
+            if value is None:
+                ordinals.append(0)
+            elif type(value) is date:
+                ordinals.append(value.toordinal())
+            else:
+                return None
+        return array.array('q', ordinals).tobytes()
+
+    @staticmethod
+    def decode(data, size, from_ordinal=datetime.date.fromordinal):
+        ordinals = array.array('q')
+        ordinals.frombytes(data)
+        return [from_ordinal(ordinal) if ordinal else None
+                for ordinal in ordinals]
+
+
+class SpillDecimal(SpillCodec):
+    # Decimals are stored as newline-separated text; an empty line
+    # denotes `NULL`.
+
+    adapt(DecimalDomain)
+
+    @staticmethod
+    def encode(values, Decimal=decimal.Decimal):
+        lines = []
+        for value in values:
+            if value is None:
+                lines.append("")
+            elif type(value) is Decimal:
+                lines.append(str(value))
+            else:
+                return None
+        return "\n".join(lines).encode('ascii')
+
+    @staticmethod
+    def decode(data, size, Decimal=decimal.Decimal):
+        lines = data.decode('ascii').split("\n")
+        return [Decimal(line) if line else None for line in lines]
+
+
+class SpillBuffer:
+    """
+    Stores query output in a temporary file, column by column.
+
+    `domains`
+        The domains of the output columns.
+
+    Call :meth:`write()` with converted columns of each batch, then
+    iterate over the buffer to get the rows back.
+    """
+
+    def __init__(self, domains):
+        self.codecs = [spill_codec(domain) for domain in domains]
+        self.stream = tempfile.TemporaryFile()
+        # For each chunk: the number of rows and, for each column,
+        # the length of the serialized data and whether the data
+        # was pickled because the codec declined it.
+        self.chunks = []
+
+    def write(self, columns, size):
+        assert len(columns) == len(self.codecs)
+        lengths = []
+        for column, (encode, decode) in zip(columns, self.codecs):
+            data = encode(column)
+            is_dumped = (data is None)
+            if is_dumped:
+                data = dump_column(column)
+            self.stream.write(data)
+            lengths.append((len(data), is_dumped))
+        self.chunks.append((size, lengths))
+
+    def __iter__(self):
+        stream = self.stream
+        stream.flush()
+        buffer = b""
+        if stream.tell():
+            buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            offset = 0
+            for size, lengths in self.chunks:
+                columns = []
+                for (length, is_dumped), (encode, decode) in \
+                        zip(lengths, self.codecs):
+                    data = buffer[offset:offset+length]
+                    offset += length
+                    if is_dumped:
+                        columns.append(load_column(data, size))
+                    else:
+                        columns.append(decode(data, size))
+                if columns:
+                    for row in zip(*columns):
+                        yield row
+                else:
+                    for k in range(size):
+                        yield ()
+        finally:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+            stream.close()
+
+
+spill_codec = SpillCodec.__invoke__
+
+
@@ -4,6 +4,7 @@
 
 
 from ..context import context
+from ..adapter import Utility
 from ..syn.syntax import Syntax
 from ..syn.parse import parse
 from .bind import bind
@@ -98,8 +99,123 @@ def get_cached_plan(key, cache_plan=cache_plan):
             return None
 
 
+class QueryCache(LRUCache):
+
+    __slots__ = ('hits', 'misses')
+
+    def __init__(self, size):
+        super(QueryCache, self).__init__(size)
+        self.hits = 0
+        self.misses = 0
+
+
+class QueryScope(Utility):
+    """
+    Describes the context in which a raw query is bound.
+
+    Returns a hashable value that, together with the query text and
+    the environment, determines the translated plan.  Extensions that
+    make binding depend on the request state must override this utility;
+    return ``None`` to disable the raw query cache.
+    """
+
+    def __call__(self):
+        return ()
+
+
+query_scope = QueryScope.__invoke__
+
+
+def freeze(data):
+    if isinstance(data, list):
+        return tuple(freeze(item) for item in data)
+    return data
+
+
+def get_query_key(syntax, environment, limit, offset, batch):
+    scope = query_scope()
+    if scope is None:
+        return None
+    if isinstance(syntax, str):
+        syntax = syntax.strip()
+    parameters = []
+    if environment is not None:
+        for name in sorted(environment):
+            value = environment[name]
+            # Environment values are embedded into the plan as literals,
+            # so the key must depend on the data, not only on the type.
+            parameters.append((name, value.domain, freeze(value.data)))
+    key = (syntax, tuple(parameters), scope, limit, offset, batch)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def get_query_cache():
+    cache = context.app.htsql.cache
+    try:
+        return cache.values[cache_query]
+    except KeyError:
+        size = context.app.htsql.query_cache_size
+        if not size:
+            return None
+        with cache.lock(cache_query):
+            if cache_query not in cache.values:
+                cache.values[cache_query] = QueryCache(size=size)
+            return cache.values[cache_query]
+
+
+def cache_query(key, pipe):
+    cache = context.app.htsql.cache
+    mapping = get_query_cache()
+    if mapping is None:
+        return
+    with cache.lock(cache_query):
+        mapping[key] = pipe
+
+
+def get_cached_query(key):
+    cache = context.app.htsql.cache
+    mapping = get_query_cache()
+    if mapping is None:
+        return None
+    with cache.lock(cache_query):
+        try:
+            pipe = mapping[key]
+        except KeyError:
+            mapping.misses += 1
+            return None
+        mapping.hits += 1
+        return pipe
+
+
+def get_query_cache_stats():
+    """
+    Returns statistics of the raw query cache: the number of cached
+    queries, the cache capacity and the number of hits and misses.
+    """
+    cache = context.app.htsql.cache
+    mapping = get_query_cache()
+    if mapping is None:
+        return {'size': 0, 'capacity': 0, 'hits': 0, 'misses': 0}
+    with cache.lock(cache_query):
+        return {'size': len(mapping),
+                'capacity': mapping.size,
+                'hits': mapping.hits,
+                'misses': mapping.misses}
+
+
 def translate(syntax, environment=None, limit=None, offset=None, batch=None):
     assert isinstance(syntax, (Syntax, Binding, str))
+    query_key = None
+    if not isinstance(syntax, Binding):
+        query_key = get_query_key(syntax, environment, limit, offset, batch)
+        if query_key is not None:
+            pipe = get_cached_query(query_key)
+            if pipe is not None:
+                return pipe
     if isinstance(syntax, str):
         syntax = parse(syntax)
     if not isinstance(syntax, Binding):
@@ -113,6 +229,8 @@ def translate(syntax, environment=None, limit=None, offset=None, batch=None):
     if pipe_sql is not None:
         pipe, sql = pipe_sql
         pipe = ProducePipe(profile, pipe, sql=sql)
+        if query_key is not None:
+            cache_query(query_key, pipe)
         return pipe
     expression = encode(flow)
     if limit is not None or offset is not None:
@@ -128,6 +246,8 @@ def translate(syntax, environment=None, limit=None, offset=None, batch=None):
     #print pipe
     cache_plan(key, (pipe, sql))
     pipe = ProducePipe(profile, pipe, sql=sql)
+    if query_key is not None:
+        cache_query(query_key, pipe)
     return pipe
 
 
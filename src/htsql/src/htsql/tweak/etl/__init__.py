@@ -15,7 +15,8 @@ class TweakETLAddon(Addon):
     help = """
     The extension provides the following commands:
 
-    `insert(feed)` adds records to a table.
+    `insert(feed)` adds records to a table; up to `insert_limit`
+    records are inserted with one statement.
 
     `copy(feed)` adds records to a table chunking the input.
 
@@ -35,6 +36,11 @@ class TweakETLAddon(Addon):
     parameters = [
             Parameter('copy_limit', PIntVal(is_nullable=True), default=10000,
                       hint="""chunk size for copy (default: 10000)"""),
+            Parameter('insert_limit', PIntVal(is_nullable=True), default=1000,
+                      hint="""batch size for insert (default: 1000)"""),
+            Parameter('link_cache_size', PIntVal(is_nullable=True),
+                      default=10000,
+                      hint="""number of cached links (default: 10000)"""),
     ]
 
     @classmethod
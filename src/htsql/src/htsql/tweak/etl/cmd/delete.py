@@ -3,7 +3,7 @@
 #
 
 
-from ....core.util import listof
+from ....core.util import listof, maybe
 from ....core.adapter import Utility, adapt
 from ....core.error import Error, PermissionError
 from ....core.context import context
@@ -14,7 +14,7 @@ from ....core.cmd.act import Act, ProduceAction, act
 from ....core.tr.binding import VoidBinding
 from ....core.tr.decorate import decorate
 from .command import DeleteCmd
-from .insert import BuildExtractNode
+from .insert import BuildExtractNode, execute_batch
 from .merge import BuildResolveKey
 from ..tr.dump import serialize_delete
 import itertools
@@ -67,6 +67,76 @@ class BuildExecuteDelete(Utility):
         return ExecuteDeletePipe(table, key_columns, sql)
 
 
+class ExecuteDeleteBatchPipe:
+
+    # Deletes several records with a single statement; see
+    # `execute_batch()` for `savepoint`.
+
+    def __init__(self, table, key_columns, size, savepoint=None):
+        assert isinstance(table, TableEntity)
+        assert isinstance(key_columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size > 1
+        assert isinstance(savepoint, maybe(str))
+        self.table = table
+        self.key_columns = key_columns
+        self.size = size
+        self.savepoint = savepoint
+        self.key_converts = [scramble(column.domain)
+                             for column in key_columns]
+        self.sql_by_size = {}
+
+    def __call__(self, key_rows):
+        assert 0 < len(key_rows) <= self.size
+        parameters = []
+        for key_row in key_rows:
+            parameters.extend(convert(item)
+                              for item, convert in zip(key_row,
+                                                       self.key_converts))
+        parameters = tuple(parameters)
+        if not context.env.can_write:
+            raise PermissionError("No write permissions")
+        sql = self.sql_by_size.get(len(key_rows))
+        if sql is None:
+            sql = serialize_delete(self.table, self.key_columns,
+                                   len(key_rows))
+            self.sql_by_size[len(key_rows)] = sql
+        with transaction() as connection:
+            cursor = connection.cursor()
+            execute_batch(cursor, sql, parameters, self.savepoint,
+                          with_output=False)
+
+
+class BuildExecuteDeleteBatch(Utility):
+
+    # Override for backends where a failed statement aborts the whole
+    # transaction.
+    savepoint = None
+
+    def __init__(self, table, size):
+        assert isinstance(table, TableEntity)
+        assert isinstance(size, int) and size > 1
+        self.table = table
+        self.size = size
+
+    def __call__(self):
+        table = self.table
+        key_columns = []
+        if table.primary_key is not None:
+            key_columns = table.primary_key.origin_columns
+        else:
+            for key in table.unique_keys:
+                if key.is_partial:
+                    continue
+                if all(not column.is_nullable
+                       for column in key.origin_columns):
+                    key_columns = key.origin_columns
+                    break
+        if not key_columns:
+            raise Error("Table does not have a primary key")
+        return ExecuteDeleteBatchPipe(table, key_columns, self.size,
+                                      self.savepoint)
+
+
 class ProduceDelete(Act):
 
     adapt(DeleteCmd, ProduceAction)
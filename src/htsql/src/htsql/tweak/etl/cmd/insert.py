@@ -3,7 +3,7 @@
 #
 
 
-from ....core.util import listof
+from ....core.util import listof, maybe
 from ....core.adapter import Utility, Adapter, adapt, adapt_many
 from ....core.error import Error, PermissionError
 from ....core.context import context
@@ -23,13 +23,15 @@ from ....core.syn.syntax import VoidSyntax, IdentifierSyntax
 from ....core.tr.binding import (VoidBinding, RootBinding, FormulaBinding,
         LocateBinding, SelectionBinding, SieveBinding, AliasBinding,
         CollectBinding, FreeTableRecipe, ColumnRecipe)
-from ....core.tr.signature import IsEqualSig, AndSig, PlaceholderSig
+from ....core.tr.signature import (IsEqualSig, IsAmongSig, AndSig, OrSig,
+        PlaceholderSig)
 from ....core.tr.decorate import decorate
 from ....core.tr.coerce import coerce
 from ....core.tr.lookup import identify
 from .command import InsertCmd
-from ..tr.dump import serialize_insert
+from ..tr.dump import serialize_insert, serialize_savepoint
 import itertools
+import collections
 import datetime
 import decimal
 import operator
@@ -335,15 +337,26 @@ class ExtractTablePipe:
                for item, resolve in zip(row, self.resolves)]
         return tuple([extract(row) for extract in self.extracts])
 
+    def prefetch(self, rows):
+        # Resolves links of the given rows in batches.
+        for idx, resolve in enumerate(self.resolves):
+            if isinstance(resolve, LinkCachePipe):
+                resolve.prefetch([row[idx] for row in rows])
+
 
 class BuildExtractTable(Utility):
 
-    def __init__(self, node, arcs, with_cache=False):
+    # If `resolve_by_arc` is given, link resolvers are shared
+    # with other pipes that use the same dictionary.
+
+    def __init__(self, node, arcs, with_cache=False, resolve_by_arc=None):
         assert isinstance(node, TableNode)
         assert isinstance(arcs, listof(Arc))
+        assert isinstance(resolve_by_arc, maybe(dict))
         self.node = node
         self.arcs = arcs
         self.with_cache = with_cache
+        self.resolve_by_arc = resolve_by_arc
 
     def __call__(self):
         table = self.node.table
@@ -360,10 +373,15 @@ class BuildExtractTable(Utility):
                 resolves.append(resolve)
                 extract_by_column[column] = extract
             elif isinstance(arc, ChainArc):
-                if self.with_cache:
+                if (self.resolve_by_arc is not None and
+                        arc in self.resolve_by_arc):
+                    resolve = self.resolve_by_arc[arc]
+                elif self.with_cache:
                     resolve = BuildCacheChain.__invoke__(arc)
                 else:
-                    resolve = BuildResolveChain.__invoke__(arc)
+                    resolve = BuildLinkCache.__invoke__(arc)
+                if self.resolve_by_arc is not None:
+                    self.resolve_by_arc[arc] = resolve
                 resolves.append(resolve)
                 for column_idx, column in enumerate(resolve.columns):
                     if column in extract_by_column:
@@ -438,6 +456,95 @@ class BuildExecuteInsert(Utility):
         return ExecuteInsertPipe(table, self.columns, returning_columns, sql)
 
 
+def execute_batch(cursor, sql, parameters, savepoint=None,
+                  with_output=True):
+    # Executes a statement that affects a batch of records; returns
+    # the output rows.  If `savepoint` is set, the statement is wrapped
+    # in a savepoint so that the transaction is still usable when
+    # the statement fails.
+    if savepoint is not None:
+        cursor.execute(serialize_savepoint(savepoint, 'create'))
+    try:
+        cursor.execute(sql, parameters)
+        output = cursor.fetchall() if with_output else None
+    except Error:
+        if savepoint is not None:
+            cursor.execute(serialize_savepoint(savepoint, 'rollback'))
+            cursor.execute(serialize_savepoint(savepoint, 'release'))
+        raise
+    if savepoint is not None:
+        cursor.execute(serialize_savepoint(savepoint, 'release'))
+    return output
+
+
+class ExecuteInsertBatchPipe:
+
+    # Inserts several records with a single multi-row statement; see
+    # `execute_batch()` for `savepoint`.
+
+    def __init__(self, table, input_columns, output_columns, size,
+                 savepoint=None):
+        assert isinstance(table, TableEntity)
+        assert isinstance(input_columns, listof(ColumnEntity))
+        assert isinstance(output_columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size > 1
+        assert isinstance(savepoint, maybe(str))
+        self.table = table
+        self.input_columns = input_columns
+        self.output_columns = output_columns
+        self.size = size
+        self.savepoint = savepoint
+        self.input_converts = [scramble(column.domain)
+                               for column in input_columns]
+        self.output_converts = [unscramble(column.domain)
+                                for column in output_columns]
+        self.sql_by_size = {}
+
+    def __call__(self, rows):
+        assert 0 < len(rows) <= self.size
+        parameters = []
+        for row in rows:
+            parameters.extend(convert(item)
+                              for item, convert in zip(row,
+                                                       self.input_converts))
+        parameters = tuple(parameters)
+        if not context.env.can_write:
+            raise PermissionError("No write permissions")
+        sql = self.sql_by_size.get(len(rows))
+        if sql is None:
+            sql = serialize_insert(self.table, self.input_columns,
+                                   self.output_columns, len(rows))
+            self.sql_by_size[len(rows)] = sql
+        with transaction() as connection:
+            cursor = connection.cursor()
+            output = execute_batch(cursor, sql, parameters, self.savepoint)
+        if len(output) != len(rows):
+            raise Error("Failed to insert records")
+        return output
+
+
+class BuildExecuteInsertBatch(Utility):
+
+    # Override for backends where a failed statement aborts the whole
+    # transaction.
+    savepoint = None
+
+    def __init__(self, table, input_columns, output_columns, size):
+        assert isinstance(table, TableEntity)
+        assert isinstance(input_columns, listof(ColumnEntity))
+        assert isinstance(output_columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size > 1
+        self.table = table
+        self.input_columns = input_columns
+        self.output_columns = output_columns
+        self.size = size
+
+    def __call__(self):
+        return ExecuteInsertBatchPipe(self.table, self.input_columns,
+                                      self.output_columns, self.size,
+                                      self.savepoint)
+
+
 class ResolveIdentityPipe:
 
     def __init__(self, profile, pipe):
@@ -512,6 +619,120 @@ class BuildResolveIdentity(Utility):
         return ResolveIdentityPipe(profile, pipe)
 
 
+class ResolveIdentityBatchPipe:
+
+    def __init__(self, columns, size, pipe):
+        assert isinstance(columns, listof(ColumnEntity))
+        self.columns = columns
+        self.size = size
+        self.pipe = pipe
+        self.converts = [unscramble(column.domain) for column in columns]
+
+    def __call__(self, rows):
+        assert 0 < len(rows) <= self.size
+        parameters = []
+        for row in rows:
+            parameters.extend(row)
+        # Fill unused placeholders by repeating the last key.
+        parameters.extend(rows[-1]*(self.size-len(rows)))
+        product = self.pipe()(parameters)
+        identity_by_key = {}
+        for row in product.data:
+            identity_by_key[tuple(row[:-1])] = row[-1]
+        data = []
+        for row in rows:
+            key = tuple([convert(item)
+                         for item, convert in zip(row, self.converts)])
+            if key not in identity_by_key:
+                raise Error("Unable to locate the inserted record")
+            data.append(identity_by_key[key])
+        return data
+
+
+class BuildResolveIdentityBatch(Utility):
+
+    # Produces a query that fetches the key columns and the identity of
+    # the records matching any of `size` keys.
+
+    def __init__(self, table, columns, size):
+        assert isinstance(table, TableEntity)
+        assert isinstance(columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size > 1
+        self.table = table
+        self.columns = columns
+        self.size = size
+
+    def __call__(self):
+        syntax = VoidSyntax()
+        scope = RootBinding(syntax)
+        state = BindingState(scope)
+        scope = state.use(FreeTableRecipe(self.table), syntax)
+        state.push_scope(scope)
+        column_bindings = [state.use(ColumnRecipe(column), syntax)
+                           for column in self.columns]
+        count = itertools.count()
+        if len(column_bindings) == 1:
+            [column_binding] = column_bindings
+            placeholders = [FormulaBinding(scope,
+                                           PlaceholderSig(next(count)),
+                                           column_binding.domain,
+                                           syntax)
+                            for k in range(self.size)]
+            condition = FormulaBinding(scope,
+                                       IsAmongSig(+1),
+                                       coerce(BooleanDomain()),
+                                       syntax,
+                                       lop=column_binding,
+                                       rops=placeholders)
+        else:
+            alternatives = []
+            for k in range(self.size):
+                conditions = []
+                for column_binding in column_bindings:
+                    placeholder_binding = FormulaBinding(
+                            scope,
+                            PlaceholderSig(next(count)),
+                            column_binding.domain,
+                            syntax)
+                    condition = FormulaBinding(scope,
+                                               IsEqualSig(+1),
+                                               coerce(BooleanDomain()),
+                                               syntax,
+                                               lop=column_binding,
+                                               rop=placeholder_binding)
+                    conditions.append(condition)
+                alternative = FormulaBinding(scope,
+                                             AndSig(),
+                                             coerce(BooleanDomain()),
+                                             syntax,
+                                             ops=conditions)
+                alternatives.append(alternative)
+            condition = FormulaBinding(scope,
+                                       OrSig(),
+                                       coerce(BooleanDomain()),
+                                       syntax,
+                                       ops=alternatives)
+        scope = SieveBinding(scope, condition, syntax)
+        state.push_scope(scope)
+        recipe = identify(scope)
+        if recipe is None:
+            raise Error("Cannot determine table identity")
+        identity = state.use(recipe, syntax)
+        elements = [state.use(ColumnRecipe(column), syntax)
+                    for column in self.columns]
+        elements.append(identity)
+        fields = [decorate(element) for element in elements]
+        domain = RecordDomain(fields)
+        scope = SelectionBinding(scope, elements, domain, syntax)
+        binding = Select.__invoke__(scope, state)
+        state.pop_scope()
+        state.pop_scope()
+        domain = ListDomain(binding.domain)
+        binding = CollectBinding(state.root, binding, domain, syntax)
+        pipe = translate(binding)
+        return ResolveIdentityBatchPipe(self.columns, self.size, pipe)
+
+
 class ResolveChainPipe:
 
     def __init__(self, name, columns, domain, pipe):
@@ -661,10 +882,241 @@ class BuildCacheChain(Utility):
         return CacheChainPipe(target_name, columns, domain, pipe)
 
 
+class LinkCachePipe:
+
+    # Resolves link values with a query that looks up `size` values
+    # at once; keeps up to `limit` recently resolved values.
+
+    def __init__(self, name, columns, domain, build, size, limit):
+        assert isinstance(columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size >= 1
+        assert isinstance(limit, maybe(int))
+        self.name = name
+        self.columns = columns
+        self.domain = domain
+        self.leaves = domain.leaves
+        self.build = build
+        self.size = size
+        self.limit = limit
+        self.pipe_by_size = {}
+        self.cache = collections.OrderedDict()
+
+    def __call__(self, value):
+        if value is None:
+            return (None,)*len(self.columns)
+        try:
+            row = self.cache[value]
+        except KeyError:
+            row = self.fetch([value]).get(value)
+            if row is None:
+                quote = None
+                if self.name:
+                    quote = "%s[%s]" % (self.name, self.domain.dump(value))
+                else:
+                    quote = "[%s]" % self.domain.dump(value)
+                raise Error("Unable to resolve a link", quote)
+        else:
+            self.cache.move_to_end(value)
+        return row
+
+    def prefetch(self, values):
+        """
+        Resolves the given values with as few queries as possible.
+        """
+        missing = []
+        seen = set()
+        for value in values:
+            if value is None or value in seen:
+                continue
+            seen.add(value)
+            if value in self.cache:
+                self.cache.move_to_end(value)
+            else:
+                missing.append(value)
+        if missing:
+            self.fetch(missing)
+
+    def clear(self):
+        """
+        Forgets all resolved values.
+        """
+        self.cache.clear()
+
+    def fetch(self, values):
+        # Looks up the values; returns the resolved ones.
+        rows_by_value = {}
+        for start in range(0, len(values), self.size):
+            chunk = values[start:start+self.size]
+            size = 1 if len(chunk) == 1 else self.size
+            if size not in self.pipe_by_size:
+                self.pipe_by_size[size] = self.build(size)
+            pipe = self.pipe_by_size[size]
+            raw_values = []
+            for value in chunk:
+                raw_values.extend(self.flatten(value))
+            # Fill unused placeholders by repeating the last value.
+            raw_values.extend(self.flatten(chunk[-1])*(size-len(chunk)))
+            product = pipe()(raw_values)
+            for row in product.data:
+                rows_by_value[row[0]] = tuple(row[1:])
+        for value, row in rows_by_value.items():
+            self.cache[value] = row
+            self.cache.move_to_end(value)
+        if self.limit is not None:
+            # Keep the values of this batch even if there are more of them
+            # than the cache could hold, or they are fetched again one by one.
+            limit = max(self.limit, len(rows_by_value))
+            while len(self.cache) > limit:
+                self.cache.popitem(last=False)
+        return rows_by_value
+
+    def flatten(self, value):
+        raw_values = []
+        for leaf in self.leaves:
+            raw_value = value
+            for idx in leaf:
+                raw_value = raw_value[idx]
+            raw_values.append(raw_value)
+        return raw_values
+
+
+class BuildLinkCache(Utility):
+
+    # The maximum number of values resolved by one query; fewer for
+    # composite identities since each value adds a branch to the `OR`
+    # condition.
+    size = 1000
+    composite_size = 100
+
+    def __init__(self, arc):
+        self.arc = arc
+        self.joins = arc.joins
+
+    def __call__(self):
+        if len(self.joins) > 1:
+            return BuildResolveChain.__invoke__(self.arc)
+        target_labels = relabel(TableArc(self.arc.target.table))
+        target_name = target_labels[0].name if target_labels else None
+        table = self.joins[-1].target
+        syntax = VoidSyntax()
+        scope = RootBinding(syntax)
+        state = BindingState(scope)
+        seed = state.use(FreeTableRecipe(table), syntax)
+        recipe = identify(seed)
+        if recipe is None:
+            raise Error("Cannot determine identity of a link", target_name)
+        identity = state.use(recipe, syntax, scope=seed)
+        limit = context.app.tweak.etl.link_cache_size
+        size = self.size
+        if len(identity.domain.leaves) > 1:
+            size = self.composite_size
+        if limit is not None:
+            size = max(1, min(size, limit))
+        columns = self.joins[0].origin_columns[:]
+        target_columns = self.joins[0].target_columns
+        build = (lambda size: self.build(table, target_columns, size))
+        return LinkCachePipe(target_name, columns, identity.domain,
+                             build, size, limit)
+
+    @staticmethod
+    def build(table, columns, size):
+        # Makes a query that fetches the identity and the given columns
+        # of the records matching any of `size` identity values.
+        syntax = VoidSyntax()
+        scope = RootBinding(syntax)
+        state = BindingState(scope)
+        seed = state.use(FreeTableRecipe(table), syntax)
+        state.push_scope(seed)
+        recipe = identify(seed)
+        identity = state.use(recipe, syntax, scope=seed)
+        def make_leaves(identity):
+            leaves = []
+            for field in identity.elements:
+                if isinstance(field.domain, IdentityDomain):
+                    leaves.extend(make_leaves(field))
+                else:
+                    leaves.append(field)
+            return leaves
+        leaves = make_leaves(identity)
+        count = itertools.count()
+        if len(leaves) == 1:
+            [leaf] = leaves
+            placeholders = [FormulaBinding(seed,
+                                           PlaceholderSig(next(count)),
+                                           leaf.domain,
+                                           syntax)
+                            for k in range(size)]
+            if size == 1:
+                condition = FormulaBinding(seed,
+                                           IsEqualSig(+1),
+                                           coerce(BooleanDomain()),
+                                           syntax,
+                                           lop=leaf,
+                                           rop=placeholders[0])
+            else:
+                condition = FormulaBinding(seed,
+                                           IsAmongSig(+1),
+                                           coerce(BooleanDomain()),
+                                           syntax,
+                                           lop=leaf,
+                                           rops=placeholders)
+        else:
+            alternatives = []
+            for k in range(size):
+                conditions = []
+                for leaf in leaves:
+                    placeholder = FormulaBinding(seed,
+                                                 PlaceholderSig(next(count)),
+                                                 leaf.domain,
+                                                 syntax)
+                    condition = FormulaBinding(seed,
+                                               IsEqualSig(+1),
+                                               coerce(BooleanDomain()),
+                                               syntax,
+                                               lop=leaf,
+                                               rop=placeholder)
+                    conditions.append(condition)
+                alternative = FormulaBinding(seed,
+                                             AndSig(),
+                                             coerce(BooleanDomain()),
+                                             syntax,
+                                             ops=conditions)
+                alternatives.append(alternative)
+            if len(alternatives) == 1:
+                [condition] = alternatives
+            else:
+                condition = FormulaBinding(seed,
+                                           OrSig(),
+                                           coerce(BooleanDomain()),
+                                           syntax,
+                                           ops=alternatives)
+        scope = SieveBinding(seed, condition, syntax)
+        state.push_scope(scope)
+        elements = [state.use(recipe, syntax)]
+        for column in columns:
+            binding = state.use(ColumnRecipe(column), syntax)
+            elements.append(binding)
+        fields = [decorate(element) for element in elements]
+        domain = RecordDomain(fields)
+        scope = SelectionBinding(scope, elements, domain, syntax)
+        binding = Select.__invoke__(scope, state)
+        state.pop_scope()
+        state.pop_scope()
+        domain = ListDomain(binding.domain)
+        binding = CollectBinding(state.root, binding, domain, syntax)
+        return translate(binding)
+
+
 class ProduceInsert(Act):
 
     adapt(InsertCmd, ProduceAction)
 
+    # The maximum number of parameters in a multi-row `INSERT`.
+    max_parameters = 32767
+    # The maximum batch size for tables with a composite key: identities
+    # of the inserted records are found with an `OR` of `AND` conditions.
+    max_composite = 100
+
     def __call__(self):
         with transaction() as connection:
             product = act(self.command.feed, self.action)
@@ -676,31 +1128,49 @@ class ProduceInsert(Act):
             resolve_identity = BuildResolveIdentity.__invoke__(
                     execute_insert.table, execute_insert.output_columns,
                     extract_node.is_list)
+            self.extract_node = extract_node
+            self.execute_insert = execute_insert
+            self.resolve_identity = resolve_identity
             meta = resolve_identity.profile
             data = []
             if extract_node.is_list:
                 records = product.data
-                record_domain = product.meta.domain.item_domain
+                self.record_domain = product.meta.domain.item_domain
             else:
                 records = [product.data]
-                record_domain = product.meta.domain
+                self.record_domain = product.meta.domain
+            size = self.get_batch_size(records)
+            if size > 1:
+                self.execute_insert_batch = BuildExecuteInsertBatch.__invoke__(
+                        execute_insert.table, execute_insert.input_columns,
+                        execute_insert.output_columns, size)
+                self.resolve_identity_batch = \
+                        BuildResolveIdentityBatch.__invoke__(
+                                execute_insert.table,
+                                execute_insert.output_columns, size)
+            self.extract_table = extract_table
+            batch = []
             for idx, record in enumerate(records):
                 if record is None:
                     continue
                 try:
-                    row = resolve_identity(
-                            execute_insert(
-                                extract_table(
-                                    extract_node(record))))
+                    row = extract_node(record)
+                    if size == 1:
+                        row = resolve_identity(
+                                execute_insert(
+                                    extract_table(row)))
                 except Error as exc:
-                    if extract_node.is_list:
-                        message = "While inserting record #%s" % (idx+1)
-                    else:
-                        message = "While inserting a record"
-                    quote = record_domain.dump(record)
-                    exc.wrap(message, quote)
+                    self.wrap(exc, idx, record)
                     raise
-                data.append(row)
+                if size == 1:
+                    data.append(row)
+                    continue
+                batch.append((idx, record, row))
+                if len(batch) == size:
+                    data.extend(self.insert_batch(batch))
+                    batch = []
+            if batch:
+                data.extend(self.insert_batch(batch))
             if not extract_node.is_list:
                 assert len(data) <= 1
                 if data:
@@ -709,4 +1179,59 @@ class ProduceInsert(Act):
                     data = None
             return Product(meta, data)
 
+    def get_batch_size(self, records):
+        # Returns the number of records to insert with one statement.
+        limit = context.app.tweak.etl.insert_limit
+        if limit is None or not self.extract_node.is_list:
+            return 1
+        columns = self.execute_insert.input_columns
+        if not columns:
+            return 1
+        # Records may refer to records inserted earlier in the same feed.
+        table = self.execute_insert.table
+        for arc in self.extract_node.arcs:
+            if isinstance(arc, ChainArc) and arc.target.table == table:
+                return 1
+        size = min(limit, self.max_parameters // len(columns),
+                   sum(1 for record in records if record is not None))
+        if len(self.execute_insert.output_columns) > 1:
+            size = min(size, self.max_composite)
+        return max(size, 1)
+
+    def insert_batch(self, batch):
+        self.extract_table.prefetch([row for idx, record, row in batch])
+        extracted_batch = []
+        for idx, record, row in batch:
+            try:
+                row = self.extract_table(row)
+            except Error as exc:
+                self.wrap(exc, idx, record)
+                raise
+            extracted_batch.append((idx, record, row))
+        batch = extracted_batch
+        rows = [row for idx, record, row in batch]
+        try:
+            keys = self.execute_insert_batch(rows)
+        except Error:
+            # Insert the records one by one to report the record
+            # that failed.
+            data = []
+            for idx, record, row in batch:
+                try:
+                    row = self.resolve_identity(self.execute_insert(row))
+                except Error as exc:
+                    self.wrap(exc, idx, record)
+                    raise
+                data.append(row)
+            return data
+        return self.resolve_identity_batch(keys)
+
+    def wrap(self, exc, idx, record):
+        if self.extract_node.is_list:
+            message = "While inserting record #%s" % (idx+1)
+        else:
+            message = "While inserting a record"
+        quote = self.record_domain.dump(record)
+        exc.wrap(message, quote)
+
 
@@ -3,7 +3,7 @@
 #
 
 
-from ....core.util import listof
+from ....core.util import listof, maybe
 from ....core.adapter import Utility, adapt
 from ....core.context import context
 from ....core.error import Error, PermissionError
@@ -22,10 +22,10 @@ from ....core.tr.binding import (VoidBinding, RootBinding, FormulaBinding,
 from ....core.tr.signature import IsEqualSig, AndSig, PlaceholderSig
 from ....core.tr.decorate import decorate
 from ....core.tr.coerce import coerce
-from ....core.tr.lookup import prescribe
+from ....core.tr.lookup import prescribe, identify
 from .command import MergeCmd
 from .insert import (BuildExtractNode, BuildExtractTable, BuildExecuteInsert,
-        BuildResolveIdentity, BuildResolveChain)
+        BuildResolveIdentity, BuildResolveChain, BuildLinkCache, execute_batch)
 from ..tr.dump import serialize_update
 import itertools
 
@@ -196,6 +196,99 @@ class BuildResolveKey(Utility):
                               self.with_error)
 
 
+class ResolveKeyBatchPipe:
+
+    # Finds the keys of several records looking up to `size` identities
+    # with one query.
+
+    def __init__(self, name, columns, domain, build, size):
+        assert isinstance(columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size >= 1
+        self.name = name
+        self.columns = columns
+        self.domain = domain
+        self.leaves = domain.leaves
+        self.build = build
+        self.size = size
+        self.pipe_by_size = {}
+
+    def __call__(self, values):
+        row_by_value = {}
+        for start in range(0, len(values), self.size):
+            chunk = values[start:start+self.size]
+            size = 1 if len(chunk) == 1 else self.size
+            if size not in self.pipe_by_size:
+                self.pipe_by_size[size] = self.build(size)
+            pipe = self.pipe_by_size[size]
+            raw_values = []
+            for value in chunk:
+                raw_values.extend(self.flatten(value))
+            # Fill unused placeholders by repeating the last value.
+            raw_values.extend(self.flatten(chunk[-1])*(size-len(chunk)))
+            product = pipe()(raw_values)
+            for row in product.data:
+                row_by_value[row[0]] = tuple(row[1:])
+        data = []
+        for value in values:
+            if value not in row_by_value:
+                quote = None
+                if self.name:
+                    quote = "%s[%s]" % (self.name, self.domain.dump(value))
+                else:
+                    quote = "[%s]" % self.domain.dump(value)
+                raise Error("Unable to find an entity", quote)
+            data.append(row_by_value[value])
+        return data
+
+    def flatten(self, value):
+        raw_values = []
+        for leaf in self.leaves:
+            raw_value = value
+            for idx in leaf:
+                raw_value = raw_value[idx]
+            raw_values.append(raw_value)
+        return raw_values
+
+
+class BuildResolveKeyBatch(Utility):
+
+    def __init__(self, node):
+        self.node = node
+        self.table = node.table
+
+    def __call__(self):
+        labels = relabel(TableArc(self.table))
+        name = labels[0].name if labels else None
+        syntax = VoidSyntax()
+        scope = RootBinding(syntax)
+        state = BindingState(scope)
+        seed = state.use(FreeTableRecipe(self.table), syntax)
+        recipe = identify(seed)
+        if recipe is None:
+            raise Error("Expected a table with identity")
+        identity = state.use(recipe, syntax, scope=seed)
+        columns = []
+        if self.table.primary_key is not None:
+            columns = self.table.primary_key.origin_columns
+        else:
+            for key in self.table.unique_keys:
+                if key.is_partial:
+                    continue
+                if all(not column.is_nullable
+                       for column in key.origin_columns):
+                    columns = key.origin_columns
+                    break
+        if not columns:
+            raise Error("Table does not have a primary key")
+        size = BuildLinkCache.size
+        if len(identity.domain.leaves) > 1:
+            size = BuildLinkCache.composite_size
+        table = self.table
+        build = (lambda size: BuildLinkCache.build(table, columns, size))
+        return ResolveKeyBatchPipe(name, columns, identity.domain,
+                                   build, size)
+
+
 class ExecuteUpdatePipe:
 
     def __init__(self, table, input_columns, key_columns,
@@ -265,22 +358,120 @@ class BuildExecuteUpdate(Utility):
                                  returning_columns, sql)
 
 
+class ExecuteUpdateBatchPipe:
+
+    # Updates several records with a single statement; see
+    # `execute_batch()` for `savepoint`.  Returns the output rows
+    # in the order of the input rows.
+
+    def __init__(self, table, input_columns, key_columns,
+                 output_columns, size, savepoint=None):
+        assert isinstance(table, TableEntity)
+        assert isinstance(input_columns, listof(ColumnEntity))
+        assert isinstance(key_columns, listof(ColumnEntity))
+        assert isinstance(output_columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size > 1
+        assert isinstance(savepoint, maybe(str))
+        self.table = table
+        self.input_columns = input_columns
+        self.key_columns = key_columns
+        self.output_columns = output_columns
+        self.size = size
+        self.savepoint = savepoint
+        self.input_converts = [scramble(column.domain)
+                               for column in input_columns]
+        self.key_converts = [scramble(column.domain)
+                             for column in key_columns]
+        self.sql_by_size = {}
+
+    def __call__(self, key_rows, rows):
+        assert 1 < len(rows) <= self.size and len(key_rows) == len(rows)
+        key_rows = [tuple(convert(item)
+                          for item, convert in zip(key_row,
+                                                   self.key_converts))
+                    for key_row in key_rows]
+        if not self.input_columns:
+            return key_rows
+        parameters = []
+        for key_row, row in zip(key_rows, rows):
+            parameters.extend(convert(item)
+                              for item, convert in zip(row,
+                                                       self.input_converts))
+            parameters.extend(key_row)
+        parameters = tuple(parameters)
+        if not context.env.can_write:
+            raise PermissionError("No write permissions")
+        sql = self.sql_by_size.get(len(rows))
+        if sql is None:
+            sql = serialize_update(self.table, self.input_columns,
+                                   self.key_columns, self.output_columns,
+                                   len(rows))
+            self.sql_by_size[len(rows)] = sql
+        with transaction() as connection:
+            cursor = connection.cursor()
+            output = execute_batch(cursor, sql, parameters, self.savepoint)
+        if len(output) != len(rows):
+            raise Error("Unable to locate the updated rows")
+        output = sorted(output, key=(lambda row: row[0]))
+        return [tuple(row[1:]) for row in output]
+
+
+class BuildExecuteUpdateBatch(Utility):
+
+    # Override for backends where a failed statement aborts the whole
+    # transaction.
+    savepoint = None
+
+    def __init__(self, table, columns, size):
+        assert isinstance(table, TableEntity)
+        assert isinstance(columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size > 1
+        self.table = table
+        self.columns = columns
+        self.size = size
+
+    def __call__(self):
+        table = self.table
+        returning_columns = []
+        if table.primary_key is not None:
+            returning_columns = table.primary_key.origin_columns
+        else:
+            for key in table.unique_keys:
+                if key.is_partial:
+                    continue
+                if all(not column.is_nullable
+                       for column in key.origin_columns):
+                    returning_columns = key.origin_columns
+                    break
+        if not returning_columns:
+            raise Error("Table does not have a primary key")
+        return ExecuteUpdateBatchPipe(table, self.columns, returning_columns,
+                                      returning_columns, self.size,
+                                      self.savepoint)
+
+
 class ProduceMerge(Act):
 
     adapt(MergeCmd, ProduceAction)
 
+    # Resolve links of this many records at once.
+    batch = 1000
+
     def __call__(self):
         with transaction() as connection:
             product = act(self.command.feed, self.action)
             extract_node = BuildExtractNode.__invoke__(product.meta)
+            resolve_by_arc = {}
             extract_table = BuildExtractTable.__invoke__(
-                    extract_node.node, extract_node.arcs)
+                    extract_node.node, extract_node.arcs,
+                    resolve_by_arc=resolve_by_arc)
             extract_identity = BuildExtractIdentity.__invoke__(
                     extract_node.node, extract_node.arcs)
             resolve_key = BuildResolveKey.__invoke__(
                     extract_node.node, extract_node.arcs, False)
             extract_table_for_update = BuildExtractTable.__invoke__(
-                    extract_identity.node, extract_identity.arcs)
+                    extract_identity.node, extract_identity.arcs,
+                    resolve_by_arc=resolve_by_arc)
             execute_insert = BuildExecuteInsert.__invoke__(
                     extract_table.table, extract_table.columns)
             execute_update = BuildExecuteUpdate.__invoke__(
@@ -289,37 +480,37 @@ class ProduceMerge(Act):
             resolve_identity = BuildResolveIdentity.__invoke__(
                     execute_insert.table, execute_insert.output_columns,
                     extract_node.is_list)
+            self.extract_node = extract_node
+            self.extract_table = extract_table
+            self.extract_identity = extract_identity
+            self.resolve_key = resolve_key
+            self.extract_table_for_update = extract_table_for_update
+            self.execute_insert = execute_insert
+            self.execute_update = execute_update
+            self.resolve_identity = resolve_identity
             meta = resolve_identity.profile
             data = []
             if extract_node.is_list:
                 records = product.data
-                record_domain = product.meta.domain.item_domain
+                self.record_domain = product.meta.domain.item_domain
             else:
                 records = [product.data]
-                record_domain = product.meta.domain
+                self.record_domain = product.meta.domain
+            batch = []
             for idx, record in enumerate(records):
                 if record is None:
                     continue
                 try:
                     row = extract_node(record)
-                    update_id, update_row = extract_identity(row)
-                    key = resolve_key(update_id)
-                    if key is not None:
-                        row = extract_table_for_update(update_row)
-                        key = execute_update(key, row)
-                    else:
-                        row = extract_table(row)
-                        key = execute_insert(row)
-                    row = resolve_identity(key)
                 except Error as exc:
-                    if extract_node.is_list:
-                        message = "While merging record #%s" % (idx+1)
-                    else:
-                        message = "While merging a record"
-                    quote = record_domain.dump(record)
-                    exc.wrap(message, quote)
+                    self.wrap(exc, idx, record)
                     raise
-                data.append(row)
+                batch.append((idx, record, row))
+                if len(batch) == self.batch:
+                    data.extend(self.merge_batch(batch))
+                    batch = []
+            if batch:
+                data.extend(self.merge_batch(batch))
             if not extract_node.is_list:
                 assert len(data) <= 1
                 if data:
@@ -328,4 +519,32 @@ class ProduceMerge(Act):
                     data = None
             return Product(meta, data)
 
+    def merge_batch(self, batch):
+        self.extract_table.prefetch([row for idx, record, row in batch])
+        data = []
+        for idx, record, row in batch:
+            try:
+                update_id, update_row = self.extract_identity(row)
+                key = self.resolve_key(update_id)
+                if key is not None:
+                    row = self.extract_table_for_update(update_row)
+                    key = self.execute_update(key, row)
+                else:
+                    row = self.extract_table(row)
+                    key = self.execute_insert(row)
+                row = self.resolve_identity(key)
+            except Error as exc:
+                self.wrap(exc, idx, record)
+                raise
+            data.append(row)
+        return data
+
+    def wrap(self, exc, idx, record):
+        if self.extract_node.is_list:
+            message = "While merging record #%s" % (idx+1)
+        else:
+            message = "While merging a record"
+        quote = self.record_domain.dump(record)
+        exc.wrap(message, quote)
+
 
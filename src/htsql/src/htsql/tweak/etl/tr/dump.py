@@ -11,13 +11,16 @@ from ....core.tr.dump import SerializingState, DumpBase
 
 class SerializeInsert(Utility, DumpBase):
 
-    def __init__(self, table, columns, returning_columns):
+    def __init__(self, table, columns, returning_columns, size=1):
         assert isinstance(table, TableEntity)
         assert isinstance(columns, listof(ColumnEntity))
         assert isinstance(returning_columns, maybe(listof(ColumnEntity)))
+        assert isinstance(size, int) and size >= 1
+        assert size == 1 or columns
         self.table = table
         self.columns = columns
         self.returning_columns = returning_columns
+        self.size = size
         self.state = SerializingState()
         self.stream = self.state.stream
 
@@ -55,12 +58,18 @@ class SerializeInsert(Utility, DumpBase):
 
     def dump_values(self):
         self.newline()
-        self.write("VALUES (")
-        for idx, column in enumerate(self.columns):
-            self.format("{index:placeholder}", index=None)
-            if idx < len(self.columns)-1:
-                self.write(", ")
-        self.write(")")
+        self.write("VALUES ")
+        for row_idx in range(self.size):
+            if row_idx > 0:
+                self.write(",")
+                self.newline()
+                self.write("       ")
+            self.write("(")
+            for idx, column in enumerate(self.columns):
+                self.format("{index:placeholder}", index=None)
+                if idx < len(self.columns)-1:
+                    self.write(", ")
+            self.write(")")
 
     def dump_no_values(self):
         self.newline()
@@ -77,20 +86,38 @@ class SerializeInsert(Utility, DumpBase):
 
 class SerializeUpdate(Utility, DumpBase):
 
-    def __init__(self, table, columns, key_columns, returning_columns):
+    # For a batch of `size` records, the new values and the keys come
+    # from a `VALUES` list joined to the table.  The list starts with
+    # a row of `NULL` values of the column types, so that the parameters
+    # get the types of the table columns; this row matches no records.
+    # Each row of the list ends with its position, which is returned
+    # with the updated keys.
+
+    def __init__(self, table, columns, key_columns, returning_columns,
+                 size=1):
         assert isinstance(table, TableEntity)
         assert isinstance(columns, listof(ColumnEntity))
         assert isinstance(key_columns, listof(ColumnEntity))
         assert isinstance(returning_columns, maybe(listof(ColumnEntity)))
+        assert isinstance(size, int) and size >= 1
+        assert size == 1 or (columns and key_columns)
         self.table = table
         self.columns = columns
         self.key_columns = key_columns
         self.returning_columns = returning_columns
+        self.size = size
         self.state = SerializingState()
         self.stream = self.state.stream
 
     def __call__(self):
         self.dump_update()
+        if self.size > 1:
+            self.dump_batch_columns()
+            self.dump_batch_values()
+            self.dump_batch_keys()
+            if self.returning_columns:
+                self.dump_batch_returning()
+            return self.stream.flush()
         if self.columns:
             self.dump_columns()
         if self.key_columns:
@@ -107,6 +134,8 @@ class SerializeUpdate(Utility, DumpBase):
         else:
             self.format("UPDATE {table:name}",
                         table=self.table.name)
+        if self.size > 1:
+            self.format(" AS {alias:name}", alias="target")
 
     def dump_columns(self):
         self.newline()
@@ -138,20 +167,97 @@ class SerializeUpdate(Utility, DumpBase):
             if idx < len(self.returning_columns)-1:
                 self.write(", ")
 
+    def dump_batch_columns(self):
+        self.newline()
+        self.write("SET ")
+        self.indent()
+        for idx, column in enumerate(self.columns):
+            if idx > 0:
+                self.newline()
+            self.format("{column:name} = {alias:name}.{value:name}",
+                        column=column.name, alias="source",
+                        value="value_%s" % (idx+1))
+            if idx < len(self.columns)-1:
+                self.write(",")
+        self.dedent()
+
+    def dump_batch_values(self):
+        columns = self.columns+self.key_columns
+        self.newline()
+        self.write("FROM (VALUES ")
+        self.indent()
+        self.write("(")
+        self.indent()
+        for column in columns:
+            if self.table.schema.name:
+                self.format("(NULL::{schema:name}.{table:name})"
+                            ".{column:name},",
+                            schema=self.table.schema.name,
+                            table=self.table.name,
+                            column=column.name)
+            else:
+                self.format("(NULL::{table:name}).{column:name},",
+                            table=self.table.name,
+                            column=column.name)
+            self.newline()
+        self.write("NULL)")
+        self.dedent()
+        for row_idx in range(self.size):
+            self.write(",")
+            self.newline()
+            self.write("(")
+            for column in columns:
+                self.format("{index:placeholder}, ", index=None)
+            self.write("%s)" % row_idx)
+        self.dedent()
+        self.write(")")
+        self.format(" AS {alias:name} (", alias="source")
+        for idx, column in enumerate(self.columns):
+            self.format("{value:name}, ", value="value_%s" % (idx+1))
+        for idx, column in enumerate(self.key_columns):
+            self.format("{value:name}, ", value="key_%s" % (idx+1))
+        self.format("{value:name})", value="index")
+
+    def dump_batch_keys(self):
+        self.newline()
+        self.write("WHERE ")
+        for idx, column in enumerate(self.key_columns):
+            if idx > 0:
+                self.write(" AND ")
+            self.format("{alias:name}.{column:name} ="
+                        " {source:name}.{value:name}",
+                        alias="target", column=column.name,
+                        source="source", value="key_%s" % (idx+1))
+
+    def dump_batch_returning(self):
+        self.newline()
+        self.format("RETURNING {alias:name}.{value:name}",
+                    alias="source", value="index")
+        for column in self.returning_columns:
+            self.format(", {alias:name}.{column:name}",
+                        alias="target", column=column.name)
+
 
 class SerializeDelete(Utility, DumpBase):
 
-    def __init__(self, table, key_columns):
+    # For a batch of `size` records, the keys are matched with `IN`.
+
+    def __init__(self, table, key_columns, size=1):
         assert isinstance(table, TableEntity)
         assert isinstance(key_columns, listof(ColumnEntity))
+        assert isinstance(size, int) and size >= 1
+        assert size == 1 or key_columns
         self.table = table
         self.key_columns = key_columns
+        self.size = size
         self.state = SerializingState()
         self.stream = self.state.stream
 
     def __call__(self):
         self.dump_delete()
-        if self.key_columns:
+        if self.size > 1:
+            self.dump_batch_keys()
+        elif self.key_columns:
             self.dump_keys()
         return self.stream.flush()
 
@@ -173,6 +279,32 @@ class SerializeDelete(Utility, DumpBase):
             self.format("{column:name} = {index:placeholder}",
                         column=column.name, index=None)
 
+    def dump_batch_keys(self):
+        is_composite = (len(self.key_columns) > 1)
+        self.newline()
+        self.write("WHERE ")
+        if is_composite:
+            self.write("(")
+        for idx, column in enumerate(self.key_columns):
+            if idx > 0:
+                self.write(", ")
+            self.format("{column:name}", column=column.name)
+        if is_composite:
+            self.write(")")
+        self.write(" IN (")
+        for row_idx in range(self.size):
+            if row_idx > 0:
+                self.write(", ")
+            if is_composite:
+                self.write("(")
+            for idx, column in enumerate(self.key_columns):
+                if idx > 0:
+                    self.write(", ")
+                self.format("{index:placeholder}", index=None)
+            if is_composite:
+                self.write(")")
+        self.write(")")
+
 
 class SerializeTruncate(Utility, DumpBase):
 
@@ -195,20 +327,45 @@ class SerializeTruncate(Utility, DumpBase):
         return self.stream.flush()
 
 
-def serialize_insert(table, columns, returning_columns):
-    return SerializeInsert.__invoke__(table, columns, returning_columns)
+class SerializeSavepoint(Utility, DumpBase):
 
+    def __init__(self, name, command):
+        assert isinstance(name, str)
+        assert command in ('create', 'rollback', 'release')
+        self.name = name
+        self.command = command
+        self.state = SerializingState()
+        self.stream = self.state.stream
 
-def serialize_update(table, columns, key_columns, returning_columns):
+    def __call__(self):
+        if self.command == 'create':
+            self.format("SAVEPOINT {name:name}", name=self.name)
+        elif self.command == 'rollback':
+            self.format("ROLLBACK TO SAVEPOINT {name:name}", name=self.name)
+        elif self.command == 'release':
+            self.format("RELEASE SAVEPOINT {name:name}", name=self.name)
+        return self.stream.flush()
+
+
+def serialize_insert(table, columns, returning_columns, size=1):
+    return SerializeInsert.__invoke__(table, columns, returning_columns, size)
+
+
+def serialize_update(table, columns, key_columns, returning_columns,
+                     size=1):
     return SerializeUpdate.__invoke__(table, columns, key_columns,
-                                      returning_columns)
+                                      returning_columns, size)
 
 
-def serialize_delete(table, key_columns):
-    return SerializeDelete.__invoke__(table, key_columns)
+def serialize_delete(table, key_columns, size=1):
+    return SerializeDelete.__invoke__(table, key_columns, size)
 
 
 def serialize_truncate(table):
     return SerializeTruncate.__invoke__(table)
 
 
+def serialize_savepoint(name, command):
+    return SerializeSavepoint.__invoke__(name, command)
+
+
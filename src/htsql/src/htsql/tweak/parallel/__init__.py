@@ -0,0 +1,48 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect, dump, pipe
+from ...core.addon import Addon, Parameter, addon_registry
+from ...core.validator import PIntVal
+import concurrent.futures
+
+
+class TweakParallelAddon(Addon):
+
+    name = 'tweak.parallel'
+    hint = """run nested segments concurrently"""
+    help = """
+    This addon executes SQL queries for nested segments concurrently,
+    each on a separate database connection.  All queries read from
+    the same database snapshot exported by the active transaction.
+
+    Parameter `max_workers` sets the number of worker threads
+    (the default is 4).  Combine with `tweak.pool` to reuse worker
+    connections; workers never wait for a free connection, so
+    the pool may open more than `max_size` connections.
+
+    Currently, only PostgreSQL backend is supported; for other
+    backends, segments are executed sequentially.
+    """
+
+    parameters = [
+            Parameter('max_workers', PIntVal(), default=4,
+                      hint="""number of worker threads (default: 4)"""),
+    ]
+
+    @classmethod
+    def get_extension(cls, app, attributes):
+        if app.htsql.db is not None:
+            name = '%s.%s' % (cls.name, app.htsql.db.engine)
+            if name not in addon_registry:
+                return
+            return name
+
+    def __init__(self, app, attributes):
+        super(TweakParallelAddon, self).__init__(app, attributes)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers)
+
+
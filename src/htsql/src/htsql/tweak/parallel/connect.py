@@ -0,0 +1,66 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.adapter import Utility, rank
+from ...core.connect import Connect
+import threading
+
+
+class WorkerState(threading.local):
+
+    def __init__(self):
+        self.is_worker = False
+
+
+state = WorkerState()
+
+
+class ExportSnapshot(Utility):
+    """
+    Exports the snapshot of the active transaction.
+
+    Returns a token that could be passed to :class:`ImportSnapshot`
+    or ``None`` if the snapshot cannot be shared with other transactions.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self):
+        return None
+
+
+class ImportSnapshot(Utility):
+    """
+    Makes the transaction read from the exported snapshot.
+
+    Must be called before any query is executed in the transaction.
+    """
+
+    def __init__(self, connection, snapshot):
+        self.connection = connection
+        self.snapshot = snapshot
+
+    def __call__(self):
+        raise NotImplementedError()
+
+
+class ParallelConnect(Connect):
+
+    rank(2.0)
+
+    def can_wait(self):
+        # The request that started the worker holds its connection
+        # until the worker is done, so a worker waiting for a free
+        # connection in a bounded pool could never be served.
+        if state.is_worker:
+            return False
+        return super(ParallelConnect, self).can_wait()
+
+
+export_snapshot = ExportSnapshot.__invoke__
+import_snapshot = ImportSnapshot.__invoke__
+
+
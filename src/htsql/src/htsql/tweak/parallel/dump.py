@@ -0,0 +1,25 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.tr.dump import SerializeSegment
+from ...core.tr.pipe import ComposePipe, RecordPipe, MixPipe
+from .pipe import ParallelRecordPipe
+
+
+class ParallelSerializeSegment(SerializeSegment):
+
+    def __call__(self):
+        pipe = super(ParallelSerializeSegment, self).__call__()
+        # A segment with nested segments is serialized to a record
+        # of queries followed by a merge.
+        if (isinstance(pipe, ComposePipe) and
+                isinstance(pipe.left_pipe, RecordPipe) and
+                isinstance(pipe.right_pipe, MixPipe)):
+            record_pipe = ParallelRecordPipe(pipe.left_pipe.field_pipes,
+                                             pipe.left_pipe.record_class)
+            pipe = ComposePipe(record_pipe, pipe.right_pipe)
+        return pipe
+
+
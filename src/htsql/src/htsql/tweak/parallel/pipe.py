@@ -0,0 +1,62 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.context import context
+from ...core.application import Environment
+from ...core.connect import transaction
+from ...core.tr.pipe import RecordPipe
+from .connect import state, export_snapshot, import_snapshot
+import concurrent.futures
+
+
+def run_field(app, variables, snapshot, make_field, input):
+    # Executes a field pipe in a worker thread.
+    env = Environment(**variables)
+    context.push(app, env)
+    state.is_worker = True
+    try:
+        with transaction() as connection:
+            import_snapshot(connection, snapshot)
+            return make_field(input)
+    finally:
+        state.is_worker = False
+        context.pop(app)
+
+
+class ParallelRecordPipe(RecordPipe):
+    """
+    Evaluates the fields concurrently, each in a separate transaction
+    reading from the snapshot of the active transaction.
+    """
+
+    def __call__(self):
+        make_fields = [field_pipe() for field_pipe in self.field_pipes]
+        def make_record(input, make_fields=make_fields,
+                               record_class=self.record_class):
+            # Nested segments are executed by the same worker.
+            if state.is_worker:
+                return record_class([make_field(input)
+                                     for make_field in make_fields])
+            with transaction() as connection:
+                snapshot = export_snapshot(connection)
+                if snapshot is None:
+                    return record_class([make_field(input)
+                                         for make_field in make_fields])
+                app = context.app
+                variables = dict((name, getattr(context.env, name))
+                                 for name in app.variables)
+                variables['connection'] = None
+                executor = app.tweak.parallel.executor
+                futures = [executor.submit(run_field, app, variables,
+                                           snapshot, make_field, input)
+                           for make_field in make_fields]
+                # The snapshot is valid while the transaction is open,
+                # so wait for all workers even if some of them failed.
+                concurrent.futures.wait(futures)
+                return record_class([future.result()
+                                     for future in futures])
+        return make_record
+
+
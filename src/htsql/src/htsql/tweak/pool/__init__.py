@@ -4,8 +4,9 @@
 
 
 from . import connect
-from ...core.addon import Addon
-import threading
+from .connect import ConnectionPool
+from ...core.addon import Addon, Parameter
+from ...core.validator import UIntVal, PIntVal, BoolVal
 
 
 class TweakPoolAddon(Addon):
@@ -15,11 +16,56 @@ class TweakPoolAddon(Addon):
     help = """
     This addon caches database connections so that a single
     connection could be used to execute more than one query.
+
+    Parameter `max_size` limits the number of open connections;
+    when the pool is exhausted, a request waits up to `timeout`
+    seconds for a connection to be released.
+
+    Parameter `min_idle` sets the number of idle connections that
+    are kept open regardless of `idle_timeout`.
+
+    Parameter `idle_timeout` closes connections that stayed idle
+    for the given number of seconds; `max_lifetime` closes connections
+    older than the given number of seconds.
+
+    If `ping` is set, a connection is checked with a trivial query
+    before it is reused.
     """
 
+    parameters = [
+            Parameter('max_size', PIntVal(is_nullable=True), default=None,
+                      hint="""max. number of connections (default: none)"""),
+            Parameter('min_idle', UIntVal(), default=0,
+                      hint="""idle connections to keep open (default: 0)"""),
+            Parameter('idle_timeout', PIntVal(is_nullable=True),
+                      default=None, value_name="SEC",
+                      hint="""close idle connections, in sec"""),
+            Parameter('max_lifetime', PIntVal(is_nullable=True),
+                      default=None, value_name="SEC",
+                      hint="""recycle old connections, in sec"""),
+            Parameter('timeout', UIntVal(is_nullable=True), default=None,
+                      value_name="SEC",
+                      hint="""wait for a free connection, in sec"""),
+            Parameter('ping', BoolVal(), default=False,
+                      hint="""check connections before reuse"""),
+    ]
+
     def __init__(self, app, attributes):
         super(TweakPoolAddon, self).__init__(app, attributes)
-        self.lock = threading.Lock()
-        self.items = []
+        self.pool = ConnectionPool(
+                max_size=self.max_size,
+                min_idle=self.min_idle,
+                idle_timeout=self.idle_timeout,
+                max_lifetime=self.max_lifetime,
+                wait_timeout=self.timeout,
+                ping=self.ping)
+
+    def stats(self):
+        """
+        Returns the number of connections in use and idle, the number
+        of waits for a free connection, the total wait time and
+        the number of timeouts.
+        """
+        return self.pool.stats()
 
 
@@ -5,7 +5,228 @@
 
 from ...core.adapter import rank
 from ...core.context import context
-from ...core.connect import Connect
+from ...core.connect import Connect, ConnectionProxy
+from ...core.error import Error
+import threading
+import time
+
+
+class PoolConnectionProxy(ConnectionProxy):
+    """
+    A connection that returns to the pool when released.
+    """
+
+    def __init__(self, connection, guard, pool):
+        super(PoolConnectionProxy, self).__init__(connection, guard)
+        self.pool = pool
+        self.created_at = time.time()
+        self.released_at = None
+
+    def release(self):
+        super(PoolConnectionProxy, self).release()
+        self.released_at = time.time()
+        self.pool.put(self)
+
+
+class ConnectionPool:
+    """
+    A bounded set of open database connections.
+
+    `max_size`
+        The maximum number of open connections (``None`` for no limit).
+
+    `min_idle`
+        The number of idle connections that are never expired.
+
+    `idle_timeout`
+        Close connections that stayed idle longer than this (in sec).
+
+    `max_lifetime`
+        Close connections that are older than this (in sec).
+
+    `wait_timeout`
+        How long to wait for a free connection (in sec) when the pool
+        is exhausted (``None`` to wait indefinitely).
+
+    A connection requested with `can_wait` unset is opened over the
+    `max_size` limit instead of waiting; connections in excess of
+    the limit are closed when released.
+
+    `ping`
+        If set, run a trivial query on a connection before reusing it.
+    """
+
+    ping_sql = "SELECT 1"
+
+    def __init__(self, max_size=None, min_idle=0, idle_timeout=None,
+                 max_lifetime=None, wait_timeout=None, ping=False):
+        self.max_size = max_size
+        self.min_idle = min_idle
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.wait_timeout = wait_timeout
+        self.ping = ping
+        self.condition = threading.Condition()
+        # Idle connections; the most recently released go last.
+        self.idle = []
+        # The number of connections checked out or being opened.
+        self.in_use = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+
+    def get(self, open, can_wait=True):
+        """
+        Checks out a connection; `open` is called to create a new one.
+
+        If `can_wait` is not set, never waits for a connection
+        to be released.
+        """
+        while True:
+            connection = self.reserve(can_wait)
+            if connection is None:
+                break
+            if self.check(connection):
+                connection.acquire()
+                return connection
+            self.discard(connection)
+        try:
+            connection = open()
+        except:
+            with self.condition:
+                self.in_use -= 1
+                self.condition.notify()
+            raise
+        return connection
+
+    def reserve(self, can_wait=True):
+        # Takes an idle connection or reserves a slot for a new one.
+        expired = []
+        started = None
+        try:
+            with self.condition:
+                while True:
+                    expired.extend(self.expire())
+                    if self.idle:
+                        connection = self.idle.pop()
+                        self.in_use += 1
+                        return connection
+                    if (self.max_size is None or
+                            self.in_use < self.max_size or not can_wait):
+                        self.in_use += 1
+                        return None
+                    now = time.time()
+                    if started is None:
+                        started = now
+                        self.waits += 1
+                    timeout = None
+                    if self.wait_timeout is not None:
+                        timeout = started + self.wait_timeout - now
+                        if timeout <= 0:
+                            self.timeouts += 1
+                            raise Error("Timed out waiting for"
+                                        " a database connection")
+                    self.condition.wait(timeout)
+        finally:
+            if started is not None:
+                with self.condition:
+                    self.wait_time += time.time() - started
+            for connection in expired:
+                self.close(connection)
+
+    def put(self, connection):
+        # Called when a connection is released.
+        expired = []
+        with self.condition:
+            self.in_use -= 1
+            if connection.is_valid and (self.max_size is None or
+                    self.in_use + len(self.idle) < self.max_size):
+                self.idle.append(connection)
+            else:
+                expired.append(connection)
+            expired.extend(self.expire())
+            self.condition.notify()
+        for connection in expired:
+            self.close(connection)
+
+    def discard(self, connection):
+        # Drops a reserved connection that failed the check.
+        with self.condition:
+            self.in_use -= 1
+            self.condition.notify()
+        self.close(connection)
+
+    def expire(self):
+        # Removes idle connections that are too old; must hold the lock.
+        now = time.time()
+        expired = []
+        retained = []
+        for idx, connection in enumerate(self.idle):
+            is_expired = False
+            if not connection.is_valid:
+                is_expired = True
+            elif (self.max_lifetime is not None and
+                    now - connection.created_at > self.max_lifetime):
+                is_expired = True
+            elif (self.idle_timeout is not None and
+                    len(self.idle) - idx > self.min_idle and
+                    now - connection.released_at > self.idle_timeout):
+                is_expired = True
+            if is_expired:
+                expired.append(connection)
+            else:
+                retained.append(connection)
+        if expired:
+            self.idle = retained
+        return expired
+
+    def check(self, connection):
+        # Verifies that the connection is still usable.
+        raw_connection = connection.connection
+        if getattr(raw_connection, 'closed', False):
+            return False
+        if not self.ping:
+            return True
+        try:
+            cursor = connection.cursor()
+            cursor.execute(self.ping_sql)
+            cursor.fetchall()
+            cursor.close()
+            connection.rollback()
+        except Error:
+            return False
+        return True
+
+    def close(self, connection):
+        connection.is_valid = False
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def clear(self):
+        """
+        Closes all idle connections.
+        """
+        with self.condition:
+            idle = self.idle
+            self.idle = []
+            self.condition.notify_all()
+        for connection in idle:
+            self.close(connection)
+
+    def stats(self):
+        """
+        Returns a dictionary with the pool statistics.
+        """
+        with self.condition:
+            return {
+                    'in_use': self.in_use,
+                    'idle': len(self.idle),
+                    'waits': self.waits,
+                    'wait_time': self.wait_time,
+                    'timeouts': self.timeouts,
+            }
 
 
 class PoolConnect(Connect):
@@ -15,17 +236,16 @@ class PoolConnect(Connect):
     def __call__(self):
         if self.with_autocommit:
             return super(PoolConnect, self).__call__()
-        addon = context.app.tweak.pool
-        with addon.lock:
-            for connection in addon.items[:]:
-                if not connection.is_valid:
-                    addon.items.remove(connection)
-            for connection in addon.items:
-                if not connection.is_busy:
-                    connection.acquire()
-                    return connection
-            connection = super(PoolConnect, self).__call__()
-            addon.items.append(connection)
-            return connection
+        pool = context.app.tweak.pool.pool
+        return pool.get(self.open_pooled, self.can_wait())
+
+    def can_wait(self):
+        # Whether the request may wait for a connection to be released.
+        return True
+
+    def open_pooled(self):
+        connection = super(PoolConnect, self).__call__()
+        return PoolConnectionProxy(connection.connection, connection.guard,
+                                   context.app.tweak.pool.pool)
 
 
@@ -6,8 +6,9 @@
 from htsql.core.adapter import adapt
 from htsql.core.domain import TextDomain, EnumDomain
 from htsql.core.connect import (Connect, UnscrambleError, Unscramble,
-        Scramble)
+        Scramble, StreamCursor, CursorProxy)
 from htsql.core.context import context
+import itertools
 import psycopg2, psycopg2.extensions
 
 
@@ -51,6 +52,20 @@ class ConnectPGSQL(Connect):
         return connection
 
 
+class StreamCursorPGSQL(StreamCursor):
+
+    # Generates unique names of server-side cursors.
+    names = itertools.count(1)
+
+    def __call__(self):
+        # A named cursor fetches rows from the server in chunks
+        # of the size given to `fetchmany()`.
+        name = "htsql_stream_%s" % next(self.names)
+        with self.connection.guard:
+            cursor = self.connection.connection.cursor(name)
+            return CursorProxy(cursor, self.connection.guard)
+
+
 class UnscramblePGSQLError(UnscrambleError):
 
     def __call__(self):
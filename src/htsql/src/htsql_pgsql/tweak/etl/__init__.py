@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import insert, merge, delete
+from htsql.core.addon import Addon
+
+
+class TweakETLPGSQLAddon(Addon):
+
+    name = 'tweak.etl.pgsql'
+    hint = """implement `tweak.etl` for PostgreSQL"""
+    prerequisites = ['engine.pgsql']
+
+
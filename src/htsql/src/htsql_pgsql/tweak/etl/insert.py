@@ -0,0 +1,14 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.etl.cmd.insert import BuildExecuteInsertBatch
+
+
+class PGSQLBuildExecuteInsertBatch(BuildExecuteInsertBatch):
+
+    # PostgreSQL aborts the transaction when a statement fails.
+    savepoint = 'htsql_insert'
+
+
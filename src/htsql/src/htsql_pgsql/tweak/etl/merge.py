@@ -0,0 +1,14 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.etl.cmd.merge import BuildExecuteUpdateBatch
+
+
+class PGSQLBuildExecuteUpdateBatch(BuildExecuteUpdateBatch):
+
+    # PostgreSQL aborts the transaction when a statement fails.
+    savepoint = 'htsql_update'
+
+
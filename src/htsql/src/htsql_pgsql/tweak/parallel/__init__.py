@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakParallelPGSQLAddon(Addon):
+
+    name = 'tweak.parallel.pgsql'
+    hint = """implement `tweak.parallel` for PostgreSQL"""
+    prerequisites = ['engine.pgsql']
+
+
@@ -0,0 +1,35 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.parallel.connect import ExportSnapshot, ImportSnapshot
+
+
+class ExportSnapshotPGSQL(ExportSnapshot):
+
+    def __call__(self):
+        # A transaction that imports the snapshot does not see changes
+        # made by the exporting transaction, so we let the transaction
+        # that has already written anything execute the segments itself.
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT CASE WHEN txid_current_if_assigned() IS NULL
+                        THEN pg_export_snapshot() END
+        """)
+        [(snapshot,)] = cursor.fetchall()
+        return snapshot
+
+
+class ImportSnapshotPGSQL(ImportSnapshot):
+
+    def __call__(self):
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SET TRANSACTION ISOLATION LEVEL REPEATABLE READ
+        """)
+        cursor.execute("""
+            SET TRANSACTION SNAPSHOT %(snapshot)s
+        """, {'snapshot': self.snapshot})
+
+
@@ -0,0 +1,134 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+# Compares the ways `BatchSQLPipe` may deliver a large query result:
+#
+#   legacy  - rows pickled chunk by chunk (protocol 2), the format used
+#             before `SpillBuffer`;
+#   spill   - the columnar spill buffer;
+#   stream  - no spill at all, rows are fetched as the consumer asks.
+#
+# Usage: python bench_spill.py [ROWS [BATCH]]
+
+
+from htsql import HTSQL
+from htsql.core.context import context
+from htsql.core.connect import transaction, unscramble
+from htsql.core.syn.parse import parse
+from htsql.core.tr.translate import translate
+from htsql.core.tr.pipe import BatchSQLPipe
+import sys
+import os
+import time
+import tempfile
+import pickle
+import sqlite3
+
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+batch = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+query = "/item{id, name, price, created, is_active}"
+
+
+def make_db(path):
+    connection = sqlite3.connect(path)
+    connection.execute("""
+        CREATE TABLE item (
+            id INTEGER PRIMARY KEY,
+            name VARCHAR(64) NOT NULL,
+            price NUMERIC(10, 2),
+            created DATE NOT NULL,
+            is_active BOOLEAN NOT NULL)""")
+    connection.executemany("INSERT INTO item VALUES (?, ?, ?, ?, ?)",
+            ((k, "item #%s" % k, (k % 10000) + 0.25 if k % 7 else None,
+              "20%02d-%02d-%02d" % (k % 20, k % 12 + 1, k % 28 + 1), k % 2)
+             for k in range(rows)))
+    connection.commit()
+    connection.close()
+
+
+def legacy(pipe):
+    # The spill loop as it was written before the columnar buffer.
+    unscrambles = [unscramble(domain) for domain in pipe.output_domains]
+    with transaction() as connection:
+        cursor = connection.cursor()
+        cursor.execute(pipe.sql)
+        stream = tempfile.TemporaryFile()
+        size = 0
+        chunk = cursor.fetchmany(batch)
+        chunk = [tuple([convert(item)
+                        for item, convert in zip(row, unscrambles)])
+                 for row in chunk]
+        while chunk:
+            size += 1
+            pickle.dump(chunk, stream, 2)
+            chunk = cursor.fetchmany(batch)
+            chunk = [tuple([convert(item)
+                            for item, convert in zip(row, unscrambles)])
+                     for row in chunk]
+        stream.seek(0)
+        def iterate(stream=stream, size=size, load=pickle.load):
+            for k in range(size):
+                for row in load(stream):
+                    yield row
+        return iterate()
+
+
+def find_sql_pipe(pipe):
+    # Locates the `BatchSQLPipe` in the pipe tree.
+    stack = [pipe]
+    while stack:
+        pipe = stack.pop()
+        if not hasattr(pipe, '__dict__'):
+            continue
+        if isinstance(pipe, BatchSQLPipe):
+            return pipe
+        for value in vars(pipe).values():
+            if isinstance(value, list):
+                stack.extend(value)
+            elif hasattr(value, '__dict__'):
+                stack.append(value)
+    raise RuntimeError("no SQL pipe found")
+
+
+def run(label, produce):
+    start = time.time()
+    iterator = produce()
+    spilled = time.time()
+    count = 0
+    for row in iterator:
+        count += 1
+    done = time.time()
+    print("%-8s %8d rows  fetch+spill %6.2fs  read %6.2fs  total %6.2fs"
+          % (label, count, spilled-start, done-spilled, done-start))
+
+
+def main():
+    handle, path = tempfile.mkstemp(suffix='.sqlite')
+    os.close(handle)
+    try:
+        make_db(path)
+        app = HTSQL("sqlite:"+path)
+        with app:
+            pipe = find_sql_pipe(translate(parse(query), batch=batch))
+            run_sql = pipe()
+            def spill():
+                return iter(run_sql(None))
+            def stream():
+                with context.env(streaming=True):
+                    return run_sql(None)
+            run("legacy", lambda: legacy(pipe))
+            run("spill", spill)
+            with transaction():
+                run("stream", stream)
+    finally:
+        os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
+
+
@@ -0,0 +1,21 @@
+
+from htsql.core.tr.pipe import MixPipe, ExtractPipe
+
+# `MixPipe` merges the rows of a nested segment with the parent rows.
+# Both are ordered by the parent key, so when the rows are streamed,
+# the kid rows should be consumed lazily, one row ahead of the parent.
+
+def rows(name, data):
+    for row in data:
+        print("fetch %s %r" % (name, row))
+        yield row
+
+parent = rows("parent", [(1,), (2,), (3,)])
+kid = rows("kid", [(1, 'a'), (2, 'b'), (3, 'c'), (3, 'd')])
+mix = MixPipe([ExtractPipe(0), ExtractPipe(0)])()
+for row in mix([parent, kid]):
+    print("mix %r" % (row,))
+print()
+
+# A list input produces a list.
+print(mix([[(1,), (2,)], [(2, 'a')]]))
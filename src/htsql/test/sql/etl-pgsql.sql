@@ -72,6 +72,17 @@ CREATE TABLE product_category (
       REFERENCES category(id)
 );
 
+CREATE TABLE employee (
+    code                VARCHAR(16) NOT NULL,
+    name                VARCHAR(64) NOT NULL,
+    manager_code        VARCHAR(16),
+    CONSTRAINT employee_pk
+      PRIMARY KEY (code),
+    CONSTRAINT employee_manager_fk
+      FOREIGN KEY (manager_code)
+      REFERENCES employee(code)
+);
+
 CREATE TABLE customer (
     handle              VARCHAR(16) NOT NULL, -- User-provided identifier
     guid                CHAR(36) NOT NULL,    -- 128-bit as 32 hex with 4 hyphens
@@ -4,6 +4,8 @@
 
 
 import sys
+import threading
+import time
 
 from rex.asynctask import AsyncTaskWorker
 from rex.core import Error
@@ -17,6 +19,8 @@ __all__ = (
     'ErrorWorker',
     'FragileWorker',
     'RequeueWorker',
+    'BatchWorker',
+    'ConcurrentWorker',
     'NoisyTask',
     'QuietTask',
     'CrashyTask',
@@ -87,6 +91,39 @@ class RequeueWorker(AsyncTaskWorker):
             print('REQUEUE requeued')
 
 
+class BatchWorker(AsyncTaskWorker):
+    name = 'demo_batch_worker'
+    batch_size = 2
+
+    def process(self, payload):
+        print('BATCH processed: %r' % (payload,))
+
+    def process_batch(self, payloads):
+        print('BATCH processed: %r' % (payloads,))
+
+
+class ConcurrentWorker(AsyncTaskWorker):
+    name = 'demo_concurrent_worker'
+    concurrency = 3
+
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    processed = []
+
+    def process(self, payload):
+        with self.lock:
+            ConcurrentWorker.running += 1
+            ConcurrentWorker.max_running = max(
+                ConcurrentWorker.max_running,
+                ConcurrentWorker.running,
+            )
+        time.sleep(0.1)
+        with self.lock:
+            ConcurrentWorker.running -= 1
+            ConcurrentWorker.processed.append(payload['foo'])
+
+
 class NoisyTask(RexTask):
     """
     A task that says hello.
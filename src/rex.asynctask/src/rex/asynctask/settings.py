@@ -39,6 +39,8 @@ class WorkerConfigVal(OneOfVal):
             ('worker', ChoiceVal(worker_names)),
             ('rate_max_calls', IntVal(1), None),
             ('rate_period', FloatVal(), None),
+            ('batch_size', IntVal(1), None),
+            ('concurrency', IntVal(1), None),
         )
         super(WorkerConfigVal, self).__init__(
             ChoiceVal(worker_names),
@@ -73,6 +75,18 @@ class AsyncTaskWorkersSetting(Setting):
             A float indicating the number of seconds the rate limiter logic
             should measure over. Optional.
 
+        batch_size
+            An integer indicating the maximum number of tasks the worker
+            retrieves from the queue at once. Optional; defaults to the
+            ``batch_size`` of the worker, which is normally ``1``.
+
+        concurrency
+            An integer indicating the number of tasks (or batches of tasks)
+            the worker process may handle at the same time, each in its own
+            thread. When the worker is told to stop, it finishes the tasks
+            in progress first. Optional; defaults to the ``concurrency`` of
+            the worker, which is normally ``1``.
+
     If not specified, defaults to ``{}``.
 
     This is a merged setting, meaning that the mappings defined for this
@@ -102,7 +116,9 @@ class AsyncTaskWorkersSetting(Setting):
 class AsyncWorkersPollIntervalSetting(Setting):
     """
     Indicates how many milliseconds an ``AsyncTaskWorker`` process must sleep
-    beween attempts to retrive tasks from its queue.
+    beween attempts to retrive tasks from its queue. Transports that support
+    notifications (e.g., ``pgsql``) wake the worker up as soon as a task is
+    submitted, so for them this is only the upper bound of the wait.
 
     If not specified, defaults to ``500``.
     """
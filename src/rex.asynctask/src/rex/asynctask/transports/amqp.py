@@ -2,6 +2,8 @@
 # Copyright (c) 2017, Prometheus Research, LLC
 #
 
+import threading
+
 from urllib.parse import urlunparse
 
 from rex.core import Error
@@ -44,6 +46,8 @@ class AmqpAsyncTransport(AsyncTransport):
                 exc,
             )
         self._queues = {}
+        # Kombu connections must not be used by several threads at once.
+        self._mutex = threading.RLock()
 
     def _get_queue(self, queue_name):
         self.ensure_valid_name(queue_name)
@@ -55,21 +59,24 @@ class AmqpAsyncTransport(AsyncTransport):
         return self._queues[queue_name]
 
     def submit_task(self, queue_name, payload):
-        queue = self._get_queue(queue_name)
         payload = self.encode_payload(payload)
-        queue.put(payload)
+        with self._mutex:
+            queue = self._get_queue(queue_name)
+            queue.put(payload)
 
     def get_task(self, queue_name):
-        queue = self._get_queue(queue_name)
-        try:
-            payload = queue.get(block=False).body
-        except queue.Empty:
-            return None
+        with self._mutex:
+            queue = self._get_queue(queue_name)
+            try:
+                payload = queue.get(block=False).body
+            except queue.Empty:
+                return None
         return self.decode_payload(payload)
 
     def poll_queue(self, queue_name):
-        queue = self._get_queue(queue_name)
-        return queue.qsize()
+        with self._mutex:
+            queue = self._get_queue(queue_name)
+            return queue.qsize()
 
     def __repr__(self):
         return '%s(%s)' % (
@@ -5,6 +5,7 @@
 
 import json
 import re
+import time
 
 from urllib.parse import parse_qs
 
@@ -166,6 +167,69 @@ class AsyncTransport(Extension):
 
         raise NotImplementedError()
 
+    def submit_tasks(self, queue_name, payloads):
+        """
+        Places multiple tasks into the specified queue, preserving their
+        order.
+
+        The default implementation calls ``submit_task()`` for each payload;
+        concrete classes should override it if they can do better.
+
+        :param queue_name: the name of the queue to place the tasks in
+        :type queue_name: str
+        :param payloads: the data to send in the tasks
+        :type payloads: list of dicts
+        """
+
+        for payload in payloads:
+            self.submit_task(queue_name, payload)
+
+    def get_tasks(self, queue_name, max_count):
+        """
+        Retrieves up to ``max_count`` tasks from the specified queue.
+
+        The default implementation calls ``get_task()`` until the queue is
+        exhausted; concrete classes should override it if they can do better.
+
+        :param queue_name: the name of the queue to retrieve tasks from
+        :type queue_name: str
+        :param max_count: the maximum number of tasks to retrieve
+        :type max_count: int
+        :returns:
+            a list of the payload dictionaries of the tasks in the order they
+            were submitted; empty if there are no tasks in the queue
+        """
+
+        payloads = []
+        while len(payloads) < max_count:
+            payload = self.get_task(queue_name)
+            if payload is None:
+                break
+            payloads.append(payload)
+        return payloads
+
+    def wait_for_task(self, queue_name, timeout):
+        """
+        Blocks until a task may be available in the specified queue or until
+        the timeout expires, whichever comes first.
+
+        Transports that can be notified about new tasks should override this
+        method; the default implementation simply sleeps.
+
+        :param queue_name: the name of the queue to wait on
+        :type queue_name: str
+        :param timeout: the maximum number of seconds to wait
+        :type timeout: float
+        :returns:
+            ``True`` if the transport was notified about a new task,
+            ``False`` otherwise
+        """
+
+        # pylint: disable=no-self-use,unused-argument
+
+        time.sleep(timeout)
+        return False
+
     def poll_queue(self, queue_name):
         """
         Counts the number of tasks in the specified queue.
@@ -4,6 +4,10 @@
 
 import os
 import stat
+import threading
+
+from collections import defaultdict
+from contextlib import contextmanager
 
 from .base import AsyncTransport
 
@@ -43,6 +47,8 @@ class FileSysAsyncTransport(AsyncTransport):
 
     def initialize(self):
         self._locks = {}
+        # FileLock only guards against other processes.
+        self._thread_locks = defaultdict(threading.RLock)
 
         self.options['lock_timeout'] = \
             int(self.options.get('lock_timeout', '-1'))
@@ -92,6 +98,63 @@ class FileSysAsyncTransport(AsyncTransport):
         contents = self.decode_payload(contents)
         return contents['payload']
 
+    def submit_tasks(self, queue_name, payloads):
+        self._ensure_queue(queue_name)
+
+        full_payloads = [
+            self.encode_payload({
+                'payload': payload,
+            })
+            for payload in payloads
+        ]
+        if not full_payloads:
+            return
+
+        with self._lock(queue_name):
+            index = self._get_index(queue_name)
+            next_start = index[0] or 1
+            next_end = index[1]
+
+            for full_payload in full_payloads:
+                next_end += 1
+                path = os.path.join(
+                    self._queue_path(queue_name),
+                    str(next_end),
+                )
+                self._write_file(path, full_payload)
+
+            self._write_index(queue_name, next_start, next_end)
+
+    def get_tasks(self, queue_name, max_count):
+        self._ensure_queue(queue_name)
+        contents = []
+
+        with self._lock(queue_name):
+            index = self._get_index(queue_name)
+            if index[1] == 0 or max_count < 1:
+                return []
+
+            last = min(index[1], index[0] + max_count - 1)
+            for position in range(index[0], last + 1):
+                path = os.path.join(
+                    self._queue_path(queue_name),
+                    str(position),
+                )
+                with open(path, 'r') as task_file:
+                    contents.append(task_file.read())
+                os.remove(path)
+
+            next_start = last + 1
+            next_end = index[1]
+            if next_start > next_end:
+                next_start = next_end = 0
+            self._write_index(queue_name, next_start, next_end)
+
+        return [
+            self.decode_payload(content)['payload']
+            for content in contents
+        ]
+
     def poll_queue(self, queue_name):
         self._ensure_queue(queue_name)
 
@@ -115,14 +178,17 @@ class FileSysAsyncTransport(AsyncTransport):
             with self._lock(queue_name):
                 self._write_index(queue_name, 0, 0)
 
+    @contextmanager
     def _lock(self, queue_name):
-        if queue_name not in self._locks:
-            import filelock
-            self._locks[queue_name] = filelock.FileLock(
-                os.path.join(self._queue_path(queue_name), FILE_LOCK),
-                timeout=self.options['lock_timeout'],
-            )
-        return self._locks[queue_name]
+        with self._thread_locks[queue_name]:
+            if queue_name not in self._locks:
+                import filelock
+                self._locks[queue_name] = filelock.FileLock(
+                    os.path.join(self._queue_path(queue_name), FILE_LOCK),
+                    timeout=self.options['lock_timeout'],
+                )
+            with self._locks[queue_name]:
+                yield
 
     def _get_index(self, queue_name):
         path = os.path.join(self.path, queue_name, FILE_INDEX)
@@ -54,6 +54,23 @@ class LocalMemoryAsyncTransport(AsyncTransport):
 
         return payload
 
+    def submit_tasks(self, queue_name, payloads):
+        self.ensure_valid_name(queue_name)
+        payloads = [self.encode_payload(payload) for payload in payloads]
+
+        with self._lock(queue_name):
+            self._queues[queue_name].extend(payloads)
+
+    def get_tasks(self, queue_name, max_count):
+        self.ensure_valid_name(queue_name)
+
+        with self._lock(queue_name):
+            queue = self._queues[queue_name]
+            payloads = queue[:max_count]
+            del queue[:max_count]
+
+        return [self.decode_payload(payload) for payload in payloads]
+
     def poll_queue(self, queue_name):
         self.ensure_valid_name(queue_name)
         count = len(self._queues[queue_name])
@@ -83,6 +83,24 @@ class RedisAsyncTransport(AsyncTransport):
         payload = self.decode_payload(self._redis.lpop(queue_name))
         return payload
 
+    def submit_tasks(self, queue_name, payloads):
+        self.ensure_valid_name(queue_name)
+        queue_name = '_'.join([self.key_prefix, queue_name])
+        payloads = [self.encode_payload(payload) for payload in payloads]
+        if payloads:
+            self._redis.rpush(queue_name, *payloads)
+
+    def get_tasks(self, queue_name, max_count):
+        self.ensure_valid_name(queue_name)
+        queue_name = '_'.join([self.key_prefix, queue_name])
+        if max_count < 1:
+            return []
+        pipe = self._redis.pipeline()
+        pipe.lrange(queue_name, 0, max_count - 1)
+        pipe.ltrim(queue_name, max_count, -1)
+        payloads, _ = pipe.execute()
+        return [self.decode_payload(payload) for payload in payloads]
+
     def poll_queue(self, queue_name):
         self.ensure_valid_name(queue_name)
         queue_name = '_'.join([self.key_prefix, queue_name])
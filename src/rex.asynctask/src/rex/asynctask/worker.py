@@ -3,11 +3,14 @@
 #
 
 
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 from ratelimiter import RateLimiter
 
-from rex.core import Extension, get_settings
+from rex.core import Extension, get_settings, get_rex
 from rex.logging import get_logger
 
 from .core import get_transport
@@ -35,6 +38,17 @@ class AsyncTaskWorker(Extension):
     #: The name of the worker as referred to in the asynctask_workers setting.
     name = None
 
+    #: The maximum number of tasks to retrieve from the queue in one
+    #: iteration; can be overridden by the ``batch_size`` option of the
+    #: asynctask_workers setting.
+    batch_size = 1
+
+    #: The number of tasks to process concurrently, each in its own thread;
+    #: can be overridden by the ``concurrency`` option of the
+    #: asynctask_workers setting. Workers that set it above ``1`` must be
+    #: thread-safe.
+    concurrency = 1
+
     @classmethod
     def sanitize(cls):
         if cls.enabled():
@@ -61,37 +75,104 @@ class AsyncTaskWorker(Extension):
 
         sleep_duration = self.get_poll_interval() / 1000.0
         limiter = self.get_limiter()
-
-        while not check_for_termination(conn):
-            with limiter:
-                payload = self._transport.get_task(queue_name)
-            if payload is not None:
-                self.logger.debug('Got payload: %r', payload)
-                try:
-                    self.process(payload)
-                except Exception:  # pylint: disable=broad-except
-                    self.logger.exception(
-                        'An unhandled exception occurred while processing the'
-                        ' payload'
+        batch_size = self.get_batch_size()
+        concurrency = self.get_concurrency()
+
+        executor = None
+        if concurrency > 1:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+            slots = threading.BoundedSemaphore(concurrency)
+            pending = set()
+            app = get_rex()
+
+        try:
+            while not check_for_termination(conn):
+                if executor is not None:
+                    # Wait for a free thread before claiming more tasks.
+                    if not slots.acquire(timeout=sleep_duration):
+                        continue
+                    if check_for_termination(conn):
+                        slots.release()
+                        break
+                    pending = set(
+                        future
+                        for future in pending
+                        if not future.done()
                     )
+
+                if batch_size > 1:
+                    payloads = self._get_batch(limiter, batch_size)
                 else:
-                    self.logger.debug('Processing complete')
+                    with limiter:
+                        payload = self._transport.get_task(queue_name)
+                    payloads = [payload] if payload is not None else []
+
+                if payloads and executor is not None:
+                    future = executor.submit(
+                        self._process_in_thread,
+                        app,
+                        payloads,
+                    )
+                    future.add_done_callback(lambda future: slots.release())
+                    pending.add(future)
+                    continue
 
-            elif halt_when_empty:
-                self.logger.info('No tasks found in queue')
-                break
+                if executor is not None:
+                    slots.release()
 
-            else:
-                # No task to process, let's sleep a bit.
-                try:
-                    time.sleep(sleep_duration)
-                except KeyboardInterrupt:  # pragma: no cover
-                    pass
+                if payloads:
+                    self._process_payloads(payloads)
+
+                elif halt_when_empty:
+                    if executor is not None and pending:
+                        # The tasks in progress may requeue more work.
+                        wait(pending, return_when=FIRST_COMPLETED)
+                        continue
+                    self.logger.info('No tasks found in queue')
+                    break
+
+                else:
+                    # No task to process, let's wait for one to show up.
+                    try:
+                        self._transport.wait_for_task(
+                            queue_name,
+                            sleep_duration,
+                        )
+                    except KeyboardInterrupt:  # pragma: no cover
+                        pass
+
+        finally:
+            if executor is not None:
+                # Let the tasks in progress finish before terminating.
+                self.logger.info('Draining')
+                executor.shutdown(wait=True)
 
         self._queue_name = None
         self._transport = None
         self.logger.info('Terminating')
 
+    def _process_payloads(self, payloads):
+        try:
+            self.process_batch(payloads)
+        except Exception:  # pylint: disable=broad-except
+            self.logger.exception(
+                'An unhandled exception occurred while processing the'
+                ' payloads'
+            )
+
+    def _process_in_thread(self, app, payloads):
+        with app:
+            self._process_payloads(payloads)
+
+    def _get_batch(self, limiter, batch_size):
+        with limiter:
+            payloads = self._transport.get_tasks(self._queue_name, batch_size)
+        # Every task in the batch counts against the rate limit.
+        for _ in payloads[1:]:
+            with limiter:
+                pass
+        return payloads
+
     def _throttled(self, until):
         self.logger.debug(
             'Rate limited on queue %s, sleeping for %f seconds',
@@ -119,10 +200,42 @@ class AsyncTaskWorker(Extension):
             callback=self._throttled,
         )
 
+    def get_batch_size(self):
+        """
+        Returns the maximum number of tasks to retrieve from the queue in one
+        iteration of the worker loop. It never exceeds the ``rate_max_calls``
+        limit of the queue.
+
+        :rtype: int
+        """
+
+        batch_size = self.batch_size
+        cfg = get_settings().asynctask_workers.get(self._queue_name)
+        if cfg:
+            if cfg.batch_size is not None:
+                batch_size = cfg.batch_size
+            if cfg.rate_max_calls is not None:
+                batch_size = min(batch_size, cfg.rate_max_calls)
+        return batch_size
+
+    def get_concurrency(self):
+        """
+        Returns the number of tasks the worker may process concurrently.
+
+        :rtype: int
+        """
+
+        concurrency = self.concurrency
+        cfg = get_settings().asynctask_workers.get(self._queue_name)
+        if cfg and cfg.concurrency is not None:
+            concurrency = cfg.concurrency
+        return concurrency
+
     def get_poll_interval(self):
         """
-        Returns the number of milliseconds to wait between attempts to retrieve
-        tasks from the queue.
+        Returns the maximum number of milliseconds to wait between attempts to
+        retrieve tasks from the queue. Transports that support notifications
+        wake the worker up as soon as a task is submitted.
 
         :rtype: int
         """
@@ -143,6 +256,31 @@ class AsyncTaskWorker(Extension):
 
         raise NotImplementedError()
 
+    def process_batch(self, payloads):
+        """
+        Called with the tasks received on the queue in one iteration of the
+        worker loop.
+
+        The default implementation calls ``process()`` for each payload and
+        logs any errors it raises. Workers that can handle several tasks at
+        once more efficiently should override it and set ``batch_size``.
+
+        :param payloads: the payloads of the tasks
+        :type payloads: list of dicts
+        """
+
+        for payload in payloads:
+            self.logger.debug('Got payload: %r', payload)
+            try:
+                self.process(payload)
+            except Exception:  # pylint: disable=broad-except
+                self.logger.exception(
+                    'An unhandled exception occurred while processing the'
+                    ' payload'
+                )
+            else:
+                self.logger.debug('Processing complete')
+
     def requeue(self, payload):
         """
         A convenience method for resubmitting a payload back into the queue.
@@ -10,6 +10,8 @@ import inspect
 import textwrap
 import os
 import time
+import ctypes
+import ctypes.util
 
 
 class Cache(dict):
@@ -29,13 +31,93 @@ class Cache(dict):
         return self[key]
 
 
+class FileWatcher:
+    # Reports changes in the directories of the watched files; uses inotify,
+    # so it is only available on Linux.
+
+    # Events that indicate that a file in the directory may have changed:
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    # IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF.
+    mask = 0x0002 | 0x0004 | 0x0008 | 0x0040 | 0x0080 | 0x0100 | 0x0200 | \
+           0x0400 | 0x0800
+    # IN_NONBLOCK | IN_CLOEXEC.
+    flags = 0o4000 | 0o2000000
+
+    instance = None
+    instance_lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        # Returns the watcher for the current process or `None` if inotify
+        # is not available.
+        instance = cls.instance
+        if instance is False:
+            return None
+        if instance is not None and instance.pid == os.getpid():
+            return instance
+        with cls.instance_lock:
+            instance = cls.instance
+            if instance is None or instance.pid != os.getpid():
+                try:
+                    instance = cls()
+                except (OSError, AttributeError):
+                    instance = False
+                cls.instance = instance
+            return instance or None
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.add_watch = libc.inotify_add_watch
+        self.fd = libc.inotify_init1(self.flags)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.pid = os.getpid()
+        self.directories = set()
+        self.lock = threading.Lock()
+        # Set if we could not watch some directory; also, a new watcher
+        # may have missed some changes.
+        self.is_broken = False
+        self.is_dirty = True
+
+    def watch(self, path):
+        # Starts watching the directory of the file.
+        directory = os.path.dirname(path)
+        with self.lock:
+            if directory in self.directories:
+                return
+            wd = self.add_watch(self.fd, os.fsencode(directory), self.mask)
+            if wd < 0:
+                self.is_broken = True
+            self.directories.add(directory)
+
+    def changed(self):
+        # Checks if any changes were reported since the last call.
+        if self.is_broken:
+            return True
+        changed = self.is_dirty
+        self.is_dirty = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            changed = True
+        return changed
+
+
 class OpenGate:
     # An utility for loading data from a file and caching the result.  Rebuilds
     # the result whenever any of the source files changes.
     # NOTE: not resistant to race conditions -- use only to enable development
     # without restarting the server.
+    # How often the files are checked depends on `autoreload` and
+    # `autoreload_interval` settings; see `AutoreloadSetting`.
 
-    __slots__ = ('callback', 'args', 'result', 'version')
+    __slots__ = ('callback', 'args', 'result', 'version', 'checked',
+                 'mode', 'interval')
 
     # Global dictionary that maps file names to their stats.
     stats = {}
@@ -43,6 +125,7 @@ class OpenGate:
     stats_lock = threading.RLock()
 
     def __init__(self, callback, *args):
+        from .setting import get_settings
         # Function that generates the result.  Must have a parameter called
         # `open`.
         self.callback = callback
@@ -52,18 +135,52 @@ class OpenGate:
         self.result = None
         # The version of the data.
         self.version = 0
+        # When the data was last validated.
+        self.checked = 0.0
+        # How to detect changes in the files.
+        settings = get_settings()
+        self.mode = getattr(settings, 'autoreload', True)
+        self.interval = getattr(settings, 'autoreload_interval', None)
+        if self.mode == 'inotify':
+            watcher = FileWatcher.get()
+            if watcher is None:
+                self.mode = True
+            else:
+                for path in list(OpenGate.stats):
+                    watcher.watch(path)
 
     def open(self, path):
         # Opens the file; saves its stats.
         stream = open(path)
         path = os.path.abspath(path)
+        if self.mode == 'inotify':
+            watcher = FileWatcher.get()
+            if watcher is not None:
+                watcher.watch(path)
         if path not in OpenGate.stats:
             stat = os.fstat(stream.fileno())
             OpenGate.stats[path] = (stat.st_mtime, stat.st_size)
         return stream
 
+    def is_fresh(self):
+        # Checks if we could use the cached result without checking the files.
+        if self.version == 0:
+            return False
+        if self.mode is False:
+            return True
+        if self.version != OpenGate.stats_version:
+            return False
+        if self.mode == 'inotify':
+            watcher = FileWatcher.get()
+            return (watcher is not None and not watcher.changed())
+        return (self.interval is not None and
+                time.time() < self.checked + self.interval)
+
     def __call__(self):
+        if self.is_fresh():
+            return self.result
         with OpenGate.stats_lock:
+            self.checked = time.time()
             # Check if we can use the cached result.
             if self.version > 0:
                 stats = {}
@@ -201,6 +318,9 @@ def autoreload(fn):
 
     The function must have only positional arguments with the last argument
     being ``open=open``.
+
+    How often the files are checked for changes is controlled by
+    ``autoreload`` and ``autoreload_interval`` settings.
     """
     spec = inspect.getargspec(fn)
     assert (spec.args[-1:] == ['open'] and
@@ -7,7 +7,7 @@ from .extension import Extension
 from .context import get_rex
 from .cache import cached
 from .package import get_packages
-from .validate import BoolVal, StrVal, MapVal
+from .validate import BoolVal, StrVal, MapVal, MaybeVal, FloatVal
 from .error import Error
 import textwrap
 import yaml
@@ -117,6 +117,42 @@ class DebugSetting(Setting):
     validate = BoolVal()
 
 
+class AutoreloadSetting(Setting):
+    """
+    Specifies how functions decorated with ``@autoreload`` detect changes
+    in the files they load:
+
+    ``true``
+        Check the files on every call (or once per ``autoreload_interval``).
+    ``false``
+        Never check the files; the loaded data is cached for the lifetime
+        of the application.  Recommended for production deployments.
+    ``inotify``
+        Check the files only after the operating system reports a change
+        in any of their directories.  Available on Linux only; elsewhere,
+        it is the same as ``true``.
+    """
+
+    name = 'autoreload'
+    default = True
+
+    def validate(self, value):
+        if value != 'inotify':
+            value = BoolVal()(value)
+        return value
+
+
+class AutoreloadIntervalSetting(Setting):
+    """
+    When ``autoreload`` is ``true``, check the files loaded by
+    ``@autoreload`` functions at most once per the given number of seconds.
+    """
+
+    name = 'autoreload_interval'
+    default = None
+    validate = MaybeVal(FloatVal())
+
+
 class SettingCollection:
     """
     Application configuration.
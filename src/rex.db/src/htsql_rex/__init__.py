@@ -25,7 +25,8 @@ from htsql.core.syn.syntax import (Syntax, IntegerSyntax, IdentifierSyntax,
 from htsql.core.syn.parse import parse
 from htsql.core.cmd.act import Act, ProduceAction, produce, analyze, act
 from htsql.core.cmd.command import Command
-from htsql.core.cmd.summon import Summon, SummonJSON, recognize
+from htsql.core.cmd.summon import (Summon, SummonJSON, SummonCompactJSON,
+        recognize)
 from htsql.core.tr.lookup import (Lookup, Probe, ReferenceProbe,
         ReferenceSetProbe, ExpansionProbe, lookup, identify, localize,
         prescribe)
@@ -35,12 +36,13 @@ from htsql.core.tr.binding import (Recipe, LiteralRecipe, ChainRecipe, Binding,
 from htsql.core.tr.bind import (BindByFreeTable, BindByAttachedTable,
         BindByRecipe)
 from htsql.core.tr.decorate import decorate_void
+from htsql.core.tr.translate import QueryScope
 from htsql.core.tr.signature import Signature, Slot, IsInSig
 from htsql.core.tr.fn.bind import BindFunction, BindAmong
-from htsql.core.fmt.accept import AcceptJSON
-from htsql.core.fmt.format import JSONFormat
-from htsql.core.fmt.json import (EmitJSON, to_json, DomainToRaw, JS_MAP,
-        JS_SEQ, JS_END)
+from htsql.core.fmt.accept import AcceptJSON, AcceptCompactJSON
+from htsql.core.fmt.format import JSONFormat, CompactJSONFormat
+from htsql.core.fmt.json import (EmitJSON, EmitCompactJSON, to_json,
+        to_compact_json, DomainToRaw, JS_MAP, JS_SEQ, JS_END)
 from htsql.tweak.gateway.command import SummonGateway, ActGateway
 import re
 
@@ -76,9 +78,11 @@ class LazyConnection:
                 if self.session is not None:
                     session = self.session()
                     if session:
+                        # Unlike `SELECT set_config()`, `SET` permits
+                        # the transaction to import a snapshot later.
                         cursor = self.connection.cursor()
                         cursor.execute("""
-                            SELECT set_config('rex.session', %s, TRUE);
+                            SET LOCAL rex.session TO %s;
                         """, (session,))
                 if context.app.rex.timeout:
                     cursor = self.connection.cursor()
@@ -280,6 +284,33 @@ class RexEmitJSON(EmitJSON):
                 yield token
 
 
+class CompactJSONWithNullFormat(CompactJSONFormat):
+
+    def __init__(self):
+        super(CompactJSONWithNullFormat, self).__init__(with_null=True)
+
+
+class RexSummonCompactJSON(SummonCompactJSON):
+
+    format = CompactJSONWithNullFormat
+
+
+class RexAcceptCompactJSON(AcceptCompactJSON):
+
+    format = CompactJSONWithNullFormat
+
+
+class RexEmitCompactJSON(EmitCompactJSON):
+
+    def __call__(self):
+        if self.meta.tag or not isinstance(self.meta.domain, RecordDomain):
+            return super(RexEmitCompactJSON, self).__call__()
+        else:
+            product_to_json = to_compact_json(self.meta.domain,
+                                              self.format.with_null)
+            return [product_to_json(self.data), "\n"]
+
+
 class EnumDomainToRaw(DomainToRaw):
 
     adapt(EnumDomain)
@@ -432,6 +463,19 @@ class CloakChain(Lookup):
         return recipes
 
 
+class RexQueryScope(QueryScope):
+
+    def __call__(self):
+        # Binding depends on the session user and the active masks.
+        session = (context.env.session()
+                   if context.env.session is not None else None)
+        masks = ()
+        if context.env.masks is not None:
+            masks = tuple((tuple(mask.path), mask.node, mask.syntax)
+                          for mask in context.env.masks())
+        return (session, masks)
+
+
 def cloak(binding):
     if context.env.masks is None:
         return []
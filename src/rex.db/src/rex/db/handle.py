@@ -9,16 +9,22 @@ This package provides database access to RexDB applications.
 
 
 from rex.core import (
-        get_packages, Initialize, Error, StrVal, MaybeVal, MapVal, RecordVal)
+        get_packages, get_settings, Initialize, Error, StrVal, MaybeVal, MapVal,
+        RecordVal)
 from rex.web import HandleFile, HandleLocation, authorize, confine, get_jinja
 from .database import get_db
 from webob import Response
 from webob.exc import HTTPUnauthorized, HTTPNotFound, HTTPMovedPermanently
 from htsql.core.error import HTTPError
-from htsql.core.cmd.act import produce
+from htsql.core.context import context
+from htsql.core.application import Environment
+from htsql.core.connect import transaction
+from htsql.core.cmd.act import produce, act, ProduceAction
+from htsql.core.cmd.embed import embed
 from htsql.core.fmt.accept import accept
 from htsql.core.fmt.emit import emit, emit_headers
 import re
+import sys
 import urllib.request, urllib.parse, urllib.error
 
 
@@ -177,14 +183,25 @@ class Query:
         except Error as error:
             return req.get_response(error)
         # Execute the query and render the output.
+        batch = get_settings().query_stream_batch
         with self.get_db():
             try:
-                product = produce(self.query, parameters)
+                if batch is None:
+                    product = produce(self.query, parameters)
+                else:
+                    # Postpone fetching the rows till the output is
+                    # rendered.
+                    action = ProduceAction(embed(parameters), batch=batch)
+                    with context.env(streaming=True):
+                        product = act(self.query, action)
                 format = accept(req.environ)
                 headerlist = emit_headers(format, product)
-                # Pull whole output to avoid random "HTSQL application is not
-                # activated" errors.  FIXME: how?
-                app_iter = list(emit(format, product))
+                if batch is None:
+                    # Pull whole output to avoid random "HTSQL application
+                    # is not activated" errors.
+                    app_iter = list(emit(format, product))
+                else:
+                    app_iter = StreamOutput(format, product)
             except HTTPError as error:
                 return req.get_response(error)
             resp = Response(headerlist=headerlist, app_iter=app_iter)
@@ -240,6 +257,65 @@ class Query:
         return parameters
 
 
+class StreamOutput:
+    """
+    Renders the query output lazily.
+
+    The HTSQL context is reactivated every time the next chunk of
+    the output is requested, and a transaction is kept open until
+    the output is exhausted or closed.
+    """
+
+    def __init__(self, format, product):
+        self.format = format
+        self.product = product
+        self.app = context.app
+        # The request context is gone by the time the output is rendered,
+        # so take a copy of the environment.
+        variables = dict((name, getattr(context.env, name))
+                         for name in self.app.variables)
+        variables.update(connection=None, streaming=True)
+        self.env = Environment(**variables)
+        self.lines = None
+        self.guard = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        context.push(self.app, self.env)
+        try:
+            if self.lines is None:
+                self.guard = transaction()
+                self.guard.__enter__()
+                self.lines = emit(self.format, self.product)
+            return next(self.lines)
+        except StopIteration:
+            self._finish(None, None, None)
+            raise
+        except:
+            self._finish(*sys.exc_info())
+            raise
+        finally:
+            context.pop(self.app)
+
+    def close(self):
+        if self.guard is not None:
+            context.push(self.app, self.env)
+            try:
+                self._finish(None, None, None)
+            finally:
+                context.pop(self.app)
+
+    def _finish(self, exc_type, exc_value, exc_traceback):
+        # Ends the transaction.
+        guard = self.guard
+        self.guard = None
+        self.lines = iter(())
+        if guard is not None:
+            guard.__exit__(exc_type, exc_value, exc_traceback)
+
+
 class InitializeDB(Initialize):
     # On startup, checks if the connection parameters are valid.
 
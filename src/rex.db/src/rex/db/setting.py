@@ -4,8 +4,8 @@
 
 
 from rex.core import (
-        Setting, Error, Validate, BoolVal, UIntVal, StrVal, MaybeVal, MapVal,
-        UnionVal, OnScalar, OnField)
+        Setting, Error, Validate, BoolVal, UIntVal, PIntVal, StrVal, MaybeVal,
+        MapVal, UnionVal, OnScalar, OnField)
 from htsql.core.util import DB
 
 
@@ -229,6 +229,28 @@ class QueryTimeoutSetting(Setting):
     default = None
 
 
+class QueryStreamBatchSetting(Setting):
+    """
+    Streams the output of ``.htsql`` queries in batches of the given size.
+
+    When this parameter is set, the output of an ``.htsql`` query is
+    rendered while rows are fetched from the database, so that memory
+    usage does not depend on the size of the output.  On PostgreSQL,
+    rows are fetched with a server-side cursor.
+
+    Example::
+
+        query_stream_batch: 1000
+
+    By default, this parameter is unset and the whole output is
+    rendered before the response is sent.
+    """
+
+    name = 'query_stream_batch'
+    validate = MaybeVal(PIntVal())
+    default = None
+
+
 class ReadOnlySetting(Setting):
     """
     Sets the application database in read-only mode.
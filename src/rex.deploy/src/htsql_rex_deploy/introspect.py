@@ -5,6 +5,7 @@
 
 from htsql.core.context import context
 from htsql.core.cache import once
+from htsql.core.introspect import reintrospect as htsql_reintrospect
 from htsql.core.entity import make_catalog
 from htsql.core.connect import connect
 from htsql.core.domain import (BooleanDomain, IntegerDomain, FloatDomain,
@@ -36,6 +37,19 @@ def get_image():
     return schema.driver.get_catalog()
 
 
+def reintrospect(driver=None):
+    # Rebuilds the catalog after the database schema has changed.  This is
+    # a full rebuild: the HTSQL catalog and everything derived from it are
+    # discarded and generated again.  If `driver` is given, the catalog
+    # image it maintained while deploying the changes is used, so the
+    # rebuild makes no catalog queries.
+    values = {}
+    if driver is not None:
+        from rex.deploy import ModelSchema
+        values[get_model] = ModelSchema(driver)
+    return htsql_reintrospect(values)
+
+
 class IntrospectDeploy(IntrospectPGSQL):
     # Generates HTSQL catalog from rex.deploy catalog.
 
@@ -9,7 +9,8 @@ This package provides database schema management.
 
 
 from .alias import AliasFact
-from .cluster import Cluster, get_cluster, deploy
+from .cluster import (Cluster, get_cluster, get_catalog_cache, deploy,
+        DeployCatalogCacheSetting)
 from .column import ColumnFact
 from .ctl import CreateDBTask, DropDBTask, DumpDBTask, LoadDBTask, DeployTask
 from .data import DataFact, SKIP
@@ -26,9 +27,10 @@ from .image import (make_catalog, Image, IndexedImage, NamedImage, ImageList,
 from .meta import Meta, TableMeta, ColumnMeta, PrimaryKeyMeta, uncomment
 from .model import (model, ModelSchema, Model, TableModel, ColumnModel,
         LinkModel, IdentityModel, ConstraintModel)
-from .introspect import introspect
+from .introspect import introspect, fingerprint, CatalogCache
 from .link import LinkFact
 from .raw import RawFact
+from .schedule import Schedule, flatten
 from .sql import (mangle, sql_name, sql_qname, sql_value, sql_jinja,
         sql_render, sql_template)
 from .table import TableFact
@@ -3,8 +3,10 @@
 #
 
 
-from rex.core import get_packages, get_settings, Error, cached
+from rex.core import (get_packages, get_settings, Error, cached, Setting,
+        MaybeVal, StrVal)
 from .fact import Driver
+from .introspect import CatalogCache
 from .sql import (sql_select_database, sql_create_database, sql_drop_database,
         sql_rename_database)
 import htsql.core.util
@@ -24,10 +26,14 @@ class Cluster:
         HTSQL connection URI.  Server parameters are used to connect
         to the cluster.  The database name is used as the default
         name for database operations.
+    `catalog_cache`
+        If set, a :class:`CatalogCache` instance shared by the drivers
+        created for the cluster.
     """
 
-    def __init__(self, db):
+    def __init__(self, db, catalog_cache=None):
         self.db = htsql.core.util.DB.parse(db)
+        self.catalog_cache = catalog_cache
 
     def __repr__(self):
         return "%s(%r)" % (self.__class__.__name__, str(self.db))
@@ -103,7 +109,8 @@ class Cluster:
         Creates a :class:`rex.deploy.Driver` instance for the database.
         """
         connection = self.connect(name)
-        return Driver(connection, logging=logging)
+        return Driver(connection, logging=logging,
+                      catalog_cache=self.catalog_cache)
 
     def _master(self, sql):
         # Executes `sql` against the master database; returns the output.
@@ -120,6 +127,27 @@ class Cluster:
         return result
 
 
+class DeployCatalogCacheSetting(Setting):
+    """
+    Directory where introspected database catalogs are saved.
+
+    When the database schema has not changed since the last deployment,
+    the catalog is restored from this directory instead of being
+    introspected again.
+
+    Example::
+
+        deploy_catalog_cache: /var/cache/rex.deploy
+
+    By default, this parameter is unset and catalogs are only cached
+    in memory.
+    """
+
+    name = 'deploy_catalog_cache'
+    validate = MaybeVal(StrVal())
+    default = None
+
+
 @cached
 def get_cluster():
     """
@@ -132,10 +160,18 @@ def get_cluster():
         db = db.get('htsql', {}).get('db')
     if db is None or db.engine != 'pgsql':
         raise Error("Expected a PostgreSQL database; got:", db)
-    return Cluster(db)
+    return Cluster(db, catalog_cache=get_catalog_cache())
 
 
-def deploy(logging=False, dry_run=False, analyze=False):
+@cached
+def get_catalog_cache():
+    """
+    Gets the cache of database catalogs shared by the application.
+    """
+    return CatalogCache(get_settings().deploy_catalog_cache)
+
+
+def deploy(logging=False, dry_run=False, analyze=False, jobs=None):
     """
     Deploys and validates the application schema from ``deploy.yaml``
     files.
@@ -146,11 +182,20 @@ def deploy(logging=False, dry_run=False, analyze=False):
         If set, the changes are rolled back at the end of the deployment.
     `analyze`
         If set, update database statistics at the end of the deployment.
+    `jobs`
+        If set, the number of connections used to load table data
+        concurrently.  Data facts that no subsequent fact depends upon
+        are postponed until the schema is deployed and committed; then
+        they are loaded concurrently, each in its own transaction.  Note
+        that in this mode, a failed deployment may leave the database
+        partially populated.  In dry run mode, the deployment plan is
+        reported, but the facts are deployed in a single transaction.
     """
     time_start = datetime.datetime.now()
     # Prepare the driver.
     cluster = get_cluster()
     driver = cluster.drive(logging=logging)
+    workers = []
     try:
         packages = [package for package in reversed(get_packages())
                             if package.exists('deploy.yaml')]
@@ -167,10 +212,26 @@ def deploy(logging=False, dry_run=False, analyze=False):
             facts_by_package[package] = package_facts
         driver.chdir(None)
         # Deploying database schema.
-        for package in packages:
-            driver.log_progress("Deploying {}.", package.name)
-            facts = facts_by_package[package]
-            driver(facts)
+        if jobs is None:
+            for package in packages:
+                driver.log_progress("Deploying {}.", package.name)
+                facts = facts_by_package[package]
+                driver(facts)
+        else:
+            from .schedule import Schedule
+            schedule = Schedule.plan(
+                    driver,
+                    [(package, facts_by_package[package])
+                     for package in packages])
+            if dry_run:
+                driver.log_progress("Deployment plan:")
+                for line in schedule:
+                    driver.log_progress("  {}", line)
+                schedule(driver)
+            else:
+                for number in range(jobs):
+                    workers.append(cluster.drive(logging=logging))
+                schedule(driver, workers)
         # Validating directives.
         driver.reset()
         driver.lock()
@@ -192,6 +253,8 @@ def deploy(logging=False, dry_run=False, analyze=False):
     finally:
         time_end = datetime.datetime.now()
         driver.log_timing("Total time: {}", time_end-time_start)
+        for worker in workers:
+            worker.close()
         driver.close()
 
 
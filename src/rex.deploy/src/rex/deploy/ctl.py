@@ -3,7 +3,7 @@
 #
 
 
-from rex.core import get_settings, Error
+from rex.core import get_settings, Error, IntVal
 from rex.ctl import RexTask, argument, option, env, log, fail, warn, debug, exe
 from .cluster import get_cluster, deploy
 
@@ -147,6 +147,10 @@ class DeployTask(RexTask):
 
     Use option ``--analyze`` to update database statistics.
 
+    Use option ``--jobs`` to load table data using the given number
+    of concurrent connections.  With ``--dry-run``, the deployment
+    plan is displayed.
+
     Toggle ``--debug`` to dump SQL statements submitted to
     the database server.
     """
@@ -157,6 +161,9 @@ class DeployTask(RexTask):
         dry_run = option(hint="immediately rollback the changes")
         quiet = option('q', hint="suppress logging")
         analyze = option(hint="update database statistics")
+        jobs = option('j', IntVal(min_bound=1), default=None,
+                      value_name="N",
+                      hint="load table data using N connections")
 
     def __call__(self):
         with self.make(initialize=False):
@@ -174,7 +181,7 @@ class DeployTask(RexTask):
                 else:
                     debug(msg, *args, **kwds)
             deploy(logging=logging, dry_run=self.dry_run,
-                   analyze=self.analyze)
+                   analyze=self.analyze, jobs=self.jobs)
             if not self.quiet:
                 log("Done.")
 
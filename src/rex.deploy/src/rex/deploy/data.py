@@ -155,8 +155,23 @@ class DataFact(Fact):
                        for idx, field in enumerate(fields))
         key_mask = [column_image.position
                     for column_image in image.primary_key]
+        # Positions of identity fields and links to the same table;
+        # they tell if a row depends on pending changes.
+        identity_mask = [fields.index(field)
+                         for field in table.identity().fields]
+        self_link_mask = [idx for idx, field in enumerate(fields)
+                          if field.is_link and field.target_table is table]
+
+        # Collects similar changes to apply them together.
+        batch = DataBatch(self, image, fields)
 
         for record_idx, record in enumerate(records):
+            # Apply pending changes if the row refers to them.
+            identity = tuple([record[idx] for idx in identity_mask])
+            if identity in batch or \
+                    any(record[idx] in batch for idx in self_link_mask):
+                batch.flush()
+            change = None
             try:
                 # Convert field values to raw column values.
                 row = []
@@ -203,7 +218,7 @@ class DataFact(Fact):
                         if not columns:
                             continue
                         # Update an existing row.
-                        image.data.update(old_row, columns, values)
+                        change = (DataBatch.UPDATE, columns, old_row, values)
                     else:
                         # Add a new row.
                         columns = []
@@ -213,28 +228,24 @@ class DataFact(Fact):
                                 continue
                             columns.append(column)
                             values.append(data)
-                        image.data.insert(columns, values)
+                        change = (DataBatch.INSERT, columns, None, values)
                 else:
                     if old_row is not None:
                         # Remove the row.
-                        image.data.delete(old_row)
+                        change = (DataBatch.DELETE, [], old_row, None)
                         # Data might be invalid.
                         is_invalid = True
             except Error as error:
+                # Preceding rows are applied before the error is reported.
+                batch.flush()
                 # Add the row being processed to the error trace.
-                items = []
-                for field, data in zip(fields, record):
-                    if data is SKIP:
-                        continue
-                    if data is None:
-                        item = 'null'
-                    else:
-                        dumper = self._domain(field).dump
-                        item = htsql.core.util.to_literal(dumper(data))
-                    items.append(item)
-                error.wrap("While processing row #%s:" % (record_idx+1),
-                           "{%s}" % ", ".join(items))
+                self._wrap(error, fields, record_idx, record)
                 raise
+            if change is not None:
+                kind, columns, old_row, values = change
+                batch.add(kind, columns, old_row, values,
+                          identity, record_idx, record)
+        batch.flush()
 
         # Invalidate cached data.
         if is_invalid:
@@ -242,6 +253,21 @@ class DataFact(Fact):
                 if dependent.is_link and dependent.target_table is table:
                     self._invalidate(dependent.table)
 
+    def _wrap(self, error, fields, record_idx, record):
+        # Adds a row to the error trace.
+        items = []
+        for field, data in zip(fields, record):
+            if data is SKIP:
+                continue
+            if data is None:
+                item = 'null'
+            else:
+                dumper = self._domain(field).dump
+                item = htsql.core.util.to_literal(dumper(data))
+            items.append(item)
+        error.wrap("While processing row #%s:" % (record_idx+1),
+                   "{%s}" % ", ".join(items))
+
     def _load(self, table):
         # Loads input data and produces a list of tuples.
 
@@ -543,3 +569,76 @@ class DataFact(Fact):
                     cls._invalidate(dependent.table)
 
 
+class DataBatch:
+    """
+    Collects consecutive changes of the same kind to a table.
+
+    Small batches are applied record by record.  A batch of at least
+    :attr:`threshold` changes is copied to a temporary table and applied
+    with a single set-based statement.
+    """
+
+    INSERT = 'insert'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+    #: Minimal number of changes applied with set-based SQL.
+    threshold = 100
+
+    def __init__(self, fact, image, fields):
+        self.fact = fact
+        self.image = image
+        self.fields = fields
+        self.kind = None
+        self.columns = None
+        self.changes = []
+        self.identities = set()
+
+    def __contains__(self, identity):
+        return (identity in self.identities)
+
+    def add(self, kind, columns, old_row, values, identity, record_idx,
+            record):
+        # Adds a change; applies pending changes of a different kind.
+        if kind != self.kind or columns != self.columns:
+            self.flush()
+            self.kind = kind
+            self.columns = columns
+        self.changes.append((old_row, values, record_idx, record))
+        self.identities.add(identity)
+
+    def flush(self):
+        # Applies pending changes.
+        if not self.changes:
+            return
+        kind = self.kind
+        columns = self.columns
+        changes = self.changes
+        self.kind = None
+        self.columns = None
+        self.changes = []
+        self.identities = set()
+        data = self.image.data
+        if len(changes) < self.threshold:
+            for old_row, values, record_idx, record in changes:
+                try:
+                    if kind == self.INSERT:
+                        data.insert(columns, values)
+                    elif kind == self.UPDATE:
+                        data.update(old_row, columns, values)
+                    elif kind == self.DELETE:
+                        data.delete(old_row)
+                except Error as error:
+                    self.fact._wrap(error, self.fields, record_idx, record)
+                    raise
+            return
+        old_rows = [old_row for old_row, values, record_idx, record in changes]
+        rows = [values for old_row, values, record_idx, record in changes]
+        with guard("While processing rows:",
+                   "#%s to #%s" % (changes[0][2]+1, changes[-1][2]+1)):
+            if kind == self.INSERT:
+                data.bulk_insert(columns, rows)
+            elif kind == self.UPDATE:
+                data.bulk_update(old_rows, columns, rows)
+            elif kind == self.DELETE:
+                data.bulk_delete(old_rows)
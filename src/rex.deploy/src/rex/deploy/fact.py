@@ -8,11 +8,13 @@ from rex.core import (LatentRex, get_rex, Extension, Validate, UStrVal,
         locate, set_location)
 from rex.db import SyntaxVal, RexHTSQL
 from .introspect import introspect
+from .sql import sql_copy_value
 from htsql.core.util import DB
 from htsql.core.syn.syntax import (
         Syntax, AssignSyntax, ComposeSyntax, ReferenceSyntax, IdentifierSyntax,
         FunctionSyntax)
 import sys
+import io
 import inspect
 import decimal
 import collections
@@ -258,6 +260,9 @@ class Driver:
         Here, ``level`` is the logging level, ``msg`` is a format
         string, ``args`` and ``kwds`` are parameters for the format
         string.
+    `catalog_cache`
+        If set, a :class:`rex.deploy.CatalogCache` instance used to skip
+        introspection of an unchanged database.
     """
 
     validate = MaybeVal(OneOrSeqVal(FactVal()))
@@ -269,9 +274,10 @@ class Driver:
     #: Logging level for SQL execution.
     LOG_SQL = 'sql'
 
-    def __init__(self, connection, logging=False):
+    def __init__(self, connection, logging=False, catalog_cache=None):
         self.connection = connection
         self.logging = logging
+        self.catalog_cache = catalog_cache
         self.catalog = None
         #: Current working directory.  Use to resolve relative paths
         #: when parsing YAML records.
@@ -382,7 +388,8 @@ class Driver:
             was_locked = self.is_locked
             self.logging = False
             self.is_locked = False
-            self.catalog = introspect(weakref.proxy(self))
+            self.catalog = introspect(
+                    weakref.proxy(self), cache=self.catalog_cache)
             self.logging = logging
             self.is_locked = was_locked
         return self.catalog
@@ -425,6 +432,30 @@ class Driver:
         finally:
             cursor.close()
 
+    def copy(self, sql, rows):
+        """
+        Executes a ``COPY ... FROM STDIN`` statement with the given rows
+        as input.
+        """
+        if self.is_locked:
+            raise Error("Detected inconsistent data model:", sql)
+        self._htsql = None
+        stream = io.StringIO()
+        for row in rows:
+            stream.write("\t".join(sql_copy_value(value) for value in row))
+            stream.write("\n")
+        stream.seek(0)
+        cursor = self.connection.cursor()
+        try:
+            self.log_sql("{}", sql)
+            cursor.copy_expert(sql, stream)
+        except psycopg2.Error as exc:
+            error = Error("Got an error from the database driver:", exc)
+            error.wrap("While executing SQL:", sql)
+            raise error
+        finally:
+            cursor.close()
+
     def execute(self, sql):
         """
         Executes a SQL query.
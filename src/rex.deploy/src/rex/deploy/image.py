@@ -17,7 +17,9 @@ from .sql import (sql_create_schema, sql_drop_schema, sql_rename_schema,
         sql_rename_sequence, sql_nextval, sql_create_function,
         sql_drop_function, sql_rename_function, sql_create_trigger,
         sql_drop_trigger, sql_rename_trigger, sql_comment_on_trigger,
-        sql_select, sql_insert, sql_update, sql_delete)
+        sql_select, sql_insert, sql_update, sql_delete,
+        sql_create_temporary_table_as, sql_copy_from_stdin, sql_insert_select,
+        sql_update_from, sql_delete_all)
 import htsql.core.util
 import collections
 import weakref
@@ -1488,6 +1490,65 @@ class DataImage(Image):
         self.remove_row(old_row)
 
 
+    def bulk_insert(self, columns, rows):
+        """Inserts a batch of records into the table."""
+        names = [column.name for column in columns]
+        returning_names = [column.name for column in self.table]
+        source_qname = self._load(names, rows)
+        sql = sql_insert_select(
+                self.table.qname, names, source_qname, returning_names)
+        self.cursor.execute(sql)
+        output = self.cursor.fetchall()
+        self.cursor.execute(sql_drop_table(source_qname))
+        assert len(output) == len(rows)
+        for new_row in output:
+            self.append_row(new_row)
+
+    def bulk_update(self, old_rows, columns, rows):
+        """Updates a batch of table records."""
+        key_column = self.table.columns.first()
+        assert len(key_column.unique_keys) > 0
+        names = [column.name for column in columns]
+        returning_names = [column.name for column in self.table]
+        old_row_by_key = {}
+        key_rows = []
+        for old_row, row in zip(old_rows, rows):
+            key_value = old_row[0]
+            assert key_value is not None and key_value not in old_row_by_key
+            old_row_by_key[key_value] = old_row
+            key_rows.append((key_value,)+tuple(row))
+        source_qname = self._load([key_column.name]+names, key_rows)
+        sql = sql_update_from(
+                self.table.qname, key_column.name, names, source_qname,
+                returning_names)
+        self.cursor.execute(sql)
+        output = self.cursor.fetchall()
+        self.cursor.execute(sql_drop_table(source_qname))
+        assert len(output) == len(rows)
+        for new_row in output:
+            self.replace_row(old_row_by_key[new_row[0]], new_row)
+
+    def bulk_delete(self, old_rows):
+        """Deletes a batch of table records."""
+        key_column = self.table.columns.first()
+        assert len(key_column.unique_keys) > 0
+        key_values = [old_row[0] for old_row in old_rows]
+        assert None not in key_values
+        sql = sql_delete_all(self.table.qname, key_column.name, key_values)
+        self.cursor.execute(sql)
+        for old_row in old_rows:
+            self.remove_row(old_row)
+
+    def _load(self, names, rows):
+        # Copies rows to a temporary table with the given table columns.
+        # The name cannot clash with a table label.
+        qname = ("pg_temp", "%s:data" % self.table.name)
+        sql = sql_create_temporary_table_as(qname, self.table.qname, names)
+        self.cursor.execute(sql)
+        self.cursor.copy(sql_copy_from_stdin(qname, names), rows)
+        return qname
+
+
 def make_catalog(cursor):
     """Creates an empty catalog image."""
     return CatalogImage(cursor)
@@ -5,6 +5,11 @@
 
 from .image import (make_catalog, NO_ACTION, RESTRICT, CASCADE, SET_NULL,
         SET_DEFAULT)
+import os
+import pickle
+import tempfile
+import threading
+import collections
 
 
 conftype_to_action = {
@@ -16,52 +21,193 @@ conftype_to_action = {
 }
 
 
-def introspect(cursor):
+# System catalogs read by `introspect()`.
+fingerprint_catalogs = [
+        'pg_namespace', 'pg_extension', 'pg_enum', 'pg_type', 'pg_proc',
+        'pg_class', 'pg_attribute', 'pg_attrdef', 'pg_depend', 'pg_index',
+        'pg_constraint', 'pg_trigger', 'pg_description',
+]
+
+
+def fingerprint(cursor):
+    """
+    Returns a digest that changes whenever the database schema changes.
+
+    The digest is computed from the versions (``xmin`` and ``cmin``) of
+    the rows in the system catalogs, which is much cheaper than reading
+    the catalogs.
+    """
+    versions = []
+    for name in fingerprint_catalogs:
+        versions.append("""
+            (SELECT COUNT(*) || '/' || COALESCE(STRING_AGG(v, ',' ORDER BY v), '')
+             FROM (SELECT xmin::text || ':' || cmin::text AS v
+                   FROM pg_catalog.%s) AS r)""" % name)
+    cursor.execute("""
+        SELECT MD5(CONCAT_WS(';', CURRENT_USER, %s))
+    """ % ",".join(versions))
+    return cursor.fetchone()[0]
+
+
+class CatalogCache:
+    """
+    Keeps the output of catalog queries keyed by the schema fingerprint.
+
+    `path`
+        If set, a directory where the cached output is also saved, so that
+        it could be reused by other processes.
+    `size`
+        The number of entries kept in memory.
+    """
+
+    def __init__(self, path=None, size=16):
+        self.path = path
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.path)
+
+    def get(self, key):
+        """Returns the cached output or ``None``."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        if self.path is None:
+            return None
+        try:
+            with open(os.path.join(self.path, key+'.pickle'), 'rb') as stream:
+                output = pickle.load(stream)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        self.remember(key, output)
+        return output
+
+    def set(self, key, output):
+        """Adds the output to the cache."""
+        self.remember(key, output)
+        if self.path is None:
+            return
+        # Write to a temporary file first so that concurrent readers
+        # never see a partially written entry.
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(handle, 'wb') as stream:
+                pickle.dump(output, stream, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, os.path.join(self.path, key+'.pickle'))
+        except OSError:
+            pass
+
+    def remember(self, key, output):
+        # Adds the output to the in-memory cache.
+        with self.lock:
+            self.entries[key] = output
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class CatalogRecord:
+    # Executes catalog queries and records their output.
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.output = []
+
+    def execute(self, sql):
+        self.cursor.execute(sql)
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.output.append(rows)
+        return rows
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        self.output.append(row)
+        return row
+
+
+class CatalogReplay:
+    # Replays the recorded output of catalog queries.
+
+    def __init__(self, output):
+        self.output = iter(output)
+
+    def execute(self, sql):
+        pass
+
+    def fetchall(self):
+        return next(self.output)
+
+    def fetchone(self):
+        return next(self.output)
+
+
+def introspect(cursor, cache=None):
     """
     Returns a catalog image that reflects the structure of the database.
+
+    `cache`
+        If set, a :class:`CatalogCache` instance.  When the database
+        schema has not changed since it was last introspected, the image
+        is restored from the cache without querying the catalog.
     """
+    key = None
+    output = None
+    if cache is not None:
+        key = fingerprint(cursor)
+        output = cache.get(key)
+    if output is not None:
+        source = CatalogReplay(output)
+    else:
+        source = CatalogRecord(cursor)
+
     catalog = make_catalog(cursor)
 
     # Extract schemas.
-    cursor.execute("""
+    source.execute("""
         SELECT n.oid, n.nspname
         FROM pg_catalog.pg_namespace n
         ORDER BY n.nspname
     """)
     schema_by_oid = {}
-    for oid, nspname in cursor.fetchall():
+    for oid, nspname in source.fetchall():
         schema = catalog.add_schema(nspname)
         schema_by_oid[oid] = schema
 
     # Extract extensions.
-    cursor.execute("""
+    source.execute("""
         SELECT e.extname
         FROM pg_catalog.pg_extension e
         ORDER BY e.extname
     """)
-    for (extname,) in cursor.fetchall():
+    for (extname,) in source.fetchall():
         catalog.add_extension(extname)
 
     # Extract ENUM labels.
     labels_by_oid = {}
-    cursor.execute("""
+    source.execute("""
         SELECT e.enumtypid, e.enumlabel
         FROM pg_catalog.pg_enum e
         ORDER BY e.enumtypid, e.enumsortorder, e.oid
     """)
-    for enumtypid, enumlabel in cursor.fetchall():
+    for enumtypid, enumlabel in source.fetchall():
         labels_by_oid.setdefault(enumtypid, []).append(enumlabel)
 
     # Extract data types.
     type_by_oid = {}
-    cursor.execute("""
+    source.execute("""
         SELECT t.oid, t.typnamespace, t.typname, t.typtype,
                t.typbasetype, t.typlen, t.typtypmod, t.typdefault
         FROM pg_catalog.pg_type t
         ORDER BY t.typnamespace, t.typname
     """)
     for (oid, typnamespace, typname, typtype,
-         typbasetype, typlen, typtypmod, typdefault) in cursor.fetchall():
+         typbasetype, typlen, typtypmod, typdefault) in source.fetchall():
         schema = schema_by_oid[typnamespace]
         if typtype == 'e':
             labels = labels_by_oid[oid]
@@ -72,14 +218,14 @@ def introspect(cursor):
 
     # Extract stored procedures.
     procedure_by_oid = {}
-    cursor.execute("""
+    source.execute("""
         SELECT p.oid, p.pronamespace, p.proname,
                p.proargtypes, p.prorettype, p.prosrc
         FROM pg_catalog.pg_proc p
         ORDER BY p.pronamespace, p.proname
     """)
     for (oid, pronamespace, proname,
-         proargtypes, prorettype, prosrc) in cursor.fetchall():
+         proargtypes, prorettype, prosrc) in source.fetchall():
         schema = schema_by_oid[pronamespace]
         types = tuple([type_by_oid[int(proargtype)]
                        for proargtype in proargtypes.split()])
@@ -90,14 +236,14 @@ def introspect(cursor):
     # Extract tables.
     class_by_oid = {}
     table_by_oid = {}
-    cursor.execute("""
+    source.execute("""
         SELECT c.oid, c.relnamespace, c.relname, c.relpersistence
         FROM pg_catalog.pg_class c
         WHERE c.relkind IN ('r', 'v') AND
               HAS_TABLE_PRIVILEGE(c.oid, 'SELECT')
         ORDER BY c.relnamespace, c.relname
     """)
-    for oid, relnamespace, relname, relpersistence in cursor.fetchall():
+    for oid, relnamespace, relname, relpersistence in source.fetchall():
         schema = schema_by_oid[relnamespace]
         is_unlogged = (relpersistence == 'u')
         table = schema.add_table(relname, is_unlogged=is_unlogged)
@@ -105,14 +251,14 @@ def introspect(cursor):
 
     # Extract columns.
     column_by_num = {}
-    cursor.execute("""
+    source.execute("""
         SELECT a.attrelid, a.attnum, a.attname, a.atttypid, a.atttypmod,
                a.attnotnull, a.atthasdef, a.attisdropped
         FROM pg_catalog.pg_attribute a
         ORDER BY a.attrelid, a.attnum
     """)
     for (attrelid, attnum, attname, atttypid,
-         atttypmod, attnotnull, atthasdef, attisdropped) in cursor.fetchall():
+         atttypmod, attnotnull, atthasdef, attisdropped) in source.fetchall():
         if attisdropped:
             continue
         if attname in ['tableoid', 'cmax', 'xmax', 'cmin', 'xmin', 'ctid']:
@@ -126,29 +272,29 @@ def introspect(cursor):
         column_by_num[attrelid, attnum] = column
 
     # Extract default values.
-    cursor.execute("""
+    source.execute("""
         SELECT a.adrelid, a.adnum, pg_get_expr(a.adbin, a.adrelid)
         FROM pg_catalog.pg_attrdef a
         ORDER BY a.adrelid, a.adnum
     """)
-    for adrelid, adnum, adsrc in cursor.fetchall():
+    for adrelid, adnum, adsrc in source.fetchall():
         column = column_by_num.get((adrelid, adnum))
         if column is not None:
             column.set_default(adsrc)
 
     # Extract sequences.
-    cursor.execute("""
+    source.execute("""
         SELECT c.oid, c.relnamespace, c.relname
         FROM pg_catalog.pg_class c
         WHERE c.relkind = 'S'
         ORDER BY c.relnamespace, c.relname
     """)
-    for oid, relnamespace, relname in cursor.fetchall():
+    for oid, relnamespace, relname in source.fetchall():
         schema = schema_by_oid[relnamespace]
         class_by_oid[oid] = schema.add_sequence(relname)
 
     # Associate sequences with columns that own them.
-    cursor.execute("""
+    source.execute("""
         SELECT d.objid, d.refobjid, d.refobjsubid
         FROM pg_catalog.pg_depend d
         JOIN pg_catalog.pg_class c
@@ -158,13 +304,13 @@ def introspect(cursor):
               d.objsubid IS NOT NULL
         ORDER BY d.objid, d.refobjid, d.objsubid
     """)
-    for objid, refobjid, refobjsubid in cursor.fetchall():
+    for objid, refobjid, refobjsubid in source.fetchall():
         sequence = class_by_oid[objid]
         column = column_by_num.get((refobjid, refobjsubid))
         column.link(sequence)
 
     # Extract indexes.
-    cursor.execute("""
+    source.execute("""
         SELECT c.oid, c.relnamespace, c.relname, i.indrelid, i.indkey
         FROM pg_catalog.pg_class c
         JOIN pg_catalog.pg_index i
@@ -172,7 +318,7 @@ def introspect(cursor):
         WHERE c.relkind = 'i'
         ORDER BY c.relnamespace, c.relname
     """)
-    for oid, relnamespace, relname, indrelid, indkeys in cursor.fetchall():
+    for oid, relnamespace, relname, indrelid, indkeys in source.fetchall():
         if indrelid not in table_by_oid:
             continue
         schema = schema_by_oid[relnamespace]
@@ -183,7 +329,7 @@ def introspect(cursor):
 
     # Extract constraints.
     constraint_by_oid = {}
-    cursor.execute("""
+    source.execute("""
         SELECT c.oid, c.conname, c.contype, c.confmatchtype,
                c.conrelid, c.conkey, c.confrelid, c.confkey,
                c.confupdtype, c.confdeltype
@@ -193,7 +339,7 @@ def introspect(cursor):
     """)
     for (oid, conname, contype, confmatchtype,
             conrelid, conkey, confrelid, confkey,
-            confupdtype, confdeltype) in cursor.fetchall():
+            confupdtype, confdeltype) in source.fetchall():
         if conrelid not in table_by_oid:
             continue
         table = table_by_oid[conrelid]
@@ -226,19 +372,19 @@ def introspect(cursor):
 
     # Extract triggers.
     trigger_by_oid = {}
-    cursor.execute("""
+    source.execute("""
         SELECT t.oid, t.tgrelid, t.tgname, t.tgfoid
         FROM pg_catalog.pg_trigger AS t
         WHERE NOT t.tgisinternal
         ORDER BY t.tgrelid, t.tgname
     """)
-    for oid, tgrelid, tgname, tgfoid in cursor.fetchall():
+    for oid, tgrelid, tgname, tgfoid in source.fetchall():
         table = table_by_oid[tgrelid]
         procedure = procedure_by_oid[tgfoid]
         trigger_by_oid[oid] = table.add_trigger(tgname, procedure)
 
     # Extract comments.
-    cursor.execute("""
+    source.execute("""
         SELECT CAST('pg_catalog.pg_namespace'::regclass AS OID),
                CAST('pg_catalog.pg_type'::regclass AS OID),
                CAST('pg_catalog.pg_proc'::regclass AS OID),
@@ -247,9 +393,9 @@ def introspect(cursor):
                CAST('pg_catalog.pg_trigger'::regclass AS OID)
     """)
     (pg_namespace, pg_type, pg_proc,
-     pg_class, pg_constraint, pg_trigger) = cursor.fetchone()
+     pg_class, pg_constraint, pg_trigger) = source.fetchone()
 
-    cursor.execute("""
+    source.execute("""
         SELECT d.objoid, d.classoid, d.objsubid, d.description
         FROM pg_catalog.pg_description d
         WHERE d.classoid IN ('pg_catalog.pg_namespace'::regclass,
@@ -260,7 +406,7 @@ def introspect(cursor):
                              'pg_catalog.pg_trigger'::regclass)
         ORDER BY d.objoid, d.classoid, d.objsubid
     """)
-    for objoid, classoid, objsubid, description in cursor.fetchall():
+    for objoid, classoid, objsubid, description in source.fetchall():
         if classoid == pg_namespace:
             entity = schema_by_oid.get(objoid)
         elif classoid == pg_type:
@@ -278,6 +424,9 @@ def introspect(cursor):
         if entity is not None:
             entity.set_comment(description)
 
+    if cache is not None and output is None:
+        cache.set(key, source.output)
+
     return catalog
 
 
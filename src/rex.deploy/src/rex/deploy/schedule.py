@@ -0,0 +1,233 @@
+#
+# Copyright (c) 2013, Prometheus Research, LLC
+#
+
+
+from rex.core import set_location
+from .alias import AliasFact
+from .column import ColumnFact
+from .data import DataFact
+from .identity import IdentityFact
+from .include import IncludeFact
+from .link import LinkFact
+from .model import model, LinkModel
+from .table import TableFact
+import os.path
+import queue
+import concurrent.futures
+
+
+def flatten(driver, facts):
+    """
+    Expands nested and included facts; returns a plain list of facts.
+    """
+    flat = []
+    for fact in facts:
+        if isinstance(fact, TableFact) and fact.related:
+            table_fact = TableFact(
+                    fact.label,
+                    former_labels=fact.former_labels,
+                    is_reliable=fact.is_reliable,
+                    title=fact.title,
+                    is_present=fact.is_present)
+            set_location(table_fact, fact)
+            flat.append(table_fact)
+            flat.extend(flatten(driver, fact.related))
+        elif isinstance(fact, IncludeFact):
+            cwd = driver.cwd
+            driver.chdir(os.path.dirname(fact.path))
+            with open(fact.path) as stream:
+                included = driver.parse(stream)
+            if not isinstance(included, list):
+                included = [included]
+            flat.extend(flatten(driver, included))
+            driver.chdir(cwd)
+        else:
+            flat.append(fact)
+    return flat
+
+
+def _tables(fact):
+    # Labels of the tables affected by a schema fact; `None` if the fact
+    # could affect any table.
+    if isinstance(fact, TableFact):
+        return set([fact.label]+fact.former_labels)
+    if isinstance(fact, LinkFact) and fact.default is not None:
+        # The default value is resolved against the target table data.
+        return set([fact.table_label, fact.target_table_label])
+    if isinstance(fact, (ColumnFact, LinkFact, IdentityFact, AliasFact)):
+        return set([fact.table_label])
+    return None
+
+
+def _links(driver, facts):
+    # Maps a table label to the labels of the tables it links to,
+    # according to the existing database schema and the given facts.
+    links = {}
+    schema = model(driver)
+    for table in schema.tables():
+        for field in table.fields():
+            if isinstance(field, LinkModel):
+                links.setdefault(table.label, set()).add(
+                        field.target_table.label)
+    for fact in facts:
+        if isinstance(fact, LinkFact) and fact.is_present:
+            links.setdefault(fact.table_label, set()).add(
+                    fact.target_table_label)
+    return links
+
+
+def _neighbors(links):
+    # Maps a table label to the labels of the tables linked to it
+    # in either direction.
+    neighbors = {}
+    for label in links:
+        for target_label in links[label]:
+            neighbors.setdefault(label, set()).add(target_label)
+            neighbors.setdefault(target_label, set()).add(label)
+    return neighbors
+
+
+class Schedule:
+    """
+    Deployment plan that loads table data concurrently.
+
+    `stages`
+        List of pairs ``(package, facts)``; these facts are deployed
+        in order in a single transaction.
+    `waves`
+        List of lists of data facts to deploy after the stages are
+        committed.  Facts of the same wave are independent of each other
+        and could be deployed concurrently, each in its own transaction.
+    """
+
+    @classmethod
+    def plan(cls, driver, facts_by_package):
+        """
+        Builds a deployment plan.
+
+        `facts_by_package`
+            List of pairs ``(package, facts)``.
+        """
+        entries = []
+        for package, facts in facts_by_package:
+            cwd = driver.cwd
+            driver.chdir(package.abspath('/'))
+            for fact in flatten(driver, facts):
+                entries.append((package, fact))
+            driver.chdir(cwd)
+        links = _links(driver, [fact for package, fact in entries])
+        neighbors = _neighbors(links)
+        # A data fact could be postponed if no subsequent fact changes
+        # the structure of its table or the identity of a linked table.
+        # If a data fact cannot be postponed, neither could any preceding
+        # data facts on the same or linked tables.
+        postponed = set()
+        affected = set()
+        identified = set()
+        pinned = set()
+        is_blocked = False
+        for index in reversed(range(len(entries))):
+            package, fact = entries[index]
+            if isinstance(fact, DataFact):
+                label = fact.table_label
+                if (is_blocked or label in affected or label in pinned or
+                        links.get(label, set()) & identified):
+                    pinned.add(label)
+                    pinned.update(neighbors.get(label, set()))
+                else:
+                    postponed.add(index)
+                continue
+            tables = _tables(fact)
+            if tables is None:
+                is_blocked = True
+            else:
+                affected.update(tables)
+            if isinstance(fact, IdentityFact):
+                identified.add(fact.table_label)
+        stages = []
+        for index, (package, fact) in enumerate(entries):
+            if index in postponed:
+                continue
+            if not stages or stages[-1][0] is not package:
+                stages.append((package, []))
+            stages[-1][1].append(fact)
+        # Order postponed facts: a fact must wait for the preceding facts
+        # on the same or linked tables.
+        waves = []
+        levels = {}
+        for index in sorted(postponed):
+            fact = entries[index][1]
+            label = fact.table_label
+            level = 0
+            for other_label in neighbors.get(label, set()) | set([label]):
+                level = max(level, levels.get(other_label, 0))
+            levels[label] = level+1
+            if level == len(waves):
+                waves.append([])
+            waves[level].append(fact)
+        return cls(stages, waves)
+
+    def __init__(self, stages, waves):
+        self.stages = stages
+        self.waves = waves
+
+    def __iter__(self):
+        # Generates a human-readable description of the plan.
+        for package, facts in self.stages:
+            yield "Deploying %s: %s facts" % (package.name, len(facts))
+        for number, wave in enumerate(self.waves, 1):
+            yield "Loading wave #%s: %s" % \
+                    (number, ", ".join(self._describe(fact) for fact in wave))
+
+    @staticmethod
+    def _describe(fact):
+        if fact.data_path is not None:
+            return "%s (%s)" % (fact.table_label,
+                                os.path.basename(fact.data_path))
+        return fact.table_label
+
+    def __call__(self, driver, drivers=None):
+        """
+        Deploys the plan.
+
+        `driver`
+            The main deployment driver.
+        `drivers`
+            If set, a list of drivers to deploy the waves concurrently.
+            The changes made by the main driver are committed before the
+            waves are deployed, and each fact of a wave is committed
+            separately.  Otherwise, the waves are deployed one fact at
+            a time by the main driver.
+        """
+        for package, facts in self.stages:
+            driver.log_progress("Deploying {}.", package.name)
+            driver(facts)
+        if not self.waves:
+            return
+        if not drivers:
+            for wave in self.waves:
+                driver(wave)
+            return
+        driver.commit()
+        pool = queue.Queue()
+        for worker in drivers:
+            pool.put(worker)
+        def deploy(fact):
+            worker = pool.get()
+            try:
+                # Other workers may have changed the table data.
+                worker.reset()
+                worker(fact)
+                worker.commit()
+            except:
+                worker.rollback()
+                raise
+            finally:
+                pool.put(worker)
+        with concurrent.futures.ThreadPoolExecutor(len(drivers)) as executor:
+            for number, wave in enumerate(self.waves, 1):
+                driver.log_progress("Loading wave #{}.", number)
+                futures = [executor.submit(deploy, fact) for fact in wave]
+                for future in futures:
+                    future.result()
@@ -132,6 +132,32 @@ def sql_value(value):
                               % (value, type(value).__name__))
 
 
+def sql_copy_value(value):
+    """
+    Converts a value to an entry of ``COPY`` input in text format.
+
+    `value`
+        SQL value.  Accepted types are ``bool``, ``int``, ``float``,
+        ``decimal.Decimal``, ``datetime.date``, ``datetime.time``,
+        ``datetime.datetime``, ``str`` or ``None``.
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float, decimal.Decimal,
+                          datetime.date, datetime.time, datetime.datetime)):
+        return str(value)
+    if isinstance(value, str):
+        return (value.replace("\\", "\\\\")
+                     .replace("\t", "\\t")
+                     .replace("\n", "\\n")
+                     .replace("\r", "\\r"))
+    raise NotImplementedError("sql_copy_value() is not implemented"
+                              " for value %s of type %s"
+                              % (value, type(value).__name__))
+
+
 # Customized Jinja environment for rendering SQL.
 sql_jinja = jinja2.Environment(
         line_statement_prefix='#')
@@ -633,6 +659,58 @@ def sql_delete(table_qname, key_name, key_value):
     """
 
 
+@sql_template
+def sql_create_temporary_table_as(qname, table_qname, names):
+    """
+    CREATE TEMPORARY TABLE {{ qname|qn }} ON COMMIT DROP AS
+        SELECT {{ names|n }}
+        FROM {{ table_qname|qn }}
+        WITH NO DATA;
+    """
+
+
+@sql_template
+def sql_copy_from_stdin(qname, names):
+    """
+    COPY {{ qname|qn }} ({{ names|n }}) FROM STDIN;
+    """
+
+
+@sql_template
+def sql_insert_select(table_qname, names, source_qname, returning_names):
+    """
+    INSERT INTO {{ table_qname|qn }} ({{ names|n }})
+        SELECT {{ names|n }}
+        FROM {{ source_qname|qn }}
+        RETURNING {{ returning_names|n }};
+    """
+
+
+@sql_template
+def sql_update_from(table_qname, key_name, names, source_qname,
+                    returning_names):
+    """
+    UPDATE {{ table_qname|qn }} AS "target"
+        SET {% for name in names -%}
+                {{ name|n }} = "source".{{ name|n }}
+                {%- if not loop.last %}, {% endif %}
+            {%- endfor %}
+        FROM {{ source_qname|qn }} AS "source"
+        WHERE "target".{{ key_name|n }} = "source".{{ key_name|n }}
+        RETURNING {% for name in returning_names -%}
+                "target".{{ name|n }}{% if not loop.last %}, {% endif %}
+            {%- endfor %};
+    """
+
+
+@sql_template
+def sql_delete_all(table_qname, key_name, key_values):
+    """
+    DELETE FROM {{ table_qname|qn }}
+        WHERE {{ key_name|n }} IN ({{ key_values|v }});
+    """
+
+
 def plpgsql_primary_key_procedure(*parts):
     return "\n%s\n" % sql_render("""
     BEGIN
@@ -50,6 +50,7 @@ __all__ = (
     # Execution
     "execute",
     "execute_exn",
+    "get_cache_stats",
     "execute_q",
     "Result",
     "GraphQLError",
@@ -88,4 +89,5 @@ from .desc import (
     sort,
 )
 from .execute import execute, execute_exn, Result
+from .cache import get_cache_stats
 from .schema import schema, Schema
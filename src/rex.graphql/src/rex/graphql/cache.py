@@ -0,0 +1,143 @@
+"""
+
+    rex.graphql.cache
+    =================
+
+    Caches of parsed GraphQL documents and of translated query plans.
+
+    Both caches are kept in the cache of the HTSQL application, so they are
+    shared by all requests to the same database, bounded by the HTSQL
+    ``query_cache_size`` parameter and dropped when the database is
+    reintrospected.
+
+    :copyright: 2019-present Prometheus Research, LLC
+
+"""
+
+from htsql.core.context import context
+from htsql.core.tr.translate import LRUCache, query_scope
+
+from graphql import language
+
+from rex.db import get_db
+
+
+class OperationCache(LRUCache):
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self, size):
+        super(OperationCache, self).__init__(size)
+        self.hits = 0
+        self.misses = 0
+
+
+def get_cache(service):
+    cache = context.app.htsql.cache
+    try:
+        return cache.values[service]
+    except KeyError:
+        size = context.app.htsql.query_cache_size
+        if not size:
+            return None
+        with cache.lock(service):
+            if service not in cache.values:
+                cache.values[service] = OperationCache(size=size)
+            return cache.values[service]
+
+
+def lookup(service, key):
+    mapping = get_cache(service)
+    if mapping is None:
+        return None
+    with context.app.htsql.cache.lock(service):
+        try:
+            value = mapping[key]
+        except KeyError:
+            mapping.misses += 1
+            return None
+        mapping.hits += 1
+        return value
+
+
+def store(service, key, value):
+    mapping = get_cache(service)
+    if mapping is None:
+        return
+    with context.app.htsql.cache.lock(service):
+        mapping[key] = value
+
+
+def freeze(value):
+    """ Converts a parameter value to a hashable form."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def parse(query: str) -> language.ast.Document:
+    """ Parses a GraphQL document; reuses the result for the same text."""
+    document = lookup(parse, query)
+    if document is None:
+        document = language.parser.parse(query)
+        store(parse, query, document)
+    return document
+
+
+def get_plan_key(shape):
+    """ Makes a cache key from the shape of a bound query field.
+
+    Returns ``None`` if the plan cannot be cached.
+    """
+    scope = query_scope()
+    if scope is None:
+        return None
+    key = (shape, scope)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def get_plan(key):
+    """ Finds a cached query plan."""
+    return lookup(get_plan, key)
+
+
+def cache_plan(key, pipe):
+    """ Adds a query plan to the cache."""
+    store(get_plan, key, pipe)
+
+
+def get_cache_stats(db=None):
+    """ Returns statistics of the document and the plan caches.
+
+    For each cache, reports the number of cached entries, the cache capacity
+    and the number of hits and misses.
+
+    :param db: HTSQL instance; if not set, the application database is used
+    """
+    if db is None:
+        db = get_db()
+    with db:
+        return collect_cache_stats()
+
+
+def collect_cache_stats():
+    stats = {}
+    for name, service in [("documents", parse), ("plans", get_plan)]:
+        mapping = get_cache(service)
+        if mapping is None:
+            stats[name] = {"size": 0, "capacity": 0, "hits": 0, "misses": 0}
+            continue
+        with context.app.htsql.cache.lock(service):
+            stats[name] = {
+                "size": len(mapping),
+                "capacity": mapping.size,
+                "hits": mapping.hits,
+                "misses": mapping.misses,
+            }
+    return stats
@@ -0,0 +1,105 @@
+"""
+
+    rex.graphql.cost
+    ================
+
+    Static estimation of the cost of a GraphQL operation.
+
+    The cost approximates the number of values an operation produces: every
+    field counts once for every parent value, so nested plural fields
+    multiply the cost of their subfields.  The size of a plural field is
+    taken from its ``limit`` argument when the field is paginated.  Each
+    plural query field also adds a fixed cost since it becomes a separate
+    SQL statement, and each call of a computed field resolver costs more than
+    a value fetched from the database.
+
+    :copyright: 2019-present Prometheus Research, LLC
+
+"""
+
+from graphql import language
+
+from . import model
+
+
+#: Assumed number of items of a plural field without pagination.
+LIST_SIZE = 100
+
+#: Cost of a separate SQL statement for a plural query field.
+SEGMENT_COST = 10
+
+#: Cost of a single call of a computed field resolver.
+RESOLVER_COST = 10
+
+
+def estimate_cost(ctx, root_type, fields) -> int:
+    """ Estimates the cost of the operation.
+
+    :param ctx: Execution context
+    :param root_type: Query or mutation type
+    :param fields: Collected root fields
+    """
+    return estimate_fields(ctx, root_type, fields, 1)
+
+
+def estimate_fields(ctx, parent_type, fields, count):
+    cost = 0
+    for name, field_nodes in fields.items():
+        field_def = parent_type.fields.get(field_nodes[0].name.value)
+        if field_def is None:
+            # Introspection or unknown fields; the latter are reported
+            # during execution.
+            continue
+        cost += estimate_field(ctx, field_def, field_nodes, count)
+    return cost
+
+
+def estimate_field(ctx, field_def, field_nodes, count):
+    if isinstance(field_def, model.ComputedField):
+        calls = 1 if field_def.batch else count
+        cost = count + RESOLVER_COST * calls
+    else:
+        cost = count
+
+    if is_plural(field_def):
+        if isinstance(field_def, model.QueryField):
+            cost += SEGMENT_COST
+        count = count * get_size(ctx, field_def, field_nodes[0])
+
+    entity_type = model.find_named_type(field_def.type)
+    if isinstance(entity_type, model.ObjectType):
+        subfields = ctx.get_sub_fields(entity_type, field_nodes)
+        cost += estimate_fields(ctx, entity_type, subfields, count)
+    return cost
+
+
+def is_plural(field_def):
+    if isinstance(field_def, model.QueryField):
+        return field_def.plural
+    type = field_def.type
+    if isinstance(type, model.NonNullType):
+        type = type.type
+    return isinstance(type, model.ListType)
+
+
+def get_size(ctx, field_def, field_node):
+    # The number of items a plural field produces.
+    if not (
+        isinstance(field_def, model.QueryField)
+        and field_def.descriptor.paginate
+    ):
+        return LIST_SIZE
+    value = getattr(field_def.params.get("limit"), "default_value", None)
+    for arg_node in field_node.arguments or []:
+        if arg_node.name.value != "limit":
+            continue
+        value = None
+        if isinstance(arg_node.value, language.ast.IntValue):
+            value = int(arg_node.value.value)
+        elif isinstance(arg_node.value, language.ast.Variable):
+            variable = ctx.variable_values.get(arg_node.value.name.value)
+            if variable is not None:
+                value = variable.value
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        return LIST_SIZE
+    return value
@@ -233,12 +233,18 @@ class Compute(Field):
         name=None,
         description=None,
         deprecation_reason=None,
+        batch=False,
         loc=autoloc,
     ):
         if f is None:
-            f = lambda parent, info, params: getattr(
-                parent, info.field_name, None
-            )
+            if batch:
+                f = lambda parents, info, params: [
+                    getattr(parent, info.field_name, None) for parent in parents
+                ]
+            else:
+                f = lambda parent, info, params: getattr(
+                    parent, info.field_name, None
+                )
 
         if params is None:
             params = []
@@ -250,6 +256,7 @@ class Compute(Field):
         self.name = name
         self.description = description
         self.deprecation_reason = deprecation_reason
+        self.batch = batch
 
 
 class Query(Field):
@@ -755,7 +762,11 @@ def sort_from_function():
 
 
 def compute_from_function(
-    name=None, description=None, deprecation_reason=None, loc=autoloc
+    name=None,
+    description=None,
+    deprecation_reason=None,
+    batch=False,
+    loc=autoloc,
 ) -> Field:
     """ Decorator which allows to define a :func:`compute` field from a
     function.
@@ -777,6 +788,10 @@ def compute_from_function(
 
     :param description: Description
     :param deprecation_reason: Reason for deprecation
+    :param batch:
+        If set, the field is resolved for many parents at once, see
+        :func:`compute`; :data:`parent_param` is then the list of parents
+        and the function must return a list of values
     """
     loc = code_location.here() if loc is autoloc else loc
 
@@ -806,6 +821,7 @@ def compute_from_function(
             deprecation_reason=deprecation_reason,
             name=field_name,
             description=description,
+            batch=batch,
         )
 
     return decorate
@@ -1155,6 +1171,7 @@ def compute(
     description: t.Optional[str] = None,
     name: t.Optional[str] = None,
     deprecation_reason: t.Optional[str] = None,
+    batch: bool = False,
     loc=autoloc,
 ) -> Field:
     """
@@ -1190,12 +1207,26 @@ def compute(
     By default :func:`compute` computes the value as ``getattr(parent, name)``
     but ``f`` argument can be supplied instead.
 
+    A computed field of an entity is resolved once for every entity in the
+    result.  Set ``batch`` to resolve the field for all entities at the same
+    position in the query at once: ``f`` then receives the list of parent
+    entity ids and must return a list of values in the same order::
+
+        >>> code = compute(
+        ...     type=scalar.String,
+        ...     f=lambda parents, info, params: [str(id) for id in parents],
+        ...     batch=True,
+        ... )
+
+    Computed params of a batched field receive the list of parents too.
+
     :param type: GraphQL type
     :param f: Function used to compute the value of the field
     :param params: Field params
     :param name: Name
     :param description: Description
     :param deprecation_reason: Reason for deprecation
+    :param batch: Resolve the field for many parents at once
     """
     loc = code_location.here() if loc is autoloc else loc
     return Compute(
@@ -1205,6 +1236,7 @@ def compute(
         name=name,
         description=description,
         deprecation_reason=deprecation_reason,
+        batch=batch,
         loc=loc,
     )
 
@@ -38,7 +38,7 @@ from .input_coercion import (
     undefined,
     are_types_compatible,
 )
-from . import model, desc
+from . import model, desc, cache, cost
 from rex.query.builder import q
 
 
@@ -106,13 +106,15 @@ class Result:
     :attribute data: Produced data. Set to ``None`` if result is invalid.
     :attribute errors: Errors collected during query execution.
     :attribute invalid: If result is invalid.
+    :attribute extensions: Additional information about the execution.
     """
 
-    __slots__ = ("data", "errors", "invalid")
+    __slots__ = ("data", "errors", "invalid", "extensions")
 
-    def __init__(self, data=None, errors=None, invalid=False):
+    def __init__(self, data=None, errors=None, invalid=False, extensions=None):
         self.data = data
         self.errors = errors
+        self.extensions = extensions
 
         if invalid:
             assert data is None
@@ -125,6 +127,7 @@ class Result:
             and self.data == other.data
             and self.errors == other.errors
             and self.invalid == other.invalid
+            and self.extensions == other.extensions
         )
 
     def to_dict(self):
@@ -135,6 +138,9 @@ class Result:
         if not self.invalid:
             response["data"] = self.data
 
+        if self.extensions:
+            response["extensions"] = self.extensions
+
         return response
 
 
@@ -202,6 +208,11 @@ class ExecutionContext:
         self.context_value = context_value
         self._arguments_cache = {}
         self._subfields_cache = {}
+        # Batched computed fields waiting to be resolved, grouped by
+        # the field and its position in the query.
+        self._deferred_fields = OrderedDict()
+        # Data of root query fields fetched with a single query.
+        self._prefetched = {}
 
     def get_field_params(
         self, parent, parent_type, field: model.Field, field_node: language.ast.Field
@@ -246,6 +257,28 @@ class ExecutionContext:
         # self.errors.append(error.GraphQLError(msg))
         raise error.GraphQLError(msg)
 
+    def defer_field(self, parent_type, parent, field_nodes, path, result, name):
+        # Positions in lists are ignored so that the field is resolved
+        # for all the entities at the same path at once.
+        path_key = tuple(item for item in path if not isinstance(item, int))
+        k = parent_type, tuple(field_nodes), path_key
+        if k not in self._deferred_fields:
+            self._deferred_fields[k] = DeferredField(
+                parent_type, field_nodes, path
+            )
+        self._deferred_fields[k].add(parent, path, result, name)
+
+    def prefetch(self, field_nodes, data):
+        self._prefetched[tuple(field_nodes)] = data
+
+    def pop_prefetched(self, field_nodes):
+        return self._prefetched.pop(tuple(field_nodes), undefined)
+
+    def pop_deferred_fields(self):
+        deferred_fields = list(self._deferred_fields.values())
+        self._deferred_fields = OrderedDict()
+        return deferred_fields
+
     def get_sub_fields(self, return_type, field_nodes):
         k = return_type, tuple(field_nodes)
         if k not in self._subfields_cache:
@@ -260,6 +293,25 @@ class ExecutionContext:
         return self._subfields_cache[k]
 
 
+class DeferredField:
+    """ Batched computed field to be resolved for a list of parents."""
+
+    __slots__ = ("parent_type", "field_nodes", "path", "parents", "targets")
+
+    def __init__(self, parent_type, field_nodes, path):
+        self.parent_type = parent_type
+        self.field_nodes = field_nodes
+        self.path = path
+        self.parents = []
+        # For each parent: the path to the value, the dictionary to store
+        # the value and the key.
+        self.targets = []
+
+    def add(self, parent, path, result, name):
+        self.parents.append(parent)
+        self.targets.append((path, result, name))
+
+
 def collect_fields(
     ctx: ExecutionContext,
     runtime_type: model.Type,
@@ -674,6 +726,8 @@ def complete_data(
                     result=item,
                 )
                 if field_def.descriptor.transform:
+                    # The transform expects batched fields to be resolved.
+                    execute_deferred_fields(ctx)
                     item_data = field_def.descriptor.transform(item_data)
                 result[name] = item_data
             elif isinstance(field_def, model.ComputedField):
@@ -682,6 +736,18 @@ def complete_data(
                 assert False, f"unknown field: {field_def!r}"
         # Now process computed subfields.
         for (name, field_nodes, field_def) in computed_fields:
+            if field_def.batch:
+                # Resolved later, together with other entities.
+                result[name] = None
+                ctx.defer_field(
+                    parent_type=return_type,
+                    parent=data.__id__,
+                    field_nodes=field_nodes,
+                    path=path + [name],
+                    result=result,
+                    name=name,
+                )
+                continue
             result[name] = execute_field(
                 ctx=ctx,
                 parent_type=return_type,
@@ -869,7 +935,9 @@ def resolve_field(
         path=path + [field_name],
     )
 
-    if isinstance(field_def, model.ComputedField):
+    if isinstance(field_def, model.ComputedField) and field_def.batch:
+        [result] = resolve_batch(ctx, parent_type, [parent], field_def, info)
+    elif isinstance(field_def, model.ComputedField):
         # Build a dict of arguments from the field.arguments AST, using the
         # variables scope to fulfill any variable references.
         params = ctx.get_field_params(parent, parent_type, field_def, field_node)
@@ -887,7 +955,11 @@ def resolve_field(
                 exc_info=sys.exc_info(),
             )
     elif isinstance(field_def, model.QueryField):
-        result = execute_query_field(ctx, parent, parent_type, field_def, field_nodes)
+        result = ctx.pop_prefetched(field_nodes)
+        if result is undefined:
+            result = execute_query_field(
+                ctx, parent, parent_type, field_def, field_nodes
+            )
         if field_def.descriptor.transform:
             result = field_def.descriptor.transform(result)
     else:
@@ -896,14 +968,182 @@ def resolve_field(
     return result, info, return_type
 
 
+def resolve_batch(ctx, parent_type, parents, field_def, info):
+    field_name = info.field_name
+    # Computed params of a batched field get the list of parents.
+    params = get_param_values(
+        ctx,
+        field=field_def,
+        parent=parents,
+        parent_type=parent_type,
+        params=field_def.params,
+        arg_nodes=info.field_nodes[0].arguments,
+        variables=ctx.variable_values,
+        allow_computed_params=True,
+    )
+    try:
+        results = list(field_def.resolver(parents, info, params))
+    except error.GraphQLError as err:
+        ctx.raise_error(
+            msg=f"Error while executing {parent_type.name}.{field_name}: {err}",
+        )
+    except Exception:
+        get_sentry().captureException()
+        ctx.raise_error(
+            msg=f"Error while executing {parent_type.name}.{field_name}",
+            exc_info=sys.exc_info(),
+        )
+    if len(results) != len(parents):
+        ctx.raise_error(
+            msg=f"Error while executing {parent_type.name}.{field_name}:"
+            f" expected {len(parents)} values, got {len(results)}",
+        )
+    return results
+
+
+def execute_deferred_fields(ctx: ExecutionContext):
+    # Resolves batched computed fields level by level: completing values
+    # of one level may defer fields of the next one.
+    deferred_fields = ctx.pop_deferred_fields()
+    while deferred_fields:
+        for deferred in deferred_fields:
+            field_nodes = deferred.field_nodes
+            field_name = field_nodes[0].name.value
+            field_def = deferred.parent_type.fields[field_name]
+            info = ExecutionInfo(
+                field_name=field_name,
+                field_nodes=field_nodes,
+                return_type=field_def.type,
+                parent_type=deferred.parent_type,
+                schema=ctx.schema,
+                fragments=ctx.fragments,
+                root_value=ctx.root_value,
+                operation=ctx.operation,
+                variable_values=ctx.variable_values,
+                context=ctx.context_value,
+                path=deferred.path[:-1] + [field_name],
+            )
+            results = resolve_batch(
+                ctx, deferred.parent_type, deferred.parents, field_def, info
+            )
+            for (path, target, name), value in zip(deferred.targets, results):
+                target[name] = complete_value(
+                    ctx=ctx,
+                    return_type=field_def.type,
+                    field_nodes=field_nodes,
+                    info=info,
+                    path=path,
+                    result=value,
+                )
+        deferred_fields = ctx.pop_deferred_fields()
+
+
 def execute_query_field(ctx, parent, parent_type, field: model.QueryField, field_nodes):
-    state = RexBindingState()
-    binding = bind_query_field(state, ctx, parent, parent_type, field, field_nodes)
-    pipe = translate(binding)
+    shape = query_field_shape(ctx, parent, parent_type, field, field_nodes)
+    key = cache.get_plan_key(shape)
+    pipe = cache.get_plan(key) if key is not None else None
+    if pipe is None:
+        state = RexBindingState()
+        binding = bind_query_field(
+            state, ctx, parent, parent_type, field, field_nodes
+        )
+        pipe = translate(binding)
+        if key is not None:
+            cache.cache_plan(key, pipe)
     product = pipe()(None)
     return product.data
 
 
+def prefetch_query_fields(ctx, root_type, fields):
+    # Fetches all root query fields with a single query: one plan, one
+    # transaction.  If anything goes wrong, the fields are executed one by
+    # one, so that errors are reported exactly as without prefetching.
+    query_fields = []
+    for name, field_nodes in fields.items():
+        field_def = root_type.fields.get(field_nodes[0].name.value)
+        if isinstance(field_def, model.QueryField):
+            query_fields.append((name, field_nodes, field_def))
+    if len(query_fields) < 2:
+        return
+    try:
+        # Unlike the shape of a single field, this one is a pair, so that
+        # the two kinds of cache keys are never compared item by item.
+        shape = (
+            root_type,
+            tuple(
+                (
+                    name,
+                    query_field_shape(
+                        ctx, None, root_type, field_def, field_nodes
+                    ),
+                )
+                for name, field_nodes, field_def in query_fields
+            ),
+        )
+        key = cache.get_plan_key(shape)
+        pipe = cache.get_plan(key) if key is not None else None
+        if pipe is None:
+            state = RexBindingState()
+            elements = []
+            for name, field_nodes, field_def in query_fields:
+                element = bind_query_field(
+                    state, ctx, None, root_type, field_def, field_nodes
+                )
+                element = binding.AliasBinding(
+                    element, syntax.IdentifierSyntax(name)
+                )
+                elements.append(element)
+            b = binding.SelectionBinding(
+                state.scope,
+                elements,
+                domain.RecordDomain([decorate(element) for element in elements]),
+                syntax.SelectSyntax(
+                    state.scope.syntax,
+                    syntax.RecordSyntax([el.syntax for el in elements]),
+                ),
+            )
+            b = Select.__invoke__(b, state)
+            pipe = translate(b)
+            if key is not None:
+                cache.cache_plan(key, pipe)
+        product = pipe()(None)
+    except Exception:
+        logger.warning(
+            "Failed to fetch root query fields at once, executing separately",
+            exc_info=True,
+        )
+        return
+    for name, field_nodes, field_def in query_fields:
+        ctx.prefetch(field_nodes, getattr(product.data, name))
+
+
+def query_field_shape(ctx, parent, parent_type, field: model.QueryField, field_nodes):
+    # Everything `bind_query_field()` depends upon: the field, its parameters
+    # and the shape of the query subfields.  Parameter values are embedded
+    # into the query plan as literals, so they are a part of the shape.
+    field_node = field_nodes[0]
+    params = ctx.get_field_params(parent, parent_type, field, field_node)
+    entity_type = model.find_named_type(field.type)
+    subfields = []
+    if isinstance(entity_type, model.RecordType):
+        subfield_nodes = ctx.get_sub_fields(entity_type, field_nodes)
+        for name, subfield_nodes in subfield_nodes.items():
+            field_name = subfield_nodes[0].name.value
+            subfield = entity_type.fields.get(field_name)
+            if isinstance(subfield, model.QueryField):
+                subfields.append(
+                    (
+                        name,
+                        query_field_shape(
+                            ctx, parent, entity_type, subfield, subfield_nodes
+                        ),
+                    )
+                )
+            else:
+                subfields.append((name, field_name))
+    return (field, cache.freeze(params), tuple(subfields))
+
+
 def bind_query_field(state, ctx, parent, parent_type, field: model.QueryField, field_nodes):
     field_node = field_nodes[0]
     params = ctx.get_field_params(parent, parent_type, field, field_node)
@@ -1016,9 +1256,40 @@ def bind_query_field(state, ctx, parent, parent_type, field: model.QueryField, f
         return b
 
 
-def execute_exn(schema, query: str, variables=None, context=None, db=None):
-    document_node = language.parser.parse(query)
+def execute_exn(
+    schema,
+    query: str,
+    variables=None,
+    context=None,
+    db=None,
+    combine_root_fields=True,
+    max_cost=None,
+    extensions=None,
+):
+    if db is None:
+        db = get_db()
+
+    with db:
+        return execute_document(
+            schema=schema,
+            document_node=cache.parse(query),
+            variables=variables,
+            context=context,
+            combine_root_fields=combine_root_fields,
+            max_cost=max_cost,
+            extensions=extensions,
+        )
+
 
+def execute_document(
+    schema,
+    document_node,
+    variables=None,
+    context=None,
+    combine_root_fields=True,
+    max_cost=None,
+    extensions=None,
+):
     ctx = ExecutionContext(
         schema=schema,
         document_node=document_node,
@@ -1044,18 +1315,29 @@ def execute_exn(schema, query: str, variables=None, context=None, db=None):
         fields={},
     )
 
-    if db is None:
-        db = get_db()
+    if max_cost is not None or extensions is not None:
+        operation_cost = cost.estimate_cost(ctx, root_type, fields)
+        if extensions is not None:
+            extensions["cost"] = operation_cost
+        if max_cost is not None and operation_cost > max_cost:
+            raise error.GraphQLError(
+                f"Operation cost {operation_cost} exceeds"
+                f" the maximum allowed cost {max_cost}.",
+                nodes=[operation],
+            )
 
-    with db:
-        data = execute_fields(
-            ctx=ctx,
-            parent_type=root_type,
-            parent=ctx.root_value,
-            fields=fields,
-            path=[],
-            info=None,
-        )
+    if combine_root_fields and operation.operation == "query":
+        prefetch_query_fields(ctx, root_type, fields)
+
+    data = execute_fields(
+        ctx=ctx,
+        parent_type=root_type,
+        parent=ctx.root_value,
+        fields=fields,
+        path=[],
+        info=None,
+    )
+    execute_deferred_fields(ctx)
 
     return data
 
@@ -1066,6 +1348,8 @@ def execute(
     variables: t.Dict[str, t.Any] = None,
     context: t.Any = None,
     db=None,
+    combine_root_fields: bool = True,
+    max_cost: t.Optional[int] = None,
 ) -> Result:
     """ Execute GraphQL query.
 
@@ -1079,7 +1363,15 @@ def execute(
         Context value. This is an artbitrary value which can be accessed from
         any point of computed and query fields. Use this to pass generally
         available data such as current user id.
+    :param combine_root_fields:
+        If set, root query fields are fetched with a single database query
+        instead of a query per field.
+    :param max_cost:
+        If set, operations with the estimated cost above this value are
+        rejected before execution; the estimated cost is reported in the
+        ``cost`` entry of the result extensions.
     """
+    extensions = {} if max_cost is not None else None
     try:
         data = execute_exn(
             schema=schema,
@@ -1087,7 +1379,10 @@ def execute(
             variables=variables,
             context=context,
             db=db,
+            combine_root_fields=combine_root_fields,
+            max_cost=max_cost,
+            extensions=extensions,
         )
-        return Result(data=data)
+        return Result(data=data, extensions=extensions)
     except error.GraphQLError as err:
-        return Result(errors=[err], invalid=True)
+        return Result(errors=[err], invalid=True, extensions=extensions)
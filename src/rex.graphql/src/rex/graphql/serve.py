@@ -11,7 +11,7 @@
 # copyright: 2016 GraphQL Python
 # copyright: 2019-present Prometheus Research, LLC
 
-from typing import Any
+from typing import Any, Optional
 import datetime
 import json
 
@@ -42,8 +42,12 @@ def serve(
     db: Any = None,
     context: Any = None,
     graphiql_enabled: bool = True,
+    max_cost: Optional[int] = None,
 ) -> Response:
-    """ Serve GraphQL :class:`webob.Request`."""
+    """ Serve GraphQL :class:`webob.Request`.
+
+    Operations with the estimated cost above ``max_cost`` are rejected.
+    """
 
     method = req.method.lower()
 
@@ -67,6 +71,7 @@ def serve(
             variables=params.variables,
             db=db,
             context=context,
+            max_cost=max_cost,
         )
 
     if show_graphiql:
@@ -1,5 +1,6 @@
 import pytest
 import decimal
+import importlib
 import json
 
 from rex.graphql import (
@@ -23,6 +24,7 @@ from rex.graphql import (
     parent_param,
     schema,
     execute_exn,
+    get_cache_stats,
     GraphQLError,
     filter_from_function,
     compute_from_function,
@@ -30,6 +32,9 @@ from rex.graphql import (
 )
 from rex.core import Rex, Error, cached
 
+# The package exports the `execute()` function under the name of its module.
+execute_module = importlib.import_module("rex.graphql.execute")
+
 
 @pytest.fixture(scope="module")
 def rex():
@@ -131,6 +136,64 @@ def test_simple():
     }
 
 
+def test_combine_root_fields(monkeypatch):
+    sch = get_simple_schema()
+    query = """
+    query {
+        africa { name nation_count }
+        region { name }
+        nation_total: nation { name }
+    }
+    """
+    expected = execute(sch, query, combine_root_fields=False)
+    calls = []
+    execute_query_field = execute_module.execute_query_field
+
+    def counted(*args, **kwargs):
+        calls.append(args[3])
+        return execute_query_field(*args, **kwargs)
+
+    monkeypatch.setattr(execute_module, "execute_query_field", counted)
+    stats = get_cache_stats()
+    data = execute(sch, query)
+    updated_stats = get_cache_stats()
+    # All root fields are fetched by a single query.
+    assert calls == []
+    assert (
+        updated_stats["plans"]["hits"] + updated_stats["plans"]["misses"]
+        == stats["plans"]["hits"] + stats["plans"]["misses"] + 1
+    )
+    assert data == expected
+    assert data["africa"] == [{"name": "AFRICA", "nation_count": 5}]
+    assert len(data["region"]) == 5
+    assert len(data["nation_total"]) == 25
+
+    execute(sch, query, combine_root_fields=False)
+    assert len(calls) == 3
+
+
+def test_operation_cost():
+    sch = get_simple_schema()
+    query = """
+    query {
+        region {
+            name
+            nation_list { name }
+        }
+    }
+    """
+    extensions = {}
+    execute(sch, query, extensions=extensions)
+    # region: 1 + 10 (segment), name: 100, nation_list: 100 + 10 (segment),
+    # nation_list.name: 100 * 100
+    assert extensions == {"cost": 10221}
+    with pytest.raises(GraphQLError) as excinfo:
+        execute(sch, query, max_cost=1000)
+    assert str(excinfo.value) == (
+        "Operation cost 10221 exceeds the maximum allowed cost 1000."
+    )
+
+
 def test_compute_from_function():
     @compute_from_function()
     def add(x: scalar.Int, y: scalar.Int) -> scalar.Int:
@@ -486,6 +549,55 @@ def test_data_computed_field():
     }
 
 
+def test_data_computed_field_batch():
+    calls = []
+
+    def message(parents, info, params):
+        calls.append(len(parents))
+        return [f"Hello from '{parent}'" for parent in parents]
+
+    region = Entity(
+        "region",
+        fields=lambda: {
+            "name": query(q.name),
+            "message": compute(scalar.String, f=message, batch=True),
+            "nation": query(q.nation, nation),
+        },
+    )
+    nation = Entity(
+        "nation",
+        fields=lambda: {
+            "message": compute(scalar.String, f=message, batch=True),
+        },
+    )
+    sch = schema(fields=lambda: {"region": query(q.region, region)})
+    data = execute(
+        sch,
+        """
+        query {
+            region {
+                message
+                nation { message }
+            }
+        }
+        """,
+    )
+    # One call per field and level instead of one call per entity.
+    assert sorted(calls) == [5, 25]
+    assert [item["message"] for item in data["region"]] == [
+        "Hello from 'AFRICA'",
+        "Hello from 'AMERICA'",
+        "Hello from 'ASIA'",
+        "Hello from 'EUROPE'",
+        "Hello from ''MIDDLE EAST''",
+    ]
+    assert all(
+        nation_item["message"].startswith("Hello from ")
+        for item in data["region"]
+        for nation_item in item["nation"]
+    )
+
+
 def test_computed_arg_simple():
     def get_message(parent, info, params):
         name = params.get("name", "Mr.None")
@@ -2727,3 +2839,26 @@ def test_directive_skip_over_include():
         variables={"include": False, "skip": False},
     )
     assert data == {"africa": [{"name": "AFRICA"}]}
+
+
+def test_operation_cache():
+    sch = get_simple_schema()
+    query = """
+    query {
+        africa { name }
+        nation { name }
+    }
+    """
+    data = execute(sch, query)
+    assert data["africa"] == [{"name": "AFRICA"}]
+    stats = get_cache_stats()
+    data = execute(sch, query)
+    assert data["africa"] == [{"name": "AFRICA"}]
+    updated_stats = get_cache_stats()
+    assert (
+        updated_stats["documents"]["hits"] == stats["documents"]["hits"] + 1
+    )
+    # Both root fields share one combined plan.
+    assert updated_stats["plans"]["hits"] == stats["plans"]["hits"] + 1
+    assert updated_stats["plans"]["misses"] == stats["plans"]["misses"]
+    assert updated_stats["plans"]["size"] <= updated_stats["plans"]["capacity"]
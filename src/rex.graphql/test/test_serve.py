@@ -275,3 +275,22 @@ def test_serve_exec_err_invalid_syntax(sch):
     assert res.content_type == "application/json"
     assert 'data' not in res.json
     assert res.json["errors"]
+
+
+def test_serve_cost(sch):
+    req = Request.blank(
+        "/",
+        method="POST",
+        accept="application/json",
+        content_type="application/json",
+        body=json.dumps({"query": query_all}).encode("utf8"),
+    )
+    res = serve(sch, req, max_cost=1000)
+    assert res.status_code == 200
+    assert res.json == dict(expected_all, extensions={"cost": 111})
+
+    res = serve(sch, req, max_cost=100)
+    assert res.status_code == 400
+    assert 'data' not in res.json
+    assert res.json["errors"]
+    assert res.json["extensions"] == {"cost": 111}
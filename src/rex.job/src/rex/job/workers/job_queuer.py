@@ -2,6 +2,8 @@
 # Copyright (c) 2017, Prometheus Research, LLC
 #
 
+import heapq
+
 from rex.asynctask import AsyncTaskWorker, get_transport
 from rex.core import get_settings
 from rex.db import get_db
@@ -21,31 +23,58 @@ HTSQL_GET_NEW = '''
         status='new'
     )
     .sort(
+        priority-,
         date_submitted,
         code
     )
 '''
 
-HTSQL_CHECK_RUNNING = '''
-/count(job.filter(
-    type = $job_type
-    & status = {'started', 'queued'}
-))
+HTSQL_COUNT_RUNNING = '''
+/job
+    .filter(
+        status = {'started', 'queued'}
+    )
+    ^type{
+        type,
+        count(^) :as running,
+    }
 '''
 
-HTSQL_UPDATE_NEW = '''
-/job[$job]{
+HTSQL_QUEUE_NEW = '''
+/job
+    .filter(
+        code = $jobs
+        & status = 'new'
+    )
+    {
         id(),
         'queued' :as status,
     }
     /:update
 '''
 
+HTSQL_RESET_QUEUED = '''
+/job
+    .filter(
+        code = $jobs
+        & status = 'queued'
+    )
+    {
+        id(),
+        'new' :as status,
+    }
+    /:update
+'''
+
 
 class JobQueuerWorker(AsyncTaskWorker):
     """
     This worker will find "new" jobs and submit them to rex.asynctask for
     execution.
+
+    Jobs are considered in order of their priority (highest first), then by
+    the time they were submitted. Each job is sent to the ``rex_job_N`` queue
+    that currently holds the fewest tasks.
     """
 
     #:
@@ -54,24 +83,57 @@ class JobQueuerWorker(AsyncTaskWorker):
     def process(self, payload):
         database = get_db()
         transport = get_transport()
+        settings = get_settings()
+
+        jobs = database.produce(HTSQL_GET_NEW)
+        if not jobs:
+            return
+
+        # How many more jobs of each limited type may be queued in this pass.
+        available = {}
+        for job_type, limits in settings.job_limits.items():
+            if limits['max_concurrency'] is not None:
+                available[job_type] = limits['max_concurrency']
+        if available:
+            for row in database.produce(HTSQL_COUNT_RUNNING):
+                if row.type in available:
+                    available[row.type] -= row.running
+
+        queues = [
+            (transport.poll_queue('rex_job_%s' % (queue_num,)), queue_num)
+            for queue_num in range(settings.job_queues)
+        ]
+        heapq.heapify(queues)
+
+        selected = []
+        for job in jobs:
+            if job.type in available:
+                if available[job.type] <= 0:
+                    continue
+                available[job.type] -= 1
+
+            size, queue_num = queues[0]
+            heapq.heapreplace(queues, (size + 1, queue_num))
+            selected.append((job.code, queue_num))
 
-        queue_num = 0
-        for job in database.produce(HTSQL_GET_NEW):
-            if job.type in get_settings().job_limits:
-                max_concurrency = get_settings() \
-                    .job_limits[job.type]['max_concurrency']
-                if max_concurrency is not None:
-                    num_type_running = database.produce(
-                        HTSQL_CHECK_RUNNING,
-                        job_type=job.type,
-                    )[0]
-                    if num_type_running >= max_concurrency:
-                        continue
-
-            transport.submit_task(
-                'rex_job_%s' % queue_num,
-                {'code': job.code},
-            )
-            database.produce(HTSQL_UPDATE_NEW, job=job.code)
-            queue_num = (queue_num + 1) % get_settings().job_queues
+        if not selected:
+            return
 
+        # Mark the jobs as queued before submitting them, so that an executor
+        # that picks a job up right away does not have its status overwritten.
+        database.produce(
+            HTSQL_QUEUE_NEW,
+            jobs=[code for code, queue_num in selected],
+        )
+        for idx, (code, queue_num) in enumerate(selected):
+            try:
+                transport.submit_task(
+                    'rex_job_%s' % (queue_num,),
+                    {'code': code},
+                )
+            except Exception:
+                database.produce(
+                    HTSQL_RESET_QUEUED,
+                    jobs=[code for code, queue_num in selected[idx:]],
+                )
+                raise
@@ -3,8 +3,22 @@
 #
 
 
+import multiprocessing
+import threading
+
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue, Full
+
+from htsql.core.connect import transaction, scramble
+from htsql.core.context import context
+from htsql.core.domain import ID
+from htsql.core.error import Error as HTSQLError
+from htsql.tweak.etl.cmd.copy import BuildCollectCopy
+from htsql.tweak.etl.cmd.insert import BuildExtractTable
+from rex.core import Error, get_settings, get_rex
 from rex.port import Port
-from rex.port.replace import adapt, flatten, match, patch
+from rex.port.replace import adapt, flatten, scalars, Reference, MISSING
 from rex.instrument import Assessment
 
 from .tables import PrimaryTable
@@ -38,44 +52,101 @@ class AssessmentLoader(object):
     def load(self, database):
         tree = self.mapping.get_port_tree()
         port = Port(tree, database)
-        assessment_impl = Assessment.get_implementation()
+
+        with database:
+            if context.app.htsql.db.engine == 'pgsql':
+                write = CopyWriter(port).write
+            else:
+                write = port.bulk_insert
+
+        batches = self.retrieve(database)
+        processes = get_settings().mart_load_processes
+        if processes:
+            return self.load_pipelined(batches, write, processes)
 
         num_assessments = 0
+        for batch in batches:
+            dataset = [map_assessment(self.mapping, item) for item in batch]
+            write(dataset)
+            num_assessments += len(dataset)
+
+        return num_assessments
+
+    def retrieve(self, database):
+        # Generates batches of (data, instrument_version_uid, uid,
+        # selection_record) for the selected Assessments.
+        assessment_impl = Assessment.get_implementation()
+        batch_size = get_settings().mart_load_batch_size
+
         selected = database.produce(
             self.definition['selector']['query'],
             **self.get_selector_params()
         )
 
-        for i in range(0, len(selected), 100):
+        for i in range(0, len(selected), batch_size):
             # Retrieve a batch of Assessments from the datastore
             selected_value_map = dict([
                 (str(rec.assessment_uid), rec)
-                for rec in selected[i:i + 100]
+                for rec in selected[i:i + batch_size]
             ])
             assessments = assessment_impl.bulk_retrieve(
                 list(selected_value_map.keys())
             )
 
-            # Collect port data.
-            dataset = []
-            for assessment in assessments:
-                if not assessment.data:
-                    continue
-
-                data = self.mapping.get_port_data(
+            batch = [
+                (
                     assessment.data,
                     assessment.instrument_version_uid,
+                    assessment.uid,
                     selected_value_map[assessment.uid],
                 )
-                data['assessment_uid'] = assessment.uid
-                data['instrument_version_uid'] = \
-                    assessment.instrument_version_uid
-                dataset.append(data)
+                for assessment in assessments
+                if assessment.data
+            ]
+            if batch:
+                yield batch
 
-                num_assessments += 1
+    def load_pipelined(self, batches, write, processes):
+        # Retrieves Assessments in a background thread, maps them in a pool
+        # of processes and writes them in the current thread.  At most
+        # ``processes`` batches wait in each stage.
+        retrieved = prefetch(
+            (
+                [
+                    item[:3] + (SelectionRecord(item[3]),)
+                    for item in batch
+                ]
+                for batch in batches
+            ),
+            processes,
+        )
 
-            # Submit port data.
-            _insert_into_port(port, dataset)
+        num_assessments = 0
+        pending = deque()
+        try:
+            # The workers are spawned rather than forked: the executor
+            # starts them on demand, after the retrieving thread (and the
+            # threads of concurrent loads) are running, and a forked child
+            # could inherit locks held by those threads.
+            with ProcessPoolExecutor(
+                    max_workers=processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_mapping_process,
+                    initargs=(self.mapping,)) as executor:
+                for batch in retrieved:
+                    pending.append(executor.submit(map_batch, batch))
+                    if len(pending) > processes:
+                        dataset = pending.popleft().result()
+                        write(dataset)
+                        num_assessments += len(dataset)
+                while pending:
+                    dataset = pending.popleft().result()
+                    write(dataset)
+                    num_assessments += len(dataset)
+        finally:
+            for future in pending:
+                future.cancel()
+            retrieved.close()
 
         return num_assessments
 
@@ -91,12 +162,195 @@ class AssessmentLoader(object):
             database.produce(statement, **params)
 
 
-def _insert_into_port(port, dataset):
-    # Faster port.insert() without refetching and validation.
-    with port.db, port.db.transaction():
-        tree = port.tree
-        old_map = flatten(tree, adapt(tree, None))
-        new_map = flatten(tree, adapt(tree, dataset))
-        pair_map = match(old_map, new_map)
-        patch(pair_map, port._command_cache)  # noqa: protected-access
+class SelectionRecord(object):
+    """
+    A picklable copy of a record produced by an Assessment selector.
+
+    Identity values are replaced with their text form, which is what the
+    Mart stores for them.
+    """
+
+    def __init__(self, record):
+        self.__fields__ = tuple(
+            name
+            for name in record.__fields__
+            if name is not None
+        )
+        for name in self.__fields__:
+            value = getattr(record, name)
+            if isinstance(value, ID):
+                value = str(value)
+            setattr(self, name, value)
+
+
+def map_assessment(mapping, item):
+    data, instrument_version_uid, uid, selection_record = item
+    port_data = mapping.get_port_data(
+        data,
+        instrument_version_uid,
+        selection_record,
+    )
+    port_data['assessment_uid'] = uid
+    port_data['instrument_version_uid'] = instrument_version_uid
+    return port_data
+
+
+# The mapping used by the processes of a pipelined load.
+_PROCESS_MAPPING = None
+
 
+def init_mapping_process(mapping):
+    global _PROCESS_MAPPING  # pylint: disable=global-statement
+    _PROCESS_MAPPING = mapping
+
+
+def map_batch(batch):
+    return [map_assessment(_PROCESS_MAPPING, item) for item in batch]
+
+
+def prefetch(iterable, size):
+    """
+    Iterates over ``iterable`` in a background thread, keeping at most
+    ``size`` items ahead of the consumer.
+    """
+
+    app = get_rex()
+    items = Queue(maxsize=size)
+    stopped = threading.Event()
+
+    def put(item):
+        # Gives up when the consumer is gone.
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            with app:
+                for item in iterable:
+                    if not put((item, None)):
+                        return
+        except BaseException as exc:  # pylint: disable=broad-except
+            put((None, exc))
+        else:
+            put((None, None))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, exc = items.get()
+            if exc is not None:
+                raise exc
+            if item is None:
+                break
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
+
+
+class CopyWriter(object):
+    """
+    Writes port data into a PostgreSQL database using ``COPY FROM STDIN``.
+
+    The surrogate keys of new records are taken from the table sequences
+    before the records are copied, so that the facet, branch and matrix
+    records can be copied along with their parents without reading back
+    the keys of the parents.
+    """
+
+    def __init__(self, port):
+        self.port = port
+        # Resolvers of links to the tables outside of the port; shared
+        # between batches.
+        self.resolve_by_arc = {}
+        self.extract_by_key = {}
+
+    def write(self, dataset):
+        with self.port.db, transaction() as connection:
+            tree = self.port.tree
+            cell_map = flatten(tree, adapt(tree, dataset))
+            key_by_reference = {}
+            for cells in cell_map.values():
+                if cells:
+                    self.write_cells(cells, key_by_reference, connection)
+
+    def write_cells(self, cells, key_by_reference, connection):
+        node = cells[0].node
+        table = node.table
+        arcs = list(scalars(node))
+        keys = self.reserve_keys(table, len(cells), connection)
+
+        # Records with the same set of fields go to the same COPY
+        # statement.  Links to parent records are replaced with the keys
+        # assigned to the parents.
+        rows_by_arcs = OrderedDict()
+        for cell, key in zip(cells, keys):
+            key_by_reference[cell.reference] = key
+            parent_arcs = []
+            parent_keys = []
+            field_arcs = []
+            fields = []
+            for arc, field in zip(arcs, cell.fields):
+                if field is MISSING:
+                    continue
+                if isinstance(field, Reference):
+                    if field not in key_by_reference:
+                        raise Error('Got unknown reference:', field)
+                    parent_arcs.append(arc)
+                    parent_keys.append(key_by_reference[field])
+                else:
+                    field_arcs.append(arc)
+                    fields.append(field)
+            rows_by_arcs.setdefault(
+                (tuple(parent_arcs), tuple(field_arcs)),
+                [],
+            ).append((key, parent_keys, fields))
+
+        for (parent_arcs, field_arcs), rows in rows_by_arcs.items():
+            extract_table = self.get_extract_table(node, field_arcs)
+            extract_table.prefetch([fields for _, _, fields in rows])
+            columns = [table.columns['id']]
+            for arc in parent_arcs:
+                # Links made by rex.deploy refer to the ``id`` column.
+                columns.extend(arc.joins[0].origin_columns)
+            columns.extend(extract_table.columns)
+            converts = [scramble(column.domain) for column in columns]
+            collect_copy = BuildCollectCopy.__invoke__(table, columns)
+            for key, parent_keys, fields in rows:
+                row = [key] + parent_keys + list(extract_table(fields))
+                collect_copy([
+                    convert(item)
+                    for item, convert in zip(row, converts)
+                ])
+            try:
+                collect_copy.copy()
+            except HTSQLError as exc:
+                exc.wrap('While copying records to', table.name)
+                raise
+
+    def get_extract_table(self, node, arcs):
+        key = (node, arcs)
+        if key not in self.extract_by_key:
+            self.extract_by_key[key] = BuildExtractTable.__invoke__(
+                node,
+                list(arcs),
+                resolve_by_arc=self.resolve_by_arc,
+            )
+        return self.extract_by_key[key]
+
+    def reserve_keys(self, table, count, connection):
+        # pylint: disable=no-self-use
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id'))"
+            ' FROM generate_series(1, %s)',
+            ('"%s"."%s"' % (table.schema.name, table.name), count),
+        )
+        return [row[0] for row in cursor.fetchall()]
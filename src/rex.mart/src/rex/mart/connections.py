@@ -10,7 +10,7 @@ from htsql.core.connect import connect
 
 from rex.core import get_settings
 from rex.db import get_db, RexHTSQL
-from rex.deploy import Cluster
+from rex.deploy import Cluster, get_catalog_cache
 
 from .config import get_hosting_db_uri, get_management_db_uri
 
@@ -43,7 +43,7 @@ def get_hosting_cluster():
     :rtype: rex.deploy.Cluster
     """
 
-    return Cluster(get_hosting_db_uri())
+    return Cluster(get_hosting_db_uri(), catalog_cache=get_catalog_cache())
 
 
 def get_mart_db(name, extensions=None):
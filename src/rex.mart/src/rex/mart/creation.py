@@ -6,10 +6,13 @@
 import gc
 import sys
 
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from datetime import datetime
 
-from rex.core import Error, get_settings
+from htsql_rex_deploy.introspect import reintrospect
+
+from rex.core import Error, get_settings, get_rex
 from rex.deploy import model as deploy_model
 
 from .assessments import AssessmentLoader
@@ -427,8 +430,8 @@ class MartCreator(object):
             driver.chdir(working_dir)
         driver(facts)
         driver.commit()
+        self.refresh_mart(driver)
         driver.close()
-        self.reconnect_mart()
 
     def deploy_structures(self):
         if not self.definition['deploy']:
@@ -458,9 +461,8 @@ class MartCreator(object):
         if not scripts:
             return
 
+        self.connect_mart()
         for idx, script in enumerate(scripts):
-            self.reconnect_mart()
-
             idx_label = '#%s' % (idx + 1,)
             self.log('%s script %s...' % (
                 script['type'].upper(),
@@ -484,6 +486,8 @@ class MartCreator(object):
                             cursor.execute(script['script'], params)
                         finally:
                             cursor.close()
+                # The script may have altered the schema.
+                self.refresh_mart()
 
             else:  # pragma: no cover
                 raise Error('Unknown script type "%s"' % (
@@ -505,6 +509,11 @@ class MartCreator(object):
             else:
                 assessments.append(cfg)
 
+        concurrency = get_settings().mart_load_concurrency
+        if concurrency > 1 and len(assessments) > 1:
+            self.load_assessments_concurrently(assessments, concurrency)
+            return
+
         for idx, assessment in enumerate(assessments):
             idx_label = '#%s (%s)' % (idx + 1, assessment['name'])
             self.log('Processing Assessment %s' % (idx_label,))
@@ -532,6 +541,52 @@ class MartCreator(object):
 
                 self.log('...complete')
 
+    def load_assessments_concurrently(self, assessments, concurrency):
+        # The structures are deployed one Assessment at a time, then the
+        # Assessments are loaded in parallel threads, each using its own
+        # database connections.
+        loaders = []
+        for idx, assessment in enumerate(assessments):
+            idx_label = '#%s (%s)' % (idx + 1, assessment['name'])
+            self.log('Deploying Assessment %s' % (idx_label,))
+
+            with guarded('While processing Assessment:', idx_label):
+                self.connect_mart()
+                params = self.get_query_params()
+                loader = AssessmentLoader(assessment, self.database, params)
+                self.assessment_mappings.append(loader.mapping)
+
+                with guarded('While deploying Assessment structures'):
+                    self._do_deploy(loader.get_deploy_facts())
+
+            loaders.append((idx_label, loader))
+
+        self.connect_mart()
+        app = get_rex()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(self._load_assessment, app, idx_label, loader)
+                for idx_label, loader in loaders
+            ]
+        for future in futures:
+            future.result()
+
+    def _load_assessment(self, app, idx_label, loader):
+        with app, guarded('While processing Assessment:', idx_label):
+            self.log('Loading Assessment %s' % (idx_label,))
+
+            with guarded('While loading Assessments'):
+                num_loaded = loader.load(self.database)
+                self.log('...%s Assessments loaded for %s' % (
+                    num_loaded,
+                    idx_label,
+                ))
+
+            with guarded('While performing Assessment calculations'):
+                loader.do_calculations(self.database)
+
+            self.log('...%s complete' % (idx_label,))
+
     def connect_mart(self):
         if not self.database:
             self.database = get_mart_etl_db(self.name)
@@ -547,6 +602,14 @@ class MartCreator(object):
             self.close_mart()
         self.connect_mart()
 
+    def refresh_mart(self, driver=None):
+        # Updates the catalog of the HTSQL instance after the structure of
+        # the Mart has changed; when the changes were made by a deploy
+        # driver, its catalog image is reused.
+        self.connect_mart()
+        with self.database:
+            reintrospect(driver)
+
     def execute_processors(self, processors):
         if not processors:
             return
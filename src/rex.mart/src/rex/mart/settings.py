@@ -20,6 +20,9 @@ __all__ = (
     'MartMaxMartsPerOwnerSetting',
     'MartDefaultMaxMartsPerOwnerDefinitionSetting',
     'MartHtsqlCacheDepthSetting',
+    'MartLoadBatchSizeSetting',
+    'MartLoadProcessesSetting',
+    'MartLoadConcurrencySetting',
 )
 
 
@@ -194,6 +197,54 @@ class MartHtsqlCacheDepthSetting(Setting):
     default = 20
 
 
+class MartLoadBatchSizeSetting(Setting):
+    """
+    Specifies how many Assessments are retrieved and written to a Mart
+    database at a time.
+
+    If not specified, defaults to 1000.
+    """
+
+    name = 'mart_load_batch_size'
+    validate = IntVal(min_bound=1)
+    default = 1000
+
+
+class MartLoadProcessesSetting(Setting):
+    """
+    Specifies the number of worker processes used to map Assessments into
+    Mart records.
+
+    When set, retrieving, mapping and writing Assessments run as concurrent
+    stages: retrieval in a background thread, mapping in a pool of this
+    many processes and writing in the creating thread.
+
+    If not specified, defaults to 0, which does all the work in the creating
+    thread.
+    """
+
+    name = 'mart_load_processes'
+    validate = IntVal(min_bound=0)
+    default = 0
+
+
+class MartLoadConcurrencySetting(Setting):
+    """
+    Specifies how many Assessment definitions of a Mart are loaded at the
+    same time.
+
+    When greater than 1, the structures of all the Assessments are deployed
+    first, then the Assessments are loaded in parallel, so a selector must
+    not rely on data loaded for another Assessment of the same Mart.
+
+    If not specified, defaults to 1.
+    """
+
+    name = 'mart_load_concurrency'
+    validate = IntVal(min_bound=1)
+    default = 1
+
+
 class MartDictionaryPresentationPrioritySetting(Setting):
     """
     Specifies the order of Presentation Types to consider when extracting
@@ -9,7 +9,7 @@ from .arm import RootArm, ArmDumper
 from .grow import Grow
 from .constraint import ConstraintSet
 from .produce import produce, describe
-from .replace import replace
+from .replace import replace, bulk_replace
 from htsql_rex_port import named_ports
 from htsql.core.context import context
 from htsql.core.connect import transaction
@@ -40,8 +40,7 @@ class Port:
                 tree = grow(RootArm([]))
         self.tree = tree
         self.db = db
-        # This command cache is no longer used by rex.port,
-        # but we keep it because it is used by rex.mart.
+        # Prepared commands reused by bulk operations.
         self._command_cache = {}
 
     def __str__(self):
@@ -143,6 +142,32 @@ class Port:
         """
         return self.replace(old, None)
 
+    def bulk_replace(self, old, new):
+        """
+        Replaces ``old`` port data with ``new`` data; optimized for
+        large datasets.
+
+        Unlike :meth:`.replace()`, ``old`` data is not validated against
+        the database and the modified records are not fetched back.  Records
+        are added, updated and deleted in batches, with a single statement
+        per batch.
+
+        `old`, `new`
+            Data in format compatible with port structure.
+        """
+        with self.db:
+            with transaction():
+                bulk_replace(self.tree, old, new, self._command_cache)
+
+    def bulk_insert(self, new):
+        """
+        Adds new records to the database; optimized for large datasets.
+
+        `new`
+            Data in format compatible with port structure.
+        """
+        self.bulk_replace(None, new)
+
     def __call__(self, req):
         """
         Handles an HTTP request.
@@ -11,10 +11,16 @@ from .produce import describe, produce
 from htsql.core.domain import Value
 from htsql.core.model import ColumnArc, ChainArc
 from htsql.core.classify import classify
+from htsql.core.context import context
+from htsql.core.error import Error as HTSQLError
 from htsql.tweak.etl.cmd.insert import (Clarify, BuildExtractTable,
-        BuildExecuteInsert, BuildResolveIdentity)
-from htsql.tweak.etl.cmd.merge import BuildResolveKey, BuildExecuteUpdate
-from htsql.tweak.etl.cmd.delete import BuildExecuteDelete
+        BuildExecuteInsert, BuildResolveIdentity, BuildExecuteInsertBatch,
+        BuildResolveIdentityBatch, BuildLinkCache, LinkCachePipe,
+        ProduceInsert)
+from htsql.tweak.etl.cmd.merge import (BuildResolveKey, BuildExecuteUpdate,
+        BuildResolveKeyBatch, BuildExecuteUpdateBatch)
+from htsql.tweak.etl.cmd.delete import (BuildExecuteDelete,
+        BuildExecuteDeleteBatch)
 import collections
 import json
 
@@ -385,60 +391,76 @@ def recover(pair_map, actual_map):
     return recovered_map
 
 
+def changes(pair, reference_to_identity):
+    # Finds the changes between the old and the new cell; returns
+    # `(node, identity, arcs, fields)`.  For a new record, `identity`
+    # is `None`; for a deleted record, `arcs` and `fields` are `None`.
+    old_cell, new_cell = pair
+    node = old_cell.node if old_cell is not None else new_cell.node
+    arcs = None
+    if old_cell is None:
+        identity = None
+        old_fields = None
+        new_fields = new_cell.fields
+    elif new_cell is None:
+        identity = old_cell.identity
+        old_fields = old_cell.fields
+        new_fields = None
+    else:
+        identity = old_cell.identity
+        old_fields = old_cell.fields
+        new_fields = new_cell.fields
+    if new_fields is not None:
+        resolved_fields = []
+        for field in new_fields:
+            if isinstance(field, Reference):
+                if field not in reference_to_identity:
+                    raise Error("Got unknown reference:", field)
+                field = reference_to_identity[field]
+            resolved_fields.append(field)
+        new_fields = resolved_fields
+        if old_fields is not None:
+            new_fields = [new_field
+                                if new_field != old_field else MISSING
+                          for old_field, new_field
+                                in zip(old_fields, new_fields)]
+        arcs = []
+        trimmed_fields = []
+        for arc, field in zip(scalars(node), new_fields):
+            if field is not MISSING:
+                arcs.append(arc)
+                trimmed_fields.append(field)
+        new_fields = trimmed_fields
+    return node, identity, arcs, new_fields
+
+
 def patch(pair_map, command_cache):
     # Updates the database.
     identity_map = collections.OrderedDict()
 
+    # Links resolved by a previous call may be out of date.
+    clear_links(command_cache)
+
     reference_to_identity = {}
     for schema_path in pair_map:
         pairs = pair_map[schema_path]
         identities = []
         identity_map[schema_path] = identities
+        prefetch(pairs, command_cache)
 
-        for old_cell, new_cell in pairs:
-            node = old_cell.node if old_cell is not None else new_cell.node
-            if old_cell is None:
-                identity = None
-                old_fields = None
-                new_fields = new_cell.fields
-            elif new_cell is None:
-                identity = old_cell.identity
-                old_fields = old_cell.fields
-                new_fields = None
-            else:
-                identity = old_cell.identity
-                old_fields = old_cell.fields
-                new_fields = new_cell.fields
-            if new_fields is not None:
-                resolved_fields = []
-                for field in new_fields:
-                    if isinstance(field, Reference):
-                        if field not in reference_to_identity:
-                            raise Error("Got unknown reference:", field)
-                        field = reference_to_identity[field]
-                    resolved_fields.append(field)
-                new_fields = resolved_fields
-                if old_fields is not None:
-                    new_fields = [new_field
-                                        if new_field != old_field else MISSING
-                                  for old_field, new_field
-                                        in zip(old_fields, new_fields)]
-                arcs = []
-                trimmed_fields = []
-                for arc, field in zip(scalars(node), new_fields):
-                    if field is not MISSING:
-                        arcs.append(arc)
-                        trimmed_fields.append(field)
-                new_fields = trimmed_fields
-            if old_fields is None:
-                new_identity = insert(node, arcs, new_fields, command_cache)
-            elif new_fields is None:
+        for pair in pairs:
+            node, identity, arcs, fields = \
+                    changes(pair, reference_to_identity)
+            if identity is None:
+                new_identity = insert(node, arcs, fields, command_cache)
+            elif fields is None:
                 delete(node, identity, command_cache)
                 new_identity = None
             else:
                 new_identity = update(
-                        node, arcs, identity, new_fields, command_cache)
+                        node, arcs, identity, fields, command_cache)
             if new_identity is not None:
+                new_cell = pair.new
                 reference_to_identity[new_cell.reference] = new_identity
                 identity_cell = Cell(new_cell.node, new_cell.reference,
                                      new_identity, None)
@@ -446,6 +468,127 @@ def patch(pair_map, command_cache):
     return identity_map
 
 
+def bulk_patch(pair_map, command_cache):
+    # Updates the database; unlike `patch()`, records are added, updated
+    # and deleted in batches, one statement for each batch.
+    identity_map = collections.OrderedDict()
+
+    clear_links(command_cache)
+
+    reference_to_identity = {}
+    for schema_path in pair_map:
+        pairs = pair_map[schema_path]
+        identities = []
+        identity_map[schema_path] = identities
+        prefetch(pairs, command_cache)
+
+        # Records waiting to be processed, grouped by the operation,
+        # the node and the assigned fields.
+        batches = collections.OrderedDict()
+        # The operation on the waiting records.
+        pending_kind = None
+        # References to the waiting records.
+        pending = set()
+
+        for pair in pairs:
+            old_cell, new_cell = pair
+            if old_cell is None:
+                kind = bulk_insert
+            elif new_cell is None:
+                kind = bulk_delete
+            else:
+                kind = bulk_update
+            # Keep the order of operations and make sure references
+            # could be resolved.
+            if (kind is not pending_kind or
+                    new_cell is not None and
+                    any(field in pending for field in new_cell.fields
+                        if isinstance(field, Reference))):
+                remember(bulk_flush(batches, command_cache),
+                         reference_to_identity, identities)
+                pending.clear()
+            pending_kind = kind
+            node, identity, arcs, fields = \
+                    changes(pair, reference_to_identity)
+            key = (kind, node, tuple(arcs or ()))
+            batch = batches.setdefault(key, [])
+            batch.append((new_cell, node, identity, arcs, fields))
+            if new_cell is not None:
+                pending.add(new_cell.reference)
+            if len(batch) >= bulk_size(kind, node, arcs, command_cache):
+                remember(kind(batch, command_cache),
+                         reference_to_identity, identities)
+                del batches[key]
+                pending.difference_update(
+                        cell.reference
+                        for cell, node, identity, arcs, fields in batch
+                        if cell is not None)
+
+        remember(bulk_flush(batches, command_cache),
+                 reference_to_identity, identities)
+    return identity_map
+
+
+def bulk_flush(batches, command_cache):
+    # Processes the waiting batches; returns a list of pairs
+    # `(cell, identity)` for the added and the modified records.
+    done = []
+    for (kind, node, arcs), batch in batches.items():
+        done.extend(kind(batch, command_cache))
+    batches.clear()
+    return done
+
+
+def remember(done, reference_to_identity, identities):
+    # Records identities of the added and the modified records.
+    for cell, identity in done:
+        reference_to_identity[cell.reference] = identity
+        identities.append(Cell(cell.node, cell.reference, identity, None))
+
+
+def clear_links(command_cache):
+    # Links resolved by a previous call may be out of date.
+    for resolve in links(command_cache).values():
+        if isinstance(resolve, LinkCachePipe):
+            resolve.clear()
+
+
+def links(command_cache):
+    # Link resolvers shared by all commands.
+    return command_cache.setdefault((links,), {})
+
+
+def prefetch(pairs, command_cache):
+    # Resolves links of the new and the modified records in batches.
+    resolve_by_arc = links(command_cache)
+    arcs_by_node = {}
+    values_by_arc = collections.OrderedDict()
+    for old_cell, new_cell in pairs:
+        if new_cell is None:
+            continue
+        node = new_cell.node
+        if node not in arcs_by_node:
+            arcs_by_node[node] = list(scalars(node))
+        old_fields = [MISSING]*len(new_cell.fields)
+        if old_cell is not None:
+            old_fields = old_cell.fields
+        for arc, old_field, new_field in zip(arcs_by_node[node],
+                                             old_fields, new_cell.fields):
+            if not isinstance(arc, ChainArc):
+                continue
+            if (new_field is None or new_field is MISSING or
+                    isinstance(new_field, Reference) or
+                    new_field == old_field):
+                continue
+            values_by_arc.setdefault(arc, []).append(new_field)
+    for arc, values in values_by_arc.items():
+        if arc not in resolve_by_arc:
+            resolve_by_arc[arc] = BuildLinkCache.__invoke__(arc)
+        resolve = resolve_by_arc[arc]
+        if isinstance(resolve, LinkCachePipe):
+            resolve.prefetch(values)
+
+
 def insert(node, arcs, fields, command_cache):
     # Inserts a record.
     cache_key = (insert, node, tuple(arcs))
@@ -453,7 +596,7 @@ def insert(node, arcs, fields, command_cache):
         command = command_cache[cache_key]
     except KeyError:
         extract_table = BuildExtractTable.__invoke__(
-                node, arcs)
+                node, arcs, resolve_by_arc=links(command_cache))
         execute_insert = BuildExecuteInsert.__invoke__(
                 extract_table.table, extract_table.columns)
         resolve_identity = BuildResolveIdentity.__invoke__(
@@ -465,6 +608,76 @@ def insert(node, arcs, fields, command_cache):
     return command(fields)
 
 
+def bulk_size(kind, node, arcs, command_cache):
+    # The number of records to process with one statement.
+    if kind is bulk_insert:
+        return bulk_command(node, arcs, command_cache)[0]
+    elif kind is bulk_update:
+        return bulk_update_command(node, arcs, command_cache)[0]
+    else:
+        return bulk_delete_command(node, command_cache)[0]
+
+
+def bulk_insert(batch, command_cache):
+    # Adds a batch of records `[(cell, node, None, arcs, fields)]`;
+    # returns a list of pairs `(cell, identity)`.
+    cell, node, identity, arcs, fields = batch[0]
+    size, command = bulk_command(node, arcs, command_cache)
+    if command is not None and len(batch) > 1:
+        try:
+            identities = command([fields
+                                  for cell, node, identity, arcs, fields
+                                        in batch])
+        except HTSQLError:
+            # Fall back to one by one insertion to report the failed record.
+            pass
+        else:
+            return [(cell, identity)
+                    for (cell, node, old_identity, arcs, fields), identity
+                        in zip(batch, identities)]
+    return [(cell, insert(node, arcs, fields, command_cache))
+            for cell, node, identity, arcs, fields in batch]
+
+
+def bulk_command(node, arcs, command_cache):
+    # Prepares a command that inserts a batch of records; returns
+    # the batch size and the command.
+    cache_key = (bulk_command, node, tuple(arcs))
+    try:
+        return command_cache[cache_key]
+    except KeyError:
+        pass
+    extract_table = BuildExtractTable.__invoke__(
+            node, arcs, resolve_by_arc=links(command_cache))
+    execute_insert = BuildExecuteInsert.__invoke__(
+            extract_table.table, extract_table.columns)
+    size = 1
+    limit = context.app.tweak.etl.insert_limit
+    columns = execute_insert.input_columns
+    # Records that link to the same table may refer to each other.
+    if (limit is not None and columns and
+            not any(isinstance(arc, ChainArc) and
+                    arc.target.table == node.table
+                    for arc in arcs)):
+        size = min(limit, ProduceInsert.max_parameters // len(columns))
+        if len(execute_insert.output_columns) > 1:
+            size = min(size, ProduceInsert.max_composite)
+    command = None
+    if size > 1:
+        execute_insert_batch = BuildExecuteInsertBatch.__invoke__(
+                execute_insert.table, execute_insert.input_columns,
+                execute_insert.output_columns, size)
+        resolve_identity_batch = BuildResolveIdentityBatch.__invoke__(
+                execute_insert.table, execute_insert.output_columns, size)
+        command = (
+                lambda rows:
+                    resolve_identity_batch(
+                        execute_insert_batch(
+                            [extract_table(row) for row in rows])))
+    command_cache[cache_key] = (size, command)
+    return size, command
+
+
 def update(node, arcs, identity, fields, command_cache):
     # Updates a record.
     cache_key = (update, node, tuple(arcs))
@@ -474,7 +687,7 @@ def update(node, arcs, identity, fields, command_cache):
         resolve_key = BuildResolveKey.__invoke__(
                 node, arcs)
         extract_table = BuildExtractTable.__invoke__(
-                node, arcs)
+                node, arcs, resolve_by_arc=links(command_cache))
         execute_update = BuildExecuteUpdate.__invoke__(
                 extract_table.table, extract_table.columns)
         resolve_identity = BuildResolveIdentity.__invoke__(
@@ -505,6 +718,117 @@ def delete(node, identity, command_cache):
     return command(identity)
 
 
+def bulk_update(batch, command_cache):
+    # Updates a batch of records `[(cell, node, identity, arcs, fields)]`;
+    # returns a list of pairs `(cell, identity)`.
+    cell, node, identity, arcs, fields = batch[0]
+    size, command = bulk_update_command(node, arcs, command_cache)
+    if command is not None and len(batch) > 1:
+        try:
+            identities = command(
+                    [identity
+                     for cell, node, identity, arcs, fields in batch],
+                    [fields
+                     for cell, node, identity, arcs, fields in batch])
+        except HTSQLError:
+            # Fall back to one by one updates to report the failed record.
+            pass
+        else:
+            return [(cell, new_identity)
+                    for (cell, node, identity, arcs, fields), new_identity
+                        in zip(batch, identities)]
+    return [(cell, update(node, arcs, identity, fields, command_cache))
+            for cell, node, identity, arcs, fields in batch]
+
+
+def bulk_update_command(node, arcs, command_cache):
+    # Prepares a command that updates a batch of records; returns
+    # the batch size and the command.
+    cache_key = (bulk_update_command, node, tuple(arcs))
+    try:
+        return command_cache[cache_key]
+    except KeyError:
+        pass
+    extract_table = BuildExtractTable.__invoke__(
+            node, arcs, resolve_by_arc=links(command_cache))
+    execute_update = BuildExecuteUpdate.__invoke__(
+            extract_table.table, extract_table.columns)
+    size = 1
+    limit = context.app.tweak.etl.insert_limit
+    columns = execute_update.input_columns
+    key_columns = execute_update.key_columns
+    # Records that link to the same table may refer to each other.
+    if (limit is not None and
+            not any(isinstance(arc, ChainArc) and
+                    arc.target.table == node.table
+                    for arc in arcs)):
+        size = min(limit, ProduceInsert.max_parameters //
+                          (len(columns)+len(key_columns)))
+        if len(key_columns) > 1:
+            size = min(size, ProduceInsert.max_composite)
+    command = None
+    if size > 1:
+        resolve_key_batch = BuildResolveKeyBatch.__invoke__(node)
+        execute_update_batch = BuildExecuteUpdateBatch.__invoke__(
+                execute_update.table, execute_update.input_columns, size)
+        resolve_identity_batch = BuildResolveIdentityBatch.__invoke__(
+                execute_update.table, execute_update.output_columns, size)
+        command = (
+                lambda identities, rows:
+                    resolve_identity_batch(
+                        execute_update_batch(
+                            resolve_key_batch(identities),
+                            [extract_table(row) for row in rows])))
+    command_cache[cache_key] = (size, command)
+    return size, command
+
+
+def bulk_delete(batch, command_cache):
+    # Deletes a batch of records `[(None, node, identity, None, None)]`;
+    # returns an empty list.
+    cell, node, identity, arcs, fields = batch[0]
+    size, command = bulk_delete_command(node, command_cache)
+    if command is not None and len(batch) > 1:
+        try:
+            command([identity
+                     for cell, node, identity, arcs, fields in batch])
+        except HTSQLError:
+            # Fall back to one by one deletion to report the failed record.
+            pass
+        else:
+            return []
+    for cell, node, identity, arcs, fields in batch:
+        delete(node, identity, command_cache)
+    return []
+
+
+def bulk_delete_command(node, command_cache):
+    # Prepares a command that deletes a batch of records; returns
+    # the batch size and the command.
+    cache_key = (bulk_delete_command, node)
+    try:
+        return command_cache[cache_key]
+    except KeyError:
+        pass
+    resolve_key_batch = BuildResolveKeyBatch.__invoke__(node)
+    size = 1
+    limit = context.app.tweak.etl.insert_limit
+    key_columns = resolve_key_batch.columns
+    if limit is not None:
+        size = min(limit, ProduceInsert.max_parameters // len(key_columns))
+        if len(key_columns) > 1:
+            size = min(size, ProduceInsert.max_composite)
+    command = None
+    if size > 1:
+        execute_delete_batch = BuildExecuteDeleteBatch.__invoke__(
+                node.table, size)
+        command = (
+                lambda identities:
+                    execute_delete_batch(resolve_key_batch(identities)))
+    command_cache[cache_key] = (size, command)
+    return size, command
+
+
 def verify(identity_map, actual_map):
     # Verifies that all modified records are in the output data.
 
@@ -553,3 +877,21 @@ def replace(tree, old, new, constraints, command_cache):
     return product
 
 
+def bulk_replace(tree, old, new, command_cache):
+    # Like `replace()`, but trusts the `old` data, does not fetch
+    # the modified records and adds new records in batches.
+
+    old = load(old)
+    new = load(new)
+
+    old = adapt(tree, old)
+    new = adapt(tree, new)
+
+    old_map = flatten(tree, old)
+    new_map = flatten(tree, new)
+
+    pair_map = match(old_map, new_map)
+
+    bulk_patch(pair_map, command_cache)
+
+
@@ -16,6 +16,8 @@ from htsql.core.tr.binding import (
         RootBinding, LiteralRecipe, ClosedRecipe, SubstitutionRecipe)
 from htsql.core.tr.lookup import prescribe
 from htsql.core.tr.decorate import decorate_void
+from htsql.core.tr.translate import LRUCache, query_scope
+from htsql.core.context import context
 from htsql_rex_deploy.classify import get_meta
 
 
@@ -179,3 +181,55 @@ def produce_catalog(ignore_entities=None):
     return Product(meta, data)
 
 
+class CatalogEntry:
+    """
+    Cached catalog of a database.
+
+    `product`
+        The catalog product.
+    `outputs`
+        Serialized catalog; maps a format key to a triple
+        ``(headerlist, body, etag)``.
+    """
+
+    def __init__(self, product):
+        self.product = product
+        self.outputs = {}
+
+
+def get_catalog(ignore_entities=None):
+    """
+    Returns the catalog entry for the active HTSQL application.
+
+    The entry is reused for the same set of ignored entities and the same
+    query scope (the session user and the active masks).  It is kept in the
+    cache of the HTSQL application, so it is dropped when the database is
+    reintrospected.
+    """
+    scope = query_scope()
+    if scope is None or not context.app.htsql.query_cache_size:
+        return CatalogEntry(produce_catalog(ignore_entities=ignore_entities))
+    key = (tuple(sorted(ignore_entities or [])), scope)
+    try:
+        hash(key)
+    except TypeError:
+        return CatalogEntry(produce_catalog(ignore_entities=ignore_entities))
+    cache = context.app.htsql.cache
+    with cache.lock(get_catalog):
+        if get_catalog not in cache.values:
+            cache.values[get_catalog] = \
+                    LRUCache(size=context.app.htsql.query_cache_size)
+        entries = cache.values[get_catalog]
+        try:
+            return entries[key]
+        except KeyError:
+            pass
+    # Build the catalog outside the lock; concurrent requests may build
+    # the same catalog, but only one copy is kept.
+    entry = CatalogEntry(produce_catalog(ignore_entities=ignore_entities))
+    with cache.lock(get_catalog):
+        try:
+            return entries[key]
+        except KeyError:
+            entries[key] = entry
+            return entry
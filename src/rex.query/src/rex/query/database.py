@@ -4,21 +4,33 @@
 
 
 from webob import Response
-from webob.exc import HTTPMethodNotAllowed, HTTPBadRequest
+from webob.exc import (HTTPMethodNotAllowed, HTTPBadRequest, HTTPNotModified,
+        HTTPPreconditionFailed)
 from rex.core import Error
 from rex.db import get_db
 from .query import QueryVal
 from .bind import RexBindingState
-from .catalog import produce_catalog
+from .catalog import get_catalog
 from htsql import HTSQL
 from htsql.core.domain import Product
 from htsql.core.cmd.act import produce
 from htsql.core.fmt.accept import accept
 from htsql.core.fmt.emit import emit, emit_headers
 from htsql.core.tr.translate import translate
+import hashlib
 import json
 
 
+def format_key(format):
+    # Identifies the output format; `None` if the output cannot be cached.
+    key = [format.__class__]
+    for name, value in sorted(vars(format).items()):
+        if not isinstance(value, (str, bool, int, type(None))):
+            return None
+        key.append((name, value))
+    return tuple(key)
+
+
 class Database(object):
 
     def __init__(self, db=None, ignore_catalog_entities=None):
@@ -41,9 +53,9 @@ class Database(object):
         query = self.parse(query)
         with self.db:
             if query.is_catalog():
-                return produce_catalog(
+                return get_catalog(
                     ignore_entities=self.ignore_catalog_entities,
-                )
+                ).product
             pipe = self.translate(query, vars=vars)
             product = pipe()(None)
             return product
@@ -52,13 +64,18 @@ class Database(object):
         query = self.parse(query)
         with self.db:
             if query.is_catalog():
-                return produce_catalog(
+                return get_catalog(
                     ignore_entities=self.ignore_catalog_entities,
-                )
+                ).product
             pipe = self.translate(query, vars=vars)
             return Product(pipe.meta, None)
 
     def __call__(self, req):
+        if req.method in ('GET', 'HEAD') and 'catalog' in req.GET:
+            # `GET /?catalog` is a cacheable alternative to `POST ["catalog"]`.
+            query = self.parse(["catalog"])
+            with self.db:
+                return self.catalog(req, query)
         if req.method != 'POST':
             raise HTTPMethodNotAllowed()
         try:
@@ -71,17 +88,38 @@ class Database(object):
             raise HTTPBadRequest(str(exc))
         with self.db:
             if query.is_catalog():
-                product = produce_catalog(
-                    ignore_entities=self.ignore_catalog_entities,
-                )
+                return self.catalog(req, query)
+            pipe = self.translate(query, vars=None)
+            if 'dry-run' in req.GET:
+                product = Product(pipe.meta, None)
             else:
-                pipe = self.translate(query, vars=None)
-                if 'dry-run' in req.GET:
-                    product = Product(pipe.meta, None)
-                else:
-                    product = pipe()(None)
+                product = pipe()(None)
             format = query.format or accept(req.environ)
             headerlist = emit_headers(format, product)
             app_iter = list(emit(format, product))
             return Response(headerlist=headerlist, app_iter=app_iter)
 
+    def catalog(self, req, query):
+        # Serves the catalog; the output is cached together with the catalog
+        # and could be validated with the `If-None-Match` header.  Only
+        # `GET` and `HEAD` requests could be answered with `304 Not
+        # Modified`; for other methods, a matching `ETag` fails the request.
+        entry = get_catalog(ignore_entities=self.ignore_catalog_entities)
+        format = query.format or accept(req.environ)
+        key = format_key(format)
+        output = entry.outputs.get(key) if key is not None else None
+        if output is None:
+            headerlist = emit_headers(format, entry.product)
+            body = b"".join(emit(format, entry.product))
+            etag = hashlib.md5(body).hexdigest()
+            output = (headerlist, body, etag)
+            if key is not None:
+                entry.outputs[key] = output
+        headerlist, body, etag = output
+        if etag in req.if_none_match:
+            if req.method in ('GET', 'HEAD'):
+                return HTTPNotModified(etag=etag)
+            return HTTPPreconditionFailed()
+        response = Response(headerlist=list(headerlist), body=body)
+        response.etag = etag
+        return response